@@ -0,0 +1,93 @@
+"""Concurrent latency benchmark for the Clubly API.
+
+Fires a mix of heavy dashboard requests and light event lookups at a running
+backend and reports p50/p95/p99 latency per route. With the blocking pymongo
+client a single slow dashboard query stalls every light request handled by
+the same worker; with Motor the light requests keep flowing.
+
+Run it against the same seeded database before and after a change:
+
+    python -m benchmarks.concurrent_latency --url http://localhost:8001/api
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def login(base_url, login_name, password):
+    response = requests.post(f"{base_url}/auth/login", json={"login": login_name, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+def timed_get(session, url, headers=None):
+    start = time.perf_counter()
+    response = session.get(url, headers=headers)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return response.status_code, elapsed_ms
+
+
+def run(base_url, concurrency, requests_per_route):
+    founder_headers = login(base_url, "admin", "admin123")
+    events = requests.get(f"{base_url}/events").json()
+    if not events:
+        raise SystemExit("No events found - seed the database first")
+    event_id = events[0]["id"]
+
+    routes = {
+        "GET /api/dashboard/clubly-founder": (f"{base_url}/dashboard/clubly-founder", founder_headers),
+        "GET /api/events": (f"{base_url}/events", None),
+        "GET /api/events/{event_id}": (f"{base_url}/events/{event_id}", None),
+    }
+
+    # Interleave routes so light requests overlap with heavy ones
+    jobs = []
+    for _ in range(requests_per_route):
+        for name, (url, headers) in routes.items():
+            jobs.append((name, url, headers))
+
+    samples = {name: [] for name in routes}
+    errors = 0
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [(name, pool.submit(timed_get, session, url, headers)) for name, url, headers in jobs]
+        for name, future in futures:
+            status_code, elapsed_ms = future.result()
+            if status_code >= 400:
+                errors += 1
+            samples[name].append(elapsed_ms)
+    wall_time = time.perf_counter() - started
+
+    print(f"{len(jobs)} requests, concurrency {concurrency}, {wall_time:.2f}s wall, {errors} errors")
+    print(f"{'route':40} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, values in samples.items():
+        print(
+            f"{name:40} {statistics.mean(values):8.1f}ms {percentile(values, 50):8.1f}ms "
+            f"{percentile(values, 95):8.1f}ms {percentile(values, 99):8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8001/api", help="Backend API base URL")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per route")
+    args = parser.parse_args()
+    run(args.url.rstrip("/"), args.concurrency, args.requests)
@@ -0,0 +1,106 @@
+"""Cross-worker chat delivery latency load test.
+
+Start the backend with several workers sharing a Redis fan-out bus:
+
+    FANOUT_REDIS_URL=redis://localhost:6379 uvicorn server:app --workers 4 --port 8001
+
+then run:
+
+    python -m benchmarks.fanout_latency --url http://localhost:8001
+
+Each simulated client registers, books the first event and opens a socket;
+sockets and HTTP requests land on arbitrary workers. The assigned promoter
+then sends messages into every chat and the time from POST to delivery on
+the client socket is reported as p50/p95/p99.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+import httpx
+import websockets
+
+from benchmarks.concurrent_latency import percentile
+
+
+async def register_and_book(http, event_id):
+    username = f"bench_{uuid.uuid4().hex[:10]}"
+    response = await http.post("/api/auth/register", json={
+        "nome": "Bench",
+        "cognome": "Client",
+        "email": f"{username}@bench.clubly.it",
+        "username": username,
+        "password": "Password1",
+        "data_nascita": "2000-01-01",
+        "citta": "Milano"
+    })
+    response.raise_for_status()
+    token = response.json()["token"]
+    booking = await http.post("/api/bookings", json={
+        "event_id": event_id, "booking_type": "lista", "party_size": 2
+    }, headers={"Authorization": f"Bearer {token}"})
+    booking.raise_for_status()
+    return token, booking.json()["chat_id"]
+
+
+async def receive_messages(ws_url, token, expected, latencies, ready):
+    async with websockets.connect(f"{ws_url}/api/ws?token={token}") as socket:
+        ready.set()
+        received = 0
+        while received < expected:
+            data = json.loads(await socket.recv())
+            if data["type"] != "message" or not data["message"]["message"].startswith("bench:"):
+                continue
+            sent_at = float(data["message"]["message"].split(":", 1)[1])
+            latencies.append((time.time() - sent_at) * 1000)
+            received += 1
+
+
+async def main(args):
+    base_url = args.url.rstrip("/")
+    ws_url = base_url.replace("http", "ws", 1)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as http:
+        event_id = (await http.get("/api/events")).json()[0]["id"]
+        login = await http.post("/api/auth/login", json={"login": args.promoter, "password": args.promoter_password})
+        login.raise_for_status()
+        promoter_headers = {"Authorization": f"Bearer {login.json()['token']}"}
+
+        clients = await asyncio.gather(*(register_and_book(http, event_id) for _ in range(args.clients)))
+
+        latencies = []
+        ready_events = [asyncio.Event() for _ in clients]
+        receivers = [
+            asyncio.ensure_future(receive_messages(ws_url, token, args.messages, latencies, ready))
+            for (token, _), ready in zip(clients, ready_events)
+        ]
+        await asyncio.gather(*(ready.wait() for ready in ready_events))
+
+        started = time.perf_counter()
+        for _ in range(args.messages):
+            await asyncio.gather(*(
+                http.post(f"/api/chats/{chat_id}/messages", json={
+                    "chat_id": chat_id, "sender_id": "", "sender_role": "",
+                    "message": f"bench:{time.time()}"
+                }, headers=promoter_headers)
+                for _, chat_id in clients
+            ))
+        await asyncio.wait_for(asyncio.gather(*receivers), timeout=args.timeout)
+        elapsed = time.perf_counter() - started
+
+    print(f"{len(latencies)} deliveries to {args.clients} sockets in {elapsed:.2f}s")
+    print(f"mean {statistics.mean(latencies):.1f}ms  p50 {percentile(latencies, 50):.1f}ms  "
+          f"p95 {percentile(latencies, 95):.1f}ms  p99 {percentile(latencies, 99):.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8001")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=20, help="Messages per chat")
+    parser.add_argument("--promoter", default="marco_promoter")
+    parser.add_argument("--promoter-password", default="Password1@")
+    parser.add_argument("--timeout", type=float, default=120)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,527 @@
+"""Synthetic Saturday-night workload for the Clubly API.
+
+Two steps, both deterministic for a given --seed so releases can be compared
+on identical data and traffic:
+
+1. seed: bulk-load realistic volumes into a scratch database (by default
+   100k users, 5k events, 1M bookings with one chat each and 20M chat
+   messages, spread over 200 organizations; --scale shrinks everything)
+2. replay: drive a running backend with the weekend traffic mix (event
+   browsing, booking bursts, chat sends and reads, notification polls) from
+   many concurrent virtual users, then report throughput, p50/p95/p99 per
+   route and the MongoDB operations the run cost. Partway through, every
+   virtual user also tries to book a table at the same event at once (a
+   release burst), queueing in the waiting room when turned away, so table
+   contention and admission are measured too; --no-burst skips it
+
+    python -m benchmarks.nightlife seed --mongo-url mongodb://localhost:27017 --db clubly_bench
+    CLUBLY_DB_NAME=clubly_bench uvicorn server:app --workers 4 --port 8001
+    python -m benchmarks.nightlife replay --duration 120 --report release-a.json
+    python -m benchmarks.nightlife compare release-a.json release-b.json
+
+Every synthetic user is called userN with password Password1.
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Optional
+
+import bcrypt
+import httpx
+import typer
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.concurrent_latency import percentile  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+from passwords import BCRYPT_ROUNDS, PASSWORD_MAX_PENDING  # noqa: E402
+
+app = typer.Typer(help=__doc__.splitlines()[0])
+
+PASSWORD = "Password1"
+CITIES = ["Milano", "Roma", "Torino", "Bologna", "Napoli", "Firenze", "Verona", "Bari"]
+BOOKING_STATUSES = ["pending"] * 3 + ["confirmed"] * 5 + ["cancelled", "completed"]
+# Logins turned away with 503 by a full bcrypt queue are retried this often
+LOGIN_ATTEMPTS = 10
+MESSAGES = ["Ciao! A che ora apre?", "Siamo in 4", "Perfetto, grazie", "C'è dress code?", "Ci vediamo all'ingresso"]
+
+# Share of the replayed traffic per action; weights are relative
+TRAFFIC_MIX = {
+    "browse_events": 35,
+    "event_detail": 20,
+    "notifications": 20,
+    "chat_messages": 10,
+    "chat_send": 8,
+    "book": 5,
+    "user_chats": 2,
+}
+
+ROUTE_NAMES = {
+    "browse_events": "GET /api/events",
+    "event_detail": "GET /api/events/{event_id}",
+    "notifications": "GET /api/user/notifications/count",
+    "chat_messages": "GET /api/chats/{chat_id}/messages",
+    "chat_send": "POST /api/chats/{chat_id}/messages",
+    "book": "POST /api/bookings",
+    "user_chats": "GET /api/user/chats",
+    # Release burst, outside the weighted mix
+    "burst_book": "POST /api/bookings (release burst)",
+    "queue_join": "POST /api/events/{event_id}/queue",
+    "queue_poll": "GET /api/events/{event_id}/queue/{token}",
+}
+
+
+def make_id(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def zipf_index(rng: random.Random, size: int, skew: float = 1.2) -> int:
+    """Popular-first index: a few events and promoters take most of the traffic"""
+    return min(int(rng.paretovariate(skew)) - 1, size - 1)
+
+
+async def insert_batches(collection, documents, batch_size: int):
+    batch = []
+    inserted = 0
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            await collection.insert_many(batch, ordered=False)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    return inserted
+
+
+async def seed_database(db, users: int, events: int, bookings: int, messages: int, organizations: int,
+                        seed: int, batch_size: int):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    # One hash for everybody: hashing 100k passwords would dominate the seed time.
+    # It uses the backend's cost (BCRYPT_ROUNDS): a cheaper one would be rehashed
+    # on every first login, so replays would rewrite the dataset they measure
+    password_hash = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(BCRYPT_ROUNDS)).decode("utf-8")
+
+    organization_names = [f"Org {index:04d}" for index in range(organizations)]
+    await db.organizations.insert_many([{
+        "id": make_id(rng),
+        "name": name,
+        "description": f"Serate di {name}",
+        "location": rng.choice(CITIES),
+        "capo_promoter_id": None,
+        "created_at": now
+    } for name in organization_names])
+
+    # 1% promoters and 0.2% capo promoters, each tied to an organization
+    roles = []
+    for index in range(users):
+        if index % 500 == 0:
+            roles.append(("capo_promoter", organization_names[(index // 500) % organizations]))
+        elif index % 100 == 0:
+            roles.append(("promoter", organization_names[(index // 100) % organizations]))
+        else:
+            roles.append(("cliente", None))
+    user_ids = [make_id(rng) for _ in range(users)]
+    promoters_by_org = defaultdict(list)
+    clients = []
+    for user_id, (role, organization) in zip(user_ids, roles):
+        if organization:
+            promoters_by_org[organization].append(user_id)
+        else:
+            clients.append(user_id)
+
+    def user_documents():
+        for index, (user_id, (role, organization)) in enumerate(zip(user_ids, roles)):
+            yield {
+                "id": user_id,
+                "nome": f"Nome{index}",
+                "cognome": f"Cognome{index}",
+                "email": f"user{index}@bench.clubly.it",
+                "username": f"user{index}",
+                "password": password_hash,
+                "ruolo": role,
+                "data_nascita": "1998-05-01",
+                "citta": rng.choice(CITIES),
+                "organization": organization,
+                "status": "available" if role == "promoter" else None,
+                "profile_image": None,
+                "needs_setup": False,
+                "created_at": now - timedelta(days=rng.randint(0, 720))
+            }
+
+    typer.echo(f"users: {await insert_batches(db.users, user_documents(), batch_size)}")
+
+    event_rows = []
+    for index in range(events):
+        organization = organization_names[index % organizations]
+        event_rows.append((make_id(rng), organization))
+
+    def event_documents():
+        for index, (event_id, organization) in enumerate(event_rows):
+            tables = rng.choice([10, 15, 20, 30])
+            yield {
+                "id": event_id,
+                "name": f"Serata {index}",
+                # A quarter in the past, the rest over the next three months
+                "date": (now + timedelta(days=rng.randint(-30, 90))).strftime("%Y-%m-%d"),
+                "location": f"Club {index % 300}, {rng.choice(CITIES)}",
+                "organization": organization,
+                "start_time": rng.choice(["22:00", "23:00", "23:30", "00:00"]),
+                "lineup": [f"DJ {rng.randint(1, 400)}" for _ in range(rng.randint(1, 4))],
+                "guests": [],
+                "total_tables": tables,
+                "tables_available": tables,
+                "max_party_size": 10,
+                "created_at": now - timedelta(days=rng.randint(0, 120))
+            }
+
+    typer.echo(f"events: {await insert_batches(db.events, event_documents(), batch_size)}")
+
+    messages_per_chat = max(messages // max(bookings, 1), 1)
+
+    def booking_rows():
+        for _ in range(bookings):
+            event_id, organization = event_rows[zipf_index(rng, len(event_rows))]
+            candidates = promoters_by_org.get(organization) or [user_ids[0]]
+            yield (
+                make_id(rng), make_id(rng), rng.choice(clients), candidates[zipf_index(rng, len(candidates))],
+                event_id, now - timedelta(minutes=rng.randint(0, 60 * 24 * 60))
+            )
+
+    async def flush(booking_batch, chat_batch, message_batch):
+        await asyncio.gather(
+            db.bookings.insert_many(booking_batch, ordered=False),
+            db.chats.insert_many(chat_batch, ordered=False),
+            *(db.chat_messages.insert_many(message_batch[start:start + batch_size], ordered=False)
+              for start in range(0, len(message_batch), batch_size))
+        )
+
+    booking_batch, chat_batch, message_batch = [], [], []
+    seeded_bookings = seeded_messages = 0
+    for booking_id, chat_id, client_id, promoter_id, event_id, created_at in booking_rows():
+        status = rng.choice(BOOKING_STATUSES)
+        booking_batch.append({
+            "id": booking_id,
+            "user_id": client_id,
+            "event_id": event_id,
+            "booking_type": rng.choice(["lista", "lista", "tavolo"]),
+            "party_size": rng.randint(1, 8),
+            "status": status,
+            "promoter_id": promoter_id,
+            "auto_assigned": True,
+            "created_at": created_at
+        })
+        count = rng.randint(1, 2 * messages_per_chat - 1)
+        for position in range(count):
+            from_client = position % 2 == 0
+            message_batch.append({
+                "id": make_id(rng),
+                "chat_id": chat_id,
+                "sender_id": client_id if from_client else promoter_id,
+                "sender_role": "cliente" if from_client else "promoter",
+                "message": rng.choice(MESSAGES),
+                "timestamp": created_at + timedelta(minutes=position * rng.randint(1, 30)),
+                "is_automatic": position == 0
+            })
+        last_activity = created_at + timedelta(minutes=count * 15)
+        chat_batch.append({
+            "id": chat_id,
+            "booking_id": booking_id,
+            "client_id": client_id,
+            "promoter_id": promoter_id,
+            "event_id": event_id,
+            "status": "closed" if status in ("cancelled", "completed") else "active",
+            "unread_promoter": rng.randint(0, 3),
+            "unread_client": rng.randint(0, 2),
+            "created_at": created_at,
+            "updated_at": last_activity
+        })
+        seeded_messages += count
+        if len(booking_batch) >= batch_size:
+            await flush(booking_batch, chat_batch, message_batch)
+            seeded_bookings += len(booking_batch)
+            booking_batch, chat_batch, message_batch = [], [], []
+            typer.echo(f"bookings: {seeded_bookings}, messages: {seeded_messages}\r", nl=False)
+    if booking_batch:
+        await flush(booking_batch, chat_batch, message_batch)
+        seeded_bookings += len(booking_batch)
+    typer.echo(f"bookings: {seeded_bookings}, chats: {seeded_bookings}, messages: {seeded_messages}")
+
+
+@app.command()
+def seed(
+    mongo_url: str = typer.Option(os.environ.get("MONGO_URL", "mongodb://localhost:27017")),
+    db_name: str = typer.Option("clubly_bench", "--db"),
+    scale: float = typer.Option(1.0, help="Multiplier applied to every volume"),
+    users: int = 100_000,
+    events: int = 5_000,
+    bookings: int = 1_000_000,
+    messages: int = 20_000_000,
+    organizations: int = 200,
+    seed_value: int = typer.Option(2024, "--seed"),
+    batch_size: int = 10_000,
+    drop: bool = typer.Option(False, help="Drop the database first"),
+):
+    """Bulk-load a synthetic dataset into a scratch database"""
+    async def run():
+        client = AsyncIOMotorClient(mongo_url)
+        if drop:
+            await client.drop_database(db_name)
+        db = client[db_name]
+        started = time.perf_counter()
+        await seed_database(
+            db, max(int(users * scale), 1000), max(int(events * scale), 10), int(bookings * scale),
+            int(messages * scale), max(int(organizations * scale), 2), seed_value, batch_size
+        )
+        typer.echo("building indexes...")
+        failures = await ensure_indexes(db)
+        if failures:
+            typer.echo(f"index failures: {failures}", err=True)
+        typer.echo(f"seeded in {time.perf_counter() - started:.0f}s")
+        client.close()
+
+    asyncio.run(run())
+
+
+class VirtualUser:
+    """One client session: logs in once, then performs weighted actions"""
+
+    def __init__(self, http: httpx.AsyncClient, username: str, rng: random.Random, events: list):
+        self.http = http
+        self.username = username
+        self.rng = rng
+        self.events = events
+        self.headers = None
+        self.user_id = None
+        self.chat_ids = []
+
+    async def login(self, slots: asyncio.Semaphore):
+        for _ in range(LOGIN_ATTEMPTS):
+            async with slots:
+                response = await self.http.post("/auth/login", json={"login": self.username, "password": PASSWORD})
+            if response.status_code != 503:
+                break
+            # The backend's bcrypt queue is full: come back when it says so
+            await asyncio.sleep(float(response.headers.get("retry-after", 1)))
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['token']}"}
+        self.user_id = response.json()["user"]["id"]
+        chats = (await self.http.get("/user/chats", headers=self.headers)).json()
+        self.chat_ids = [chat["id"] for chat in chats]
+
+    async def perform(self, action: str) -> Optional[httpx.Response]:
+        event = self.rng.choice(self.events)
+        if action == "browse_events":
+            return await self.http.get("/events")
+        if action == "event_detail":
+            return await self.http.get(f"/events/{event['id']}")
+        if action == "notifications":
+            return await self.http.get("/user/notifications/count", headers=self.headers)
+        if action == "user_chats":
+            return await self.http.get("/user/chats", headers=self.headers)
+        if action == "book":
+            response = await self.http.post("/bookings", headers=self.headers, json={
+                "event_id": event["id"], "booking_type": "lista", "party_size": self.rng.randint(1, 6)
+            })
+            if response.status_code == 200:
+                self.chat_ids.append(response.json()["chat_id"])
+            return response
+        if not self.chat_ids:
+            return None
+        chat_id = self.rng.choice(self.chat_ids)
+        if action == "chat_messages":
+            return await self.http.get(f"/chats/{chat_id}/messages", headers=self.headers)
+        return await self.http.post(f"/chats/{chat_id}/messages", headers=self.headers, json={
+            "chat_id": chat_id, "sender_id": self.user_id, "sender_role": "cliente",
+            "message": self.rng.choice(MESSAGES)
+        })
+
+    async def release_burst(self, event: dict, record, deadline: float):
+        """Book a table at the release event, queueing in the waiting room if turned away"""
+        booking = {"event_id": event["id"], "booking_type": "tavolo", "party_size": 4}
+        response = await record("burst_book", self.http.post("/bookings", headers=self.headers, json=booking))
+        if response is None or response.status_code != 429:
+            return
+        response = await record("queue_join", self.http.post(f"/events/{event['id']}/queue", headers=self.headers))
+        if response is None or response.status_code != 200:
+            return
+        ticket = response.json()
+        while not ticket["admitted"]:
+            if time.perf_counter() >= deadline:
+                return
+            await asyncio.sleep(ticket["retry_after"])
+            response = await record("queue_poll", self.http.get(f"/events/{event['id']}/queue/{ticket['token']}"))
+            if response is None or response.status_code != 200:
+                return
+            ticket = response.json()
+        response = await record("burst_book", self.http.post("/bookings", headers=self.headers, json={
+            **booking, "queue_token": ticket["token"]
+        }))
+        if response is not None and response.status_code == 200:
+            self.chat_ids.append(response.json()["chat_id"])
+
+
+async def mongo_opcounters(mongo_url: Optional[str]) -> Optional[dict]:
+    if not mongo_url:
+        return None
+    client = AsyncIOMotorClient(mongo_url)
+    try:
+        return dict((await client.admin.command("serverStatus"))["opcounters"])
+    finally:
+        client.close()
+
+
+async def replay_traffic(base_url: str, mongo_url: Optional[str], users: int, concurrency: int,
+                         duration: float, think_time: float, seed_value: int,
+                         burst_at: Optional[float] = 0.5) -> dict:
+    rng = random.Random(seed_value)
+    actions = list(TRAFFIC_MIX)
+    weights = [TRAFFIC_MIX[action] for action in actions]
+    samples = defaultdict(list)
+    statuses = defaultdict(Counter)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as http:
+        events = (await http.get("/events")).json()
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        events = [event for event in events if event["date"] >= today] or events
+        # Synthetic clients: every user whose index is not a multiple of 100
+        usernames = [f"user{index}" for index in rng.sample(range(users), min(concurrency * 2, users)) if index % 100]
+        sessions = [VirtualUser(http, username, random.Random(rng.getrandbits(32)), events)
+                    for username in usernames[:concurrency]]
+        # At most as many logins in flight as one worker's bcrypt queue accepts
+        login_slots = asyncio.Semaphore(min(PASSWORD_MAX_PENDING, concurrency))
+        await asyncio.gather(*(session.login(login_slots) for session in sessions))
+        release_event = rng.choice(events)
+
+        before = await mongo_opcounters(mongo_url)
+        deadline = time.perf_counter() + duration
+
+        async def record(action: str, request) -> Optional[httpx.Response]:
+            started = time.perf_counter()
+            try:
+                response = await request
+            except httpx.HTTPError:
+                statuses[ROUTE_NAMES[action]]["error"] += 1
+                return None
+            if response is not None:
+                samples[ROUTE_NAMES[action]].append((time.perf_counter() - started) * 1000)
+                statuses[ROUTE_NAMES[action]][str(response.status_code)] += 1
+            return response
+
+        async def drive(session: VirtualUser):
+            while time.perf_counter() < deadline:
+                action = session.rng.choices(actions, weights)[0]
+                response = await record(action, session.perform(action))
+                if response is not None and think_time:
+                    await asyncio.sleep(session.rng.expovariate(1 / think_time))
+
+        async def release_burst():
+            await asyncio.sleep(duration * burst_at)
+            await asyncio.gather(*(session.release_burst(release_event, record, deadline) for session in sessions))
+
+        started = time.perf_counter()
+        phases = [drive(session) for session in sessions]
+        if burst_at is not None:
+            phases.append(release_burst())
+        await asyncio.gather(*phases)
+        elapsed = time.perf_counter() - started
+        after = await mongo_opcounters(mongo_url)
+
+    routes = {}
+    for route, values in sorted(samples.items()):
+        routes[route] = {
+            "requests": len(values),
+            "throughput": len(values) / elapsed,
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "statuses": dict(statuses[route]),
+        }
+    total = sum(len(values) for values in samples.values())
+    report = {
+        "seed": seed_value,
+        "concurrency": concurrency,
+        "duration": elapsed,
+        "requests": total,
+        "throughput": total / elapsed,
+        "routes": routes,
+    }
+    if burst_at is not None:
+        report["release_event"] = release_event["id"]
+    if before and after:
+        report["mongo_ops"] = {name: after[name] - before.get(name, 0) for name in after}
+    return report
+
+
+def print_report(report: dict):
+    typer.echo(f"{report['requests']} requests in {report['duration']:.1f}s, "
+               f"{report['throughput']:.1f} req/s, concurrency {report['concurrency']}")
+    typer.echo(f"{'route':40} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9}  statuses")
+    for route, stats in report["routes"].items():
+        codes = " ".join(f"{code}:{count}" for code, count in sorted(stats["statuses"].items()))
+        typer.echo(f"{route:40} {stats['throughput']:8.1f} {stats['p50']:7.1f}ms {stats['p95']:7.1f}ms "
+                   f"{stats['p99']:7.1f}ms  {codes}")
+    if "mongo_ops" in report:
+        per_request = {name: count / max(report["requests"], 1) for name, count in report["mongo_ops"].items()}
+        typer.echo("mongo ops: " + ", ".join(
+            f"{name} {count} ({per_request[name]:.2f}/req)" for name, count in report["mongo_ops"].items() if count
+        ))
+
+
+@app.command()
+def replay(
+    url: str = typer.Option("http://localhost:8001/api", help="Backend API base URL"),
+    mongo_url: Optional[str] = typer.Option(os.environ.get("MONGO_URL"), help="For serverStatus op counters"),
+    users: int = typer.Option(100_000, help="Users in the seeded dataset"),
+    concurrency: int = 200,
+    duration: float = 60.0,
+    think_time: float = typer.Option(0.0, help="Mean pause between actions, seconds"),
+    seed_value: int = typer.Option(2024, "--seed"),
+    burst: bool = typer.Option(True, help="Fire the release burst on one event"),
+    burst_at: float = typer.Option(0.5, help="When the release burst starts, as a fraction of the duration"),
+    report_path: Optional[str] = typer.Option(None, "--report", help="Write the JSON report here"),
+):
+    """Replay the Saturday-night traffic mix against a running backend"""
+    report = asyncio.run(replay_traffic(
+        url.rstrip("/"), mongo_url, users, concurrency, duration, think_time, seed_value, burst_at if burst else None
+    ))
+    print_report(report)
+    if report_path:
+        with open(report_path, "w") as handle:
+            json.dump(report, handle, indent=2)
+
+
+@app.command()
+def compare(baseline: str, candidate: str):
+    """Compare two replay reports route by route"""
+    with open(baseline) as handle:
+        before = json.load(handle)
+    with open(candidate) as handle:
+        after = json.load(handle)
+
+    def change(old, new):
+        return f"{(new - old) / old * 100:+6.1f}%" if old else "    n/a"
+
+    typer.echo(f"throughput {before['throughput']:.1f} -> {after['throughput']:.1f} req/s "
+               f"({change(before['throughput'], after['throughput'])})")
+    typer.echo(f"{'route':40} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for route in sorted(set(before["routes"]) | set(after["routes"])):
+        old, new = before["routes"].get(route), after["routes"].get(route)
+        if not old or not new:
+            typer.echo(f"{route:40} only in {'candidate' if new else 'baseline'}")
+            continue
+        typer.echo(f"{route:40} " + " ".join(change(old[key], new[key]) for key in ("p50", "p95", "p99")))
+
+
+if __name__ == "__main__":
+    app()
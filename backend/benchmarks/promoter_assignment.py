@@ -0,0 +1,114 @@
+"""Micro-benchmark for promoter assignment on POST /api/bookings.
+
+Seeds 500 promoters and 1M bookings into a scratch database, then times the
+old one-count_documents-per-promoter loop against every strategy in
+promoter_assignment. Requires a local mongod:
+
+    python -m benchmarks.promoter_assignment --url mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indexes import ensure_indexes  # noqa: E402
+from promoter_assignment import (  # noqa: E402
+    OPEN_BOOKING_STATUSES, PROMOTER_ROLES, STRATEGIES, find_candidate_promoters
+)
+
+ORGANIZATION = "Bench Nights"
+BOOKING_STATUSES = ["pending", "confirmed", "cancelled", "completed"]
+
+
+async def seed(db, promoters, bookings, events, batch_size=10000):
+    await db.users.drop()
+    await db.bookings.drop()
+    await db.assignment_counters.drop()
+    await ensure_indexes(db)
+
+    promoter_ids = [str(uuid.uuid4()) for _ in range(promoters)]
+    await db.users.insert_many([{
+        "id": promoter_id,
+        "email": f"{promoter_id}@bench.clubly.it",
+        "username": f"bench_{promoter_id[:8]}",
+        "ruolo": "promoter",
+        "organization": ORGANIZATION,
+        "status": "available",
+        "assignment_weight": random.randint(1, 3),
+    } for promoter_id in promoter_ids])
+
+    event_ids = [str(uuid.uuid4()) for _ in range(events)]
+    inserted = 0
+    while inserted < bookings:
+        size = min(batch_size, bookings - inserted)
+        await db.bookings.insert_many([{
+            "id": str(uuid.uuid4()),
+            "event_id": random.choice(event_ids),
+            "promoter_id": random.choice(promoter_ids),
+            "status": random.choice(BOOKING_STATUSES),
+        } for _ in range(size)], ordered=False)
+        inserted += size
+    return event_ids
+
+
+async def legacy_assign(db, event):
+    """The original O(promoters) round-trip implementation"""
+    promoters = await db.users.find({
+        "ruolo": {"$in": PROMOTER_ROLES},
+        "organization": event["organization"],
+        "status": "available"
+    }).to_list(length=None)
+    promoter_bookings = {}
+    for promoter in promoters:
+        promoter_bookings[promoter["id"]] = await db.bookings.count_documents({
+            "promoter_id": promoter["id"],
+            "status": {"$in": OPEN_BOOKING_STATUSES}
+        })
+    return min(promoter_bookings, key=promoter_bookings.get)
+
+
+async def time_calls(label, func, event, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await func(event)
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:24} mean {statistics.mean(samples):9.2f}ms  max {max(samples):9.2f}ms")
+
+
+async def main(args):
+    db = AsyncIOMotorClient(args.url)[args.db]
+    if not args.skip_seed:
+        print(f"Seeding {args.promoters} promoters and {args.bookings} bookings...")
+        event_ids = await seed(db, args.promoters, args.bookings, args.events)
+    else:
+        event_ids = await db.bookings.distinct("event_id")
+    event = {"id": event_ids[0], "organization": ORGANIZATION}
+
+    await time_calls("legacy per-promoter", lambda e: legacy_assign(db, e), event, args.legacy_iterations)
+    for name, strategy in STRATEGIES.items():
+        async def pick(e, strategy=strategy):
+            promoters = await find_candidate_promoters(db, e["organization"])
+            return await strategy.pick(db, e, promoters)
+        await time_calls(name, pick, event, args.iterations)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="clubly_bench")
+    parser.add_argument("--promoters", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=1_000_000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--legacy-iterations", type=int, default=5)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the previously seeded data")
+    asyncio.run(main(parser.parse_args()))
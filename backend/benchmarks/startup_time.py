@@ -0,0 +1,69 @@
+"""Startup-time benchmark for the Clubly API.
+
+Starts uvicorn repeatedly against the configured MongoDB and measures how
+long each process takes from spawn until /api/health/ready answers 200,
+which is when entrypoint.sh may route traffic to it. Startup used to seed
+demo data (several lookups and up to five bcrypt hashes) in every worker;
+it now only checks indexes and warms the connection pool.
+
+Run it from the backend directory with MONGO_URL pointing at a test database:
+
+    python -m benchmarks.startup_time --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_until_ready(url, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if requests.get(url, timeout=0.5).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.01)
+    return False
+
+
+def measure_startup(port, timeout):
+    """Seconds from spawning uvicorn until the readiness probe succeeds"""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not wait_until_ready(f"http://127.0.0.1:{port}/api/health/ready", timeout):
+            raise RuntimeError(f"Backend not ready after {timeout}s")
+        return time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    samples = [measure_startup(args.port, args.timeout) for _ in range(args.runs)]
+    for run, seconds in enumerate(samples, 1):
+        print(f"run {run}: {seconds * 1000:8.1f} ms")
+    print(f"median: {statistics.median(samples) * 1000:.1f} ms  max: {max(samples) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Async MongoDB access layer for the Clubly API.
+
+Every route goes through the Motor client defined here, so no database call
+blocks the uvicorn event loop.
+"""
+import asyncio
+import os
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from db_accounting import db_accounting_listener
+from metrics import mongo_command_metrics
+
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('CLUBLY_DB_NAME', 'clubly_db')
+
+# Connection pool sizing - one pool per uvicorn worker
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+# Connections opened at startup so the first requests skip the TCP/auth handshake
+MONGO_WARMUP_CONNECTIONS = int(os.environ.get('MONGO_WARMUP_CONNECTIONS', '4'))
+
+client = AsyncIOMotorClient(
+    MONGO_URL,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    event_listeners=[mongo_command_metrics, db_accounting_listener],
+)
+db: AsyncIOMotorDatabase = client[DB_NAME]
+
+
+async def warm_up_pool(database: AsyncIOMotorDatabase, connections: int = MONGO_WARMUP_CONNECTIONS):
+    """Open `connections` pooled sockets with concurrent pings"""
+    await asyncio.gather(*(database.command("ping") for _ in range(max(connections, 1))))
+
+
+def close_client():
+    """Close the shared Motor client (called on application shutdown)"""
+    client.close()
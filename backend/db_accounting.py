@@ -0,0 +1,108 @@
+"""Per-request MongoDB round-trip and time accounting.
+
+DBAccountingMiddleware opens a RequestDBStats for every HTTP request in a
+context variable. A pymongo command listener adds each command's duration
+to it; Motor runs commands on its executor with a copy of the caller's
+context, so the listener finds the stats of the request that issued them.
+
+Responses carry the totals as headers, visible in the browser dev tools:
+
+    X-DB-Queries: 7
+    Server-Timing: db;dur=12.4;desc="7 queries", app;dur=31.0
+
+Requests issuing more than DB_QUERY_BUDGET commands are logged, so N+1
+patterns show up in staging logs before they show up in production latency.
+"""
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+DB_QUERY_BUDGET = int(os.environ.get('DB_QUERY_BUDGET', '25'))
+DB_TIMING_HEADERS = os.environ.get('DB_TIMING_HEADERS', 'true').lower() == 'true'
+
+
+class RequestDBStats:
+    def __init__(self):
+        self.commands = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        # Commands of one request may complete concurrently on executor threads
+        with self._lock:
+            self.commands += 1
+            self.seconds += seconds
+
+
+_current_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("request_db_stats", default=None)
+
+
+def record_command(seconds: float):
+    """Charge one command to the current request, if any"""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(seconds)
+
+
+class DBAccountingListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        record_command(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        record_command(event.duration_micros / 1e6)
+
+
+class DBAccountingMiddleware:
+    """ASGI middleware adding X-DB-Queries/Server-Timing and enforcing the budget"""
+
+    def __init__(self, app, budget: Optional[int] = None, headers: bool = DB_TIMING_HEADERS):
+        self.app = app
+        self._budget = budget
+        self.headers = headers
+
+    @property
+    def budget(self) -> int:
+        return DB_QUERY_BUDGET if self._budget is None else self._budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDBStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and self.headers:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                timing = f'db;dur={stats.seconds * 1000:.1f};desc="{stats.commands} queries", app;dur={elapsed_ms:.1f}'
+                message = {**message, "headers": [
+                    *message.get("headers", []),
+                    (b"x-db-queries", str(stats.commands).encode("latin-1")),
+                    (b"server-timing", timing.encode("latin-1")),
+                ]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            if stats.commands > self.budget:
+                logger.warning(
+                    "%s %s issued %d database commands (budget %d, %.1f ms in MongoDB)",
+                    scope["method"], scope["path"], stats.commands, self.budget, stats.seconds * 1000
+                )
+
+
+db_accounting_listener = DBAccountingListener()
@@ -0,0 +1,136 @@
+"""Cross-worker fan-out bus for real-time events.
+
+A message published on any uvicorn worker is delivered to the handler of
+every worker, which then pushes it to the sockets that worker holds. Two
+backends are available:
+
+- InProcessBus: delivers to the local handler only; used for a single
+  worker and in tests
+- RedisBus: Redis pub/sub on one channel; selected when FANOUT_REDIS_URL
+  is set
+
+Messages are plain JSON-serializable dicts. If Redis cannot be reached,
+RedisBus still delivers the message to this worker's own handler, so the
+sockets and caches of the publishing worker stay up to date. Received
+messages are handled concurrently, at most FANOUT_CONCURRENCY at a time,
+so one slow handler does not hold back the rest of the channel.
+"""
+import asyncio
+import json
+import logging
+import os
+from typing import Awaitable, Callable, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+logger = logging.getLogger(__name__)
+
+FANOUT_REDIS_URL = os.environ.get('FANOUT_REDIS_URL')
+FANOUT_CHANNEL = os.environ.get('FANOUT_CHANNEL', 'clubly:fanout')
+FANOUT_CONCURRENCY = int(os.environ.get('FANOUT_CONCURRENCY', '64'))
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+class FanoutBus:
+    """Base class: publish messages to the handlers of all workers"""
+
+    def __init__(self):
+        self._handler: Optional[Handler] = None
+
+    async def start(self, handler: Handler):
+        self._handler = handler
+
+    async def stop(self):
+        self._handler = None
+
+    async def publish(self, message: dict):
+        raise NotImplementedError
+
+    async def _dispatch(self, message: dict):
+        if self._handler is None:
+            return
+        try:
+            await self._handler(message)
+        except Exception:
+            logger.exception("Fan-out handler failed for %s", message.get("kind"))
+
+
+class InProcessBus(FanoutBus):
+    """Local stand-in: the only subscriber is this process"""
+
+    async def publish(self, message: dict):
+        await self._dispatch(jsonable_encoder(message))
+
+
+class RedisBus(FanoutBus):
+    """Redis pub/sub backend shared by every worker"""
+
+    def __init__(self, url: str, channel: str = FANOUT_CHANNEL, concurrency: int = FANOUT_CONCURRENCY):
+        super().__init__()
+        import redis.asyncio as redis
+
+        self.channel = channel
+        self._redis = redis.from_url(url)
+        self._pubsub = None
+        self._listener = None
+        self._slots = asyncio.Semaphore(concurrency)
+        self._dispatching: Set[asyncio.Task] = set()
+
+    async def start(self, handler: Handler):
+        await super().start(handler)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.channel)
+        self._listener = asyncio.ensure_future(self._listen())
+
+    async def _listen(self):
+        while True:
+            try:
+                async for raw in self._pubsub.listen():
+                    # Waiting for a slot stops reading, leaving the backlog in Redis
+                    await self._slots.acquire()
+                    task = asyncio.ensure_future(self._dispatch_one(raw["data"]))
+                    self._dispatching.add(task)
+                    task.add_done_callback(self._dispatching.discard)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Fan-out subscription lost, resubscribing")
+                await asyncio.sleep(1)
+
+    async def _dispatch_one(self, data):
+        try:
+            await self._dispatch(json.loads(data))
+        except ValueError:
+            logger.exception("Dropping malformed fan-out message")
+        finally:
+            self._slots.release()
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+        for task in list(self._dispatching):
+            task.cancel()
+        await asyncio.gather(*self._dispatching, return_exceptions=True)
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        await self._redis.aclose()
+        await super().stop()
+
+    async def publish(self, message: dict):
+        message = jsonable_encoder(message)
+        try:
+            await self._redis.publish(self.channel, json.dumps(message))
+        except Exception:
+            logger.warning("Fan-out Redis unavailable, delivering %s locally only", message.get("kind"), exc_info=True)
+            await self._dispatch(message)
+
+
+def create_bus(redis_url: Optional[str] = FANOUT_REDIS_URL) -> FanoutBus:
+    if redis_url:
+        return RedisBus(redis_url)
+    return InProcessBus()
+
+
+bus = create_bus()
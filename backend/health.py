@@ -0,0 +1,109 @@
+"""Liveness, readiness and warm-up for the Clubly API.
+
+- live: the worker's event loop answers; never touches MongoDB, so a slow
+  database never gets a healthy worker restarted
+- ready: warm-up has finished and every gating check passes; load
+  balancers and entrypoint.sh only route traffic once this answers 200.
+  Failing non-gating checks (e.g. a missing index) are reported as
+  "degraded" without taking the worker out of rotation
+
+Warm-up runs in the background after startup: it primes connection pools
+and hot caches so the first real requests do not pay for them. Modules
+register their own steps and checks with the `warmup` and `check`
+decorators of the module-level `health` instance.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_TIMEOUT = float(os.environ.get('HEALTH_CHECK_TIMEOUT', '2'))
+
+Step = Callable[[], Awaitable[None]]
+
+
+class Health:
+    def __init__(self, check_timeout: float = HEALTH_CHECK_TIMEOUT):
+        self.check_timeout = check_timeout
+        self.warmed_up = False
+        self.warmup_seconds: Optional[float] = None
+        self._warmups: List[Tuple[str, Step]] = []
+        self._checks: Dict[str, Step] = {}
+        self._advisory: Set[str] = set()
+        self._task = None
+
+    def warmup(self, name: str):
+        """Register a warm-up step; failures are logged and do not block readiness"""
+        def register(step: Step) -> Step:
+            self._warmups.append((name, step))
+            return step
+        return register
+
+    def check(self, name: str, gating: bool = True):
+        """Register a readiness check; it must raise (or time out) when unhealthy
+
+        Non-gating checks are reported but never make the worker unready.
+        """
+        def register(step: Step) -> Step:
+            self._checks[name] = step
+            if not gating:
+                self._advisory.add(name)
+            return step
+        return register
+
+    async def run_warmup(self):
+        started = time.perf_counter()
+        for name, step in self._warmups:
+            step_started = time.perf_counter()
+            try:
+                await step()
+            except Exception:
+                logger.exception("Warm-up step %s failed", name)
+            else:
+                logger.info("Warm-up step %s took %.0f ms", name, (time.perf_counter() - step_started) * 1000)
+        self.warmup_seconds = time.perf_counter() - started
+        self.warmed_up = True
+
+    def start_warmup(self):
+        self.warmed_up = False
+        self._task = asyncio.ensure_future(self.run_warmup())
+
+    async def wait_warmed_up(self):
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run_check(self, step: Step) -> str:
+        try:
+            await asyncio.wait_for(step(), self.check_timeout)
+        except asyncio.TimeoutError:
+            return "timeout"
+        except Exception as exc:
+            return f"error: {exc}"
+        return "ok"
+
+    async def readiness(self) -> Tuple[bool, dict]:
+        """(ready, report) with the outcome of every check, run concurrently"""
+        names = list(self._checks)
+        results = await asyncio.gather(*(self._run_check(self._checks[name]) for name in names))
+        checks = dict(zip(names, results))
+        checks["warmup"] = "ok" if self.warmed_up else "pending"
+        ready = all(result == "ok" for name, result in checks.items() if name not in self._advisory)
+        if not ready:
+            status = "not_ready"
+        elif all(result == "ok" for result in checks.values()):
+            status = "ready"
+        else:
+            status = "degraded"
+        return ready, {"status": status, "checks": checks}
+
+
+health = Health()
@@ -0,0 +1,37 @@
+"""Conditional GET helpers for cached JSON responses.
+
+Cached payloads are stored already serialized together with their ETag, so a
+cache hit costs neither a query nor a JSON encode, and a client presenting
+the same ETag in If-None-Match gets an empty 304.
+"""
+import hashlib
+import json
+from typing import Any, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# Clients may keep the body but must revalidate it on every use
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def encode_payload(payload: Any) -> Tuple[bytes, str]:
+    """(JSON body, strong ETag) for a payload"""
+    body = json.dumps(jsonable_encoder(payload), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return body, f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return "*" in candidates or etag in (candidate.removeprefix("W/") for candidate in candidates)
+
+
+def etag_response(request: Request, body: bytes, etag: str, cache_control: str = REVALIDATE_CACHE_CONTROL) -> Response:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
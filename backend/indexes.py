@@ -0,0 +1,168 @@
+"""Declarative MongoDB index manager.
+
+`INDEXES` lists every index the API relies on, per collection.
+`ensure_indexes` builds them idempotently and `index_report` compares the
+declared set with what the server actually has, flagging missing indexes,
+undeclared extras and indexes that have never served a query.
+
+Run `python indexes.py` to build the indexes and print the report;
+entrypoint.sh runs it in the background on every deploy, while the API
+already serves. Until it is done, the readiness probe reports the missing
+indexes and the status "degraded".
+"""
+import asyncio
+import logging
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Temporary accounts are created with an empty username until setup is
+# completed, so username uniqueness only applies to non-empty values.
+_NON_EMPTY_USERNAME = {"username": {"$gt": ""}}
+
+INDEXES = {
+    "users": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel(
+            [("username", ASCENDING)],
+            name="username_unique",
+            unique=True,
+            partialFilterExpression=_NON_EMPTY_USERNAME,
+        ),
+        # Promoter assignment and organization member lists
+        IndexModel(
+            [("organization", ASCENDING), ("ruolo", ASCENDING), ("status", ASCENDING)],
+            name="organization_ruolo_status",
+        ),
+        IndexModel([("ruolo", ASCENDING), ("created_at", DESCENDING)], name="ruolo_created_at"),
+    ],
+    "organizations": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("name", ASCENDING)], name="name_unique", unique=True),
+    ],
+    "events": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # (date, id) is the keyset of the events feed; also serves sorts on date alone
+        IndexModel([("date", ASCENDING), ("id", ASCENDING)], name="date_id"),
+        IndexModel([("organization", ASCENDING), ("date", ASCENDING), ("id", ASCENDING)], name="organization_date_id"),
+    ],
+    "bookings": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Open-booking counts per promoter in assign_promoter_to_event
+        IndexModel([("promoter_id", ASCENDING), ("status", ASCENDING)], name="promoter_id_status"),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_id_created_at"),
+        # Per-event promoter load and event deletion
+        IndexModel(
+            [("event_id", ASCENDING), ("status", ASCENDING), ("promoter_id", ASCENDING)],
+            name="event_id_status_promoter_id",
+        ),
+    ],
+    "chats": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("client_id", ASCENDING), ("created_at", DESCENDING)], name="client_id_created_at"),
+        IndexModel(
+            [("promoter_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)],
+            name="promoter_id_status_created_at",
+        ),
+        IndexModel([("booking_id", ASCENDING)], name="booking_id"),
+        IndexModel([("event_id", ASCENDING)], name="event_id"),
+        # Delta sync: chats changed since a watermark
+        IndexModel([("client_id", ASCENDING), ("updated_at", ASCENDING)], name="client_id_updated_at"),
+        IndexModel([("promoter_id", ASCENDING), ("updated_at", ASCENDING)], name="promoter_id_updated_at"),
+    ],
+    "chat_messages": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Keyset pagination of chat history on (timestamp, id)
+        IndexModel(
+            [("chat_id", ASCENDING), ("timestamp", ASCENDING), ("id", ASCENDING)],
+            name="chat_id_timestamp_id",
+        ),
+    ],
+    "tombstones": [
+        IndexModel([("user_ids", ASCENDING), ("deleted_at", ASCENDING)], name="user_ids_deleted_at"),
+        # Tombstones outlive the delta-sync retention window by a day, then expire
+        IndexModel([("deleted_at", ASCENDING)], name="deleted_at_ttl", expireAfterSeconds=31 * 24 * 3600),
+    ],
+}
+
+
+async def ensure_indexes(db, indexes=None):
+    """Create every declared index; existing identical indexes are a no-op.
+
+    Returns a mapping of collection name to the error message for collections
+    whose indexes could not be built (e.g. duplicates blocking a unique index).
+    A failure on one collection never prevents the others from being built.
+    """
+    indexes = INDEXES if indexes is None else indexes
+    failures = {}
+    for collection_name, models in indexes.items():
+        try:
+            await db[collection_name].create_indexes(models)
+        except OperationFailure as exc:
+            failures[collection_name] = str(exc)
+            logger.error("Index build failed on %s: %s", collection_name, exc)
+    return failures
+
+
+async def missing_indexes(db, indexes=None):
+    """Return {collection_name: [index names]} for declared indexes not yet built"""
+    indexes = INDEXES if indexes is None else indexes
+    missing = {}
+    for collection_name, models in indexes.items():
+        existing = await db[collection_name].index_information()
+        absent = [model.document["name"] for model in models if model.document["name"] not in existing]
+        if absent:
+            missing[collection_name] = absent
+    return missing
+
+
+async def _index_usage(collection):
+    """Return {index_name: ops} from $indexStats, or None if unsupported"""
+    try:
+        stats = await collection.aggregate([{"$indexStats": {}}]).to_list(length=None)
+    except (OperationFailure, NotImplementedError):
+        return None
+    return {stat["name"]: stat.get("accesses", {}).get("ops", 0) for stat in stats}
+
+
+async def index_report(db, indexes=None):
+    """Compare declared indexes with the live ones.
+
+    For each collection reports `missing` (declared but absent), `undeclared`
+    (present but not in INDEXES) and `unused` (zero accesses since the last
+    mongod restart, when $indexStats is available).
+    """
+    indexes = INDEXES if indexes is None else indexes
+    report = {}
+    for collection_name, models in indexes.items():
+        collection = db[collection_name]
+        declared = {model.document["name"] for model in models}
+        existing = set((await collection.index_information()).keys()) - {"_id_"}
+        usage = await _index_usage(collection)
+
+        report[collection_name] = {
+            "missing": sorted(declared - existing),
+            "undeclared": sorted(existing - declared),
+            "unused": sorted(name for name, ops in (usage or {}).items() if name != "_id_" and ops == 0),
+        }
+    return report
+
+
+async def _main():
+    from database import db
+
+    failures = await ensure_indexes(db)
+    report = await index_report(db)
+    for collection_name, entry in report.items():
+        status = "FAILED: " + failures[collection_name] if collection_name in failures else "ok"
+        print(f"{collection_name}: {status}")
+        for key in ("missing", "undeclared", "unused"):
+            if entry[key]:
+                print(f"  {key}: {', '.join(entry[key])}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,61 @@
+"""Batched lookups used to populate list responses.
+
+Instead of one find_one per row (event, participant, last message), list
+endpoints collect the referenced ids and resolve each kind with a single
+`$in` query or aggregation, so the number of round-trips stays constant
+however many rows are returned.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+USER_PUBLIC_PROJECTION = {"_id": 0, "password": 0}
+
+
+async def fetch_by_ids(collection, ids: Iterable[str], projection: Optional[dict] = None) -> Dict[str, dict]:
+    """Fetch documents by `id` with one query, keyed by id"""
+    unique_ids = list({doc_id for doc_id in ids if doc_id is not None})
+    if not unique_ids:
+        return {}
+    projection = projection if projection is not None else {"_id": 0}
+    documents = await collection.find({"id": {"$in": unique_ids}}, projection).to_list(length=None)
+    return {document["id"]: document for document in documents}
+
+
+async def fetch_last_messages(db, chat_ids: Iterable[str]) -> Dict[str, dict]:
+    """Latest message of each chat in one aggregation, keyed by chat_id
+
+    The sort runs backwards along the chat_messages (chat_id, timestamp, id)
+    index, so the server can pick each group's first document from the index.
+    """
+    unique_ids = list(set(chat_ids))
+    if not unique_ids:
+        return {}
+    pipeline = [
+        {"$match": {"chat_id": {"$in": unique_ids}}},
+        {"$sort": {"chat_id": -1, "timestamp": -1}},
+        {"$group": {"_id": "$chat_id", "message": {"$first": "$$ROOT"}}},
+        {"$replaceRoot": {"newRoot": "$message"}},
+        {"$project": {"_id": 0}},
+    ]
+    messages = await db.chat_messages.aggregate(pipeline).to_list(length=None)
+    return {message["chat_id"]: message for message in messages}
+
+
+async def fetch_page(collection, match: dict, sort: list, offset: int, limit: int,
+                     projection: Optional[dict] = None) -> Tuple[List[dict], int]:
+    """One page of `collection` plus the total match count in one $facet aggregation
+
+    $match and $sort sit before the $facet so both can be served by an index.
+    """
+    projection = projection if projection is not None else {"_id": 0}
+    pipeline = [
+        {"$match": match},
+        {"$sort": dict(sort)},
+        {"$facet": {
+            "items": [{"$skip": offset}, {"$limit": limit}, {"$project": projection}],
+            "total": [{"$count": "count"}],
+        }},
+    ]
+    result = await collection.aggregate(pipeline).to_list(length=None)
+    facet = result[0] if result else {"items": [], "total": []}
+    total = facet["total"][0]["count"] if facet["total"] else 0
+    return facet["items"], total
@@ -0,0 +1,352 @@
+"""Image storage for user-uploaded media.
+
+Uploads arrive from the app as base64 data URLs. Instead of storing them
+inline in MongoDB documents, they are decoded, resized to fixed variants and
+written to a blob store under a content-hashed key. Documents only keep the
+resulting URLs, which are immutable and therefore cacheable forever.
+
+Decoding and resizing is CPU-bound, so it runs in a process pool
+(MEDIA_PROCESS_WORKERS, 0 falls back to a thread) rather than on the event
+loop or under the GIL of the serving worker.
+
+Two blob stores are available, selected with MEDIA_STORE:
+
+- gridfs (default): the `media` GridFS bucket of the application database
+- filesystem: files under MEDIA_ROOT, for single-host deployments and tests
+"""
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+MEDIA_STORE = os.environ.get('MEDIA_STORE', 'gridfs')
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'media'))
+# Prefix for media URLs; empty means same origin as the API
+MEDIA_BASE_URL = os.environ.get('MEDIA_BASE_URL', '')
+MEDIA_MAX_UPLOAD_BYTES = int(os.environ.get('MEDIA_MAX_UPLOAD_BYTES', str(10 * 1024 * 1024)))
+MEDIA_PROCESS_WORKERS = int(os.environ.get('MEDIA_PROCESS_WORKERS', '2'))
+
+MEDIA_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Square avatar sizes in pixels
+AVATAR_SIZES = {"sm": 64, "md": 256}
+AVATAR_DEFAULT_SIZE = "md"
+
+# Poster variants: (max width in pixels, format); height keeps the aspect ratio
+POSTER_VARIANTS = {
+    "card": (480, "JPEG"),
+    "card_webp": (480, "WEBP"),
+    "detail": (1080, "JPEG"),
+    "detail_webp": (1080, "WEBP"),
+}
+POSTER_DEFAULT_VARIANT = "detail"
+
+_FORMAT_DETAILS = {"JPEG": (".jpg", "image/jpeg"), "WEBP": (".webp", "image/webp")}
+
+_process_pool = None
+
+
+class BlobStore:
+    """Minimal key/value store for immutable binary objects"""
+
+    async def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def put(self, key: str, data: bytes, content_type: str):
+        raise NotImplementedError
+
+    async def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """Return (data, content_type), or None if the key is unknown"""
+        raise NotImplementedError
+
+
+class GridFSBlobStore(BlobStore):
+    def __init__(self, database, bucket_name: str = "media"):
+        from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+        self._database = database
+        self._bucket_name = bucket_name
+        self._bucket = AsyncIOMotorGridFSBucket(database, bucket_name=bucket_name)
+
+    async def exists(self, key):
+        return await self._database[f"{self._bucket_name}.files"].find_one({"filename": key}, {"_id": 1}) is not None
+
+    async def put(self, key, data, content_type):
+        if await self.exists(key):
+            return
+        await self._bucket.upload_from_stream(key, data, metadata={"content_type": content_type})
+
+    async def get(self, key):
+        from gridfs.errors import NoFile
+
+        try:
+            stream = await self._bucket.open_download_stream_by_name(key)
+        except NoFile:
+            return None
+        data = await stream.read()
+        return data, (stream.metadata or {}).get("content_type", "application/octet-stream")
+
+
+class FileSystemBlobStore(BlobStore):
+    # Keys are content-hashed, so the extension alone determines the type
+    _CONTENT_TYPES = {".webp": "image/webp", ".jpg": "image/jpeg", ".png": "image/png"}
+
+    def __init__(self, root: str = MEDIA_ROOT):
+        self.root = root
+
+    def _path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(os.path.abspath(self.root) + os.sep):
+            raise HTTPException(status_code=404, detail="File non trovato")
+        return path
+
+    # File I/O runs on a thread so a slow disk never stalls the event loop
+
+    async def exists(self, key):
+        return await asyncio.to_thread(os.path.exists, self._path(key))
+
+    async def put(self, key, data, content_type):
+        await asyncio.to_thread(self._write, self._path(key), data)
+
+    async def get(self, key):
+        data = await asyncio.to_thread(self._read, self._path(key))
+        if data is None:
+            return None
+        return data, self._CONTENT_TYPES.get(os.path.splitext(key)[1], "application/octet-stream")
+
+    @staticmethod
+    def _write(path, data):
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per writer: the same upload may be stored by two threads at once
+        temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary_path, "wb") as handle:
+            handle.write(data)
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, "rb") as handle:
+                return handle.read()
+        except FileNotFoundError:
+            return None
+
+
+def create_blob_store(database) -> BlobStore:
+    if MEDIA_STORE == "filesystem":
+        return FileSystemBlobStore(MEDIA_ROOT)
+    return GridFSBlobStore(database)
+
+
+def is_data_url(value: Optional[str]) -> bool:
+    return bool(value) and value.startswith("data:")
+
+
+def decode_data_url(data_url: str) -> bytes:
+    """Raw bytes of a base64 data URL; 400 if malformed or too large"""
+    try:
+        header, encoded = data_url.split(",", 1)
+        if ";base64" not in header:
+            raise ValueError("not base64")
+        data = base64.b64decode(encoded, validate=True)
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Immagine non valida")
+    if len(data) > MEDIA_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Immagine troppo grande")
+    return data
+
+
+class InvalidImage(ValueError):
+    """Raised by the render functions (in the pool) for undecodable uploads"""
+
+
+def _open_image(data: bytes):
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            return ImageOps.exif_transpose(image).convert("RGB")
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as exc:
+        raise InvalidImage(str(exc))
+
+
+def render_avatars(data: bytes) -> Dict[str, bytes]:
+    """Center-crop and resize an image to every AVATAR_SIZES variant (WebP)"""
+    from PIL import Image, ImageOps
+
+    image = _open_image(data)
+    variants = {}
+    for name, size in AVATAR_SIZES.items():
+        output = io.BytesIO()
+        ImageOps.fit(image, (size, size), Image.LANCZOS).save(output, "WEBP", quality=82)
+        variants[name] = output.getvalue()
+    return variants
+
+
+def render_poster(data: bytes) -> Dict[str, bytes]:
+    """Resize a poster to every POSTER_VARIANTS width, never upscaling"""
+    from PIL import Image
+
+    image = _open_image(data)
+    variants = {}
+    for name, (width, image_format) in POSTER_VARIANTS.items():
+        resized = image
+        if image.width > width:
+            resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        output = io.BytesIO()
+        resized.save(output, image_format, quality=82, **({"optimize": True} if image_format == "JPEG" else {}))
+        variants[name] = output.getvalue()
+    return variants
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    global _process_pool
+    if _process_pool is None and MEDIA_PROCESS_WORKERS > 0:
+        # Forking the serving process would copy locks held by its other threads
+        # (Motor, the bcrypt pool, the fan-out bus) into the children
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            # Workers fork from a server that has already imported this module
+            context.set_forkserver_preload([__name__])
+        else:
+            context = multiprocessing.get_context("spawn")
+        _process_pool = ProcessPoolExecutor(max_workers=MEDIA_PROCESS_WORKERS, mp_context=context)
+    return _process_pool
+
+
+def _noop():
+    return None
+
+
+async def warm_up_process_pool():
+    """Start every pool worker now rather than on the first upload"""
+    pool = get_process_pool()
+    if pool is not None:
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(pool, _noop) for _ in range(MEDIA_PROCESS_WORKERS)))
+
+
+def shutdown_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+async def run_render(render, data: bytes) -> Dict[str, bytes]:
+    """Run a render function in the media process pool; 400 on bad images"""
+    pool = get_process_pool()
+    try:
+        if pool is None:
+            return await asyncio.to_thread(render, data)
+        return await asyncio.get_running_loop().run_in_executor(pool, render, data)
+    except InvalidImage:
+        raise HTTPException(status_code=400, detail="Immagine non valida")
+
+
+def media_url(key: str) -> str:
+    return f"{MEDIA_BASE_URL}/api/media/{key}"
+
+
+def content_key(prefix: str, data: bytes, suffix: str) -> str:
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    return f"{prefix}/{digest}{suffix}"
+
+
+async def store_avatar(store: BlobStore, data_url: str) -> Dict[str, str]:
+    """Store a data-URL avatar as resized variants; returns {size_name: url}"""
+    data = decode_data_url(data_url)
+    variants = await run_render(render_avatars, data)
+    urls = {}
+    for name, variant in variants.items():
+        key = content_key("avatars", variant, f"-{AVATAR_SIZES[name]}.webp")
+        await store.put(key, variant, "image/webp")
+        urls[name] = media_url(key)
+    return urls
+
+
+async def profile_image_fields(store: BlobStore, profile_image: Optional[str]) -> dict:
+    """User document fields for an uploaded profile image
+
+    Data URLs are moved to the blob store; plain URLs and None are kept as is.
+    """
+    if not is_data_url(profile_image):
+        return {"profile_image": profile_image, "profile_image_variants": None}
+    variants = await store_avatar(store, profile_image)
+    return {"profile_image": variants[AVATAR_DEFAULT_SIZE], "profile_image_variants": variants}
+
+
+async def store_poster(store: BlobStore, data_url: str) -> Dict[str, str]:
+    """Store a data-URL event poster as resized variants; returns {variant: url}"""
+    data = decode_data_url(data_url)
+    variants = await run_render(render_poster, data)
+    urls = {}
+    for name, variant in variants.items():
+        width, image_format = POSTER_VARIANTS[name]
+        extension, content_type = _FORMAT_DETAILS[image_format]
+        key = content_key("posters", variant, f"-{width}{extension}")
+        await store.put(key, variant, content_type)
+        urls[name] = media_url(key)
+    return urls
+
+
+async def event_poster_fields(store: BlobStore, event_poster: Optional[str], current: Optional[dict] = None) -> dict:
+    """Event document fields for a poster submitted by the app
+
+    Resubmitting the event's current poster URL leaves it untouched, data URLs
+    are moved to the blob store, other URLs and None replace the poster.
+    """
+    if current is not None and event_poster == current.get("event_poster"):
+        return {}
+    if not is_data_url(event_poster):
+        return {"event_poster": event_poster, "event_poster_variants": None}
+    variants = await store_poster(store, event_poster)
+    return {"event_poster": variants[POSTER_DEFAULT_VARIANT], "event_poster_variants": variants}
+
+
+async def migrate_inline_profile_images(database, store: BlobStore) -> int:
+    """Move every inline base64 profile image out of `users`; returns the count"""
+    migrated = 0
+    async for user in database.users.find({"profile_image": {"$regex": "^data:"}}, {"_id": 0, "id": 1, "profile_image": 1}):
+        try:
+            fields = await profile_image_fields(store, user["profile_image"])
+        except HTTPException:
+            fields = {"profile_image": None}
+        await database.users.update_one({"id": user["id"]}, {"$set": fields})
+        migrated += 1
+    return migrated
+
+
+async def migrate_inline_event_posters(database, store: BlobStore) -> int:
+    """Move every inline base64 poster out of `events`; returns the count"""
+    migrated = 0
+    async for event in database.events.find({"event_poster": {"$regex": "^data:"}}, {"_id": 0, "id": 1, "event_poster": 1}):
+        try:
+            fields = await event_poster_fields(store, event["event_poster"])
+        except HTTPException:
+            fields = {"event_poster": None, "event_poster_variants": None}
+        await database.events.update_one({"id": event["id"]}, {"$set": fields})
+        migrated += 1
+    return migrated
+
+
+if __name__ == "__main__":
+    from database import db
+
+    async def _main():
+        store = create_blob_store(db)
+        print(f"Migrated {await migrate_inline_profile_images(db, store)} profile images")
+        print(f"Migrated {await migrate_inline_event_posters(db, store)} event posters")
+        shutdown_process_pool()
+
+    asyncio.run(_main())
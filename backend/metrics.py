@@ -0,0 +1,208 @@
+"""Prometheus metrics for the Clubly API.
+
+- HTTP: per-route latency histogram, request count by status code and
+  requests in flight, recorded by PrometheusMiddleware (routes are labelled
+  with their path template, e.g. /api/events/{event_id}, never raw URLs)
+- MongoDB: command count and duration per collection and command, captured
+  by a pymongo command listener on the shared Motor client
+- Password hashing: queue depth and counters of the bcrypt executor
+- Single-flight: leader and follower counts per coalesced route; the
+  collapse ratio is followers / (leaders + followers)
+- Waiting room: queue depth per event and admission counters
+
+Everything is exported at GET /metrics, which nginx does not proxy. With
+several uvicorn workers set PROMETHEUS_MULTIPROC_DIR so each worker writes
+its samples there and any worker can serve the aggregate.
+"""
+import os
+import threading
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from pymongo import monitoring
+
+PROMETHEUS_MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "clubly_http_request_duration_seconds", "HTTP request latency by route",
+    ["method", "route"], buckets=HTTP_BUCKETS
+)
+HTTP_REQUESTS = Counter(
+    "clubly_http_requests_total", "HTTP requests by route and status code",
+    ["method", "route", "status"]
+)
+HTTP_IN_FLIGHT = Gauge(
+    "clubly_http_requests_in_flight", "HTTP requests currently being served",
+    multiprocess_mode="livesum"
+)
+MONGO_COMMANDS = Counter(
+    "clubly_mongo_commands_total", "MongoDB commands by collection, command and outcome",
+    ["collection", "command", "outcome"]
+)
+MONGO_COMMAND_SECONDS = Histogram(
+    "clubly_mongo_command_duration_seconds", "MongoDB command latency by collection and command",
+    ["collection", "command"], buckets=MONGO_BUCKETS
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class PrometheusMiddleware:
+    """ASGI middleware timing every HTTP request by route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # The router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(scope["method"], route, str(status_code)).inc()
+
+
+def command_collection(command_name: str, command: dict) -> str:
+    """Collection a command targets, e.g. {"find": "users"} -> users"""
+    target = command.get(command_name)
+    return target if isinstance(target, str) else "-"
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo listener feeding the per-collection command metrics"""
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = command_collection(event.command_name, event.command)
+
+    def _finished(self, event, outcome):
+        with self._lock:
+            collection = self._pending.pop((event.connection_id, event.request_id), "-")
+        MONGO_COMMANDS.labels(collection, event.command_name, outcome).inc()
+        MONGO_COMMAND_SECONDS.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+
+    def succeeded(self, event):
+        self._finished(event, "ok")
+
+    def failed(self, event):
+        self._finished(event, "error")
+
+
+class PasswordHasherCollector:
+    """Reads the bcrypt executor counters at scrape time"""
+
+    def __init__(self, hasher):
+        self.hasher = hasher
+
+    def collect(self):
+        stats = self.hasher.stats()
+        yield GaugeMetricFamily("clubly_password_queue_depth", "Password hashes queued or running", value=stats["pending"])
+        yield GaugeMetricFamily("clubly_password_queue_limit", "Maximum queued password hashes", value=stats["max_pending"])
+        for name in ("completed", "rejected", "rehashed"):
+            yield CounterMetricFamily(f"clubly_password_{name}", f"Password operations {name}", value=stats[name])
+        yield CounterMetricFamily("clubly_password_busy_seconds", "Time spent in bcrypt", value=stats["busy_seconds"])
+
+
+class SingleFlightCollector:
+    """Reads the single-flight group counters at scrape time"""
+
+    def __init__(self, groups):
+        self.groups = groups
+
+    def collect(self):
+        calls = CounterMetricFamily("clubly_singleflight_calls", "Coalesced reads by route and role", labels=["route", "role"])
+        in_flight = GaugeMetricFamily("clubly_singleflight_in_flight", "Distinct reads currently running", labels=["route"])
+        ratio = GaugeMetricFamily("clubly_singleflight_collapse_ratio", "Share of reads served by another request's query", labels=["route"])
+        for name, group in list(self.groups.items()):
+            stats = group.stats()
+            calls.add_metric([name, "leader"], stats["leaders"])
+            calls.add_metric([name, "follower"], stats["followers"])
+            in_flight.add_metric([name], stats["in_flight"])
+            ratio.add_metric([name], stats["collapse_ratio"])
+        yield calls
+        yield in_flight
+        yield ratio
+
+
+class WaitingRoomCollector:
+    """Reads the booking waiting room at scrape time"""
+
+    def __init__(self, room):
+        self.room = room
+
+    def collect(self):
+        stats = self.room.stats()
+        queued = GaugeMetricFamily("clubly_waiting_room_queued", "Clients queued per event", labels=["event_id"])
+        for event_id, depth in stats["queued"].items():
+            queued.add_metric([event_id], depth)
+        yield queued
+        admissions = CounterMetricFamily("clubly_waiting_room_admissions", "Bookings let through, by path", labels=["path"])
+        admissions.add_metric(["direct"], stats["admitted_directly"])
+        admissions.add_metric(["queue"], stats["admitted_from_queue"])
+        yield admissions
+        yield CounterMetricFamily("clubly_waiting_room_turned_away", "Bookings refused with 429", value=stats["turned_away"])
+
+
+mongo_command_metrics = MongoCommandMetrics()
+
+
+# Collectors reading in-process state; also added to the multiprocess registry
+_custom_collectors = []
+
+
+def _register(collector):
+    _custom_collectors.append(collector)
+    REGISTRY.register(collector)
+
+
+def register_password_hasher(hasher):
+    _register(PasswordHasherCollector(hasher))
+
+
+def register_single_flight(groups):
+    _register(SingleFlightCollector(groups))
+
+
+def register_waiting_room(room):
+    _register(WaitingRoomCollector(room))
+
+
+def render_metrics():
+    """(body, content type) for the /metrics endpoint"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=PROMETHEUS_MULTIPROC_DIR)
+        # Per-worker state (bcrypt queue, single-flight, waiting room) is not
+        # written to the shared directory: report the scraped worker's own
+        for collector in _custom_collectors:
+            registry.register(collector)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
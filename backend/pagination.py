@@ -0,0 +1,61 @@
+"""Keyset (cursor) pagination helpers.
+
+A cursor is an opaque, URL-safe token encoding the sort key of the last row
+a client has seen, e.g. `(timestamp, id)` for chat messages. Pages are then
+fetched with a range condition on that key instead of skip/offset, so every
+page costs the same index seek however deep the client scrolls.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException
+
+_DATETIME_TAG = "$dt"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {_DATETIME_TAG: value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and _DATETIME_TAG in value:
+        return datetime.fromisoformat(value[_DATETIME_TAG])
+    return value
+
+
+def encode_cursor(sort_value: Any, doc_id: str) -> str:
+    raw = json.dumps([_encode_value(sort_value), doc_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """Return (sort_value, id) from a cursor; 400 if it was tampered with"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return _decode_value(sort_value), doc_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursore non valido")
+
+
+def keyset_condition(field: str, cursor: Optional[str], direction: int) -> dict:
+    """Filter for rows strictly after `cursor` in (field, id) order
+
+    direction 1 walks forwards (newer/greater), -1 walks backwards.
+    """
+    if cursor is None:
+        return {}
+    sort_value, doc_id = decode_cursor(cursor)
+    operator = "$gt" if direction > 0 else "$lt"
+    return {"$or": [
+        {field: {operator: sort_value}},
+        {field: sort_value, "id": {operator: doc_id}}
+    ]}
+
+
+def clamp_limit(limit: int, maximum: int) -> int:
+    return min(max(limit, 1), maximum)
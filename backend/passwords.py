@@ -0,0 +1,123 @@
+"""Password hashing off the event loop.
+
+bcrypt is deliberately slow (~250 ms at cost 12) and would freeze every
+socket and request of a worker if run inline in an async route. Hashes and
+checks run instead on a small dedicated thread pool (bcrypt releases the
+GIL), and at most PASSWORD_MAX_PENDING operations may be queued or running:
+beyond that a login storm gets a fast 503 rather than an ever-growing backlog.
+
+The cost factor is configurable with BCRYPT_ROUNDS; hashes made with another
+cost are upgraded transparently on the next successful login.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+PASSWORD_WORKERS = int(os.environ.get('PASSWORD_WORKERS', '4'))
+PASSWORD_MAX_PENDING = int(os.environ.get('PASSWORD_MAX_PENDING', '64'))
+PASSWORD_RETRY_AFTER_SECONDS = 2
+
+
+def hash_rounds(hashed: str) -> int:
+    """Cost factor of a `$2b$12$...` hash, 0 if it cannot be parsed"""
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+class PasswordHasher:
+    """Bounded executor for bcrypt work, with counters for monitoring"""
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS, workers: int = PASSWORD_WORKERS,
+                 max_pending: int = PASSWORD_MAX_PENDING):
+        self.rounds = rounds
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.busy_seconds = 0.0
+        # Guards every counter: busy_seconds is updated from the executor threads
+        self._lock = threading.Lock()
+
+    def _timed(self, function, *args):
+        started = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.busy_seconds += elapsed
+
+    async def _run(self, function, *args):
+        if self.pending >= self.max_pending:
+            with self._lock:
+                self.rejected += 1
+            logger.warning("Password queue full (%d pending), rejecting request", self.pending)
+            raise HTTPException(
+                status_code=503,
+                detail="Servizio momentaneamente occupato, riprova tra poco",
+                headers={"Retry-After": str(PASSWORD_RETRY_AFTER_SECONDS)}
+            )
+        with self._lock:
+            self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self._timed, function, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    def _hash(self, password: str) -> str:
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(self.rounds)).decode('utf-8')
+
+    @staticmethod
+    def _verify(password: str, hashed: str) -> bool:
+        try:
+            return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+        except ValueError:
+            return False
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self._hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(self._verify, password, hashed)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        return hash_rounds(hashed) != self.rounds
+
+    async def rehash(self, password: str, hashed: str) -> Optional[str]:
+        """A new hash at the current cost if `hashed` was made with another one, else None"""
+        if not self.needs_rehash(hashed):
+            return None
+        upgraded = await self.hash(password)
+        with self._lock:
+            self.rehashed += 1
+        return upgraded
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "rounds": self.rounds
+        }
+
+
+hasher = PasswordHasher()
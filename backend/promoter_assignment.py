@@ -0,0 +1,131 @@
+"""Promoter assignment strategies for new bookings.
+
+Every strategy picks a promoter in a constant number of round-trips,
+regardless of how many promoters an organization has:
+
+- least_loaded: fewest open bookings overall (one $group aggregation)
+- event_load: fewest open bookings for the event being booked
+- weighted_round_robin: rotates through promoters proportionally to their
+  `assignment_weight` (default 1), using a shared counter document so every
+  uvicorn worker follows the same sequence
+
+The active strategy is selected with PROMOTER_ASSIGNMENT_STRATEGY.
+"""
+import os
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from pymongo import ReturnDocument
+
+PROMOTER_ROLES = ["promoter", "capo_promoter"]
+OPEN_BOOKING_STATUSES = ["pending", "confirmed"]
+
+DEFAULT_STRATEGY = os.environ.get('PROMOTER_ASSIGNMENT_STRATEGY', 'least_loaded')
+
+
+async def find_candidate_promoters(db, organization: Optional[str]) -> List[dict]:
+    """Available promoters of the event organization, or any available promoter"""
+    projection = {"_id": 0, "id": 1, "assignment_weight": 1}
+    promoters = await db.users.find({
+        "ruolo": {"$in": PROMOTER_ROLES},
+        "organization": organization,
+        "status": "available"
+    }, projection).to_list(length=None)
+
+    if not promoters:
+        # Se non ci sono promoter nella stessa organizzazione, prova con qualsiasi promoter
+        promoters = await db.users.find({
+            "ruolo": {"$in": PROMOTER_ROLES},
+            "status": "available"
+        }, projection).to_list(length=None)
+
+    return promoters
+
+
+async def count_open_bookings(db, promoter_ids: List[str], event_id: Optional[str] = None) -> dict:
+    """Open bookings per promoter in a single aggregation; absent promoters have 0"""
+    match = {
+        "promoter_id": {"$in": promoter_ids},
+        "status": {"$in": OPEN_BOOKING_STATUSES}
+    }
+    if event_id is not None:
+        match["event_id"] = event_id
+
+    counts = dict.fromkeys(promoter_ids, 0)
+    async for row in db.bookings.aggregate([
+        {"$match": match},
+        {"$group": {"_id": "$promoter_id", "count": {"$sum": 1}}}
+    ]):
+        counts[row["_id"]] = row["count"]
+    return counts
+
+
+class AssignmentStrategy(ABC):
+    """Base class: pick one promoter id out of the candidates for an event"""
+    name = None
+
+    @abstractmethod
+    async def pick(self, db, event: dict, promoters: List[dict]) -> Optional[str]:
+        """Promoter id for the booking, or None if no candidate fits"""
+
+
+class LeastLoadedStrategy(AssignmentStrategy):
+    """Promoter with the fewest open bookings across all events"""
+    name = "least_loaded"
+
+    def _scope(self, event):
+        return None
+
+    async def pick(self, db, event, promoters):
+        promoter_ids = [promoter["id"] for promoter in promoters]
+        counts = await count_open_bookings(db, promoter_ids, self._scope(event))
+        # Ties go to the first candidate, as before
+        return min(promoter_ids, key=counts.get)
+
+
+class EventLoadStrategy(LeastLoadedStrategy):
+    """Promoter with the fewest open bookings for this event"""
+    name = "event_load"
+
+    def _scope(self, event):
+        return event["id"]
+
+
+class WeightedRoundRobinStrategy(AssignmentStrategy):
+    """Rotate through promoters, `assignment_weight` slots per promoter"""
+    name = "weighted_round_robin"
+
+    async def pick(self, db, event, promoters):
+        slots = []
+        for promoter in sorted(promoters, key=lambda p: p["id"]):
+            weight = promoter.get("assignment_weight") or 1
+            slots.extend([promoter["id"]] * max(int(weight), 1))
+
+        counter = await db.assignment_counters.find_one_and_update(
+            {"_id": f"promoter_rr:{event.get('organization')}"},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return slots[(counter["seq"] - 1) % len(slots)]
+
+
+STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (LeastLoadedStrategy(), EventLoadStrategy(), WeightedRoundRobinStrategy())
+}
+
+
+def get_strategy(name: Optional[str] = None) -> AssignmentStrategy:
+    name = name or DEFAULT_STRATEGY
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown promoter assignment strategy: {name}")
+    return STRATEGIES[name]
+
+
+async def assign_promoter(db, event: dict, strategy: Optional[str] = None) -> Optional[str]:
+    """Pick the promoter for a new booking on `event`, or None if nobody is available"""
+    promoters = await find_candidate_promoters(db, event.get("organization"))
+    if not promoters:
+        return None
+    return await get_strategy(strategy).pick(db, event, promoters)
@@ -0,0 +1,106 @@
+"""WebSocket push channel for chat messages and unread counts.
+
+Each authenticated socket gets a bounded outgoing queue drained by its own
+sender task, so one slow client never blocks the route that publishes an
+event. When a client falls `WS_MAX_QUEUE` events behind it is disconnected
+with close code 1013 (try again later) and is expected to reconnect and
+re-fetch what it missed.
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, Iterable, Set
+
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+
+logger = logging.getLogger(__name__)
+
+WS_MAX_QUEUE = int(os.environ.get('WS_MAX_QUEUE', '100'))
+WS_CLOSE_TRY_AGAIN_LATER = 1013
+
+
+class Connection:
+    """One connected socket and its bounded outgoing queue"""
+
+    def __init__(self, websocket: WebSocket, max_queue: int = WS_MAX_QUEUE):
+        self.websocket = websocket
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+        self._sender = None
+
+    def offer(self, payload: dict) -> bool:
+        """Queue a payload without waiting; False when the client is too far behind"""
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            self.overflowed = True
+            if self._sender is not None:
+                self._sender.cancel()
+            return False
+
+    async def _send_loop(self):
+        while True:
+            payload = await self.queue.get()
+            await self.websocket.send_json(payload)
+
+    async def _receive_loop(self):
+        # Clients only send keep-alive pings; anything received is ignored
+        while True:
+            await self.websocket.receive_text()
+
+    async def serve(self):
+        """Pump the queue to the socket until the client leaves or overflows"""
+        self._sender = asyncio.ensure_future(self._send_loop())
+        receiver = asyncio.ensure_future(self._receive_loop())
+        try:
+            await asyncio.wait([self._sender, receiver], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (self._sender, receiver):
+                task.cancel()
+            await asyncio.gather(self._sender, receiver, return_exceptions=True)
+
+        if self.overflowed:
+            logger.info("Closing slow websocket client (%d events queued)", self.queue.qsize())
+            try:
+                await self.websocket.close(code=WS_CLOSE_TRY_AGAIN_LATER)
+            except (RuntimeError, WebSocketDisconnect):
+                pass
+
+
+class ConnectionManager:
+    """Tracks the sockets held by this worker, keyed by user id"""
+
+    def __init__(self):
+        self.connections: Dict[str, Set[Connection]] = {}
+
+    async def connect(self, user_id: str, websocket: WebSocket) -> Connection:
+        await websocket.accept()
+        connection = Connection(websocket)
+        self.connections.setdefault(user_id, set()).add(connection)
+        return connection
+
+    def disconnect(self, user_id: str, connection: Connection):
+        user_connections = self.connections.get(user_id)
+        if user_connections is None:
+            return
+        user_connections.discard(connection)
+        if not user_connections:
+            del self.connections[user_id]
+
+    def is_connected(self, user_id: str) -> bool:
+        return user_id in self.connections
+
+    def send_to_user(self, user_id: str, payload: dict):
+        """Queue a payload on every socket of a user; never blocks"""
+        payload = jsonable_encoder(payload)
+        for connection in list(self.connections.get(user_id, ())):
+            connection.offer(payload)
+
+    def send_to_users(self, user_ids: Iterable[str], payload: dict):
+        for user_id in set(user_ids):
+            self.send_to_user(user_id, payload)
+
+
+manager = ConnectionManager()
@@ -0,0 +1,207 @@
+"""Demo data for a fresh Clubly database.
+
+Seeding used to run on every API startup, in every worker and on every
+reload. It is now an explicit, idempotent command, run once per deployment
+in the background job next to the API (see entrypoint.sh):
+
+    python seed.py
+
+Each section only inserts when its data is missing, so running it against
+a populated database is a no-op.
+"""
+import asyncio
+import uuid
+from datetime import datetime
+
+from passwords import hasher
+
+
+async def seed_default_data(database):
+    # Create default admin user if not exists
+    if not await database.users.find_one({"username": "admin"}):
+        admin_user = {
+            "id": str(uuid.uuid4()),
+            "nome": "Admin",
+            "cognome": "Clubly",
+            "email": "admin@clubly.it",
+            "username": "admin",
+            "password": await hasher.hash("admin123"),
+            "ruolo": "clubly_founder",
+            "data_nascita": "1990-01-01",
+            "citta": "Milano",
+            "biografia": "Fondatore di Clubly, appassionato di vita notturna e tecnologia.",
+            "profile_image": None,
+            "needs_setup": False,
+            "created_at": datetime.utcnow()
+        }
+        await database.users.insert_one(admin_user)
+        print("Default admin user created")
+
+    # Create default capo promoter if not exists
+    if not await database.users.find_one({"ruolo": "capo_promoter"}):
+        capo_promoter = {
+            "id": str(uuid.uuid4()),
+            "nome": "Marco",
+            "cognome": "Capo",
+            "email": "capo@clubly.it",
+            "username": "capo_milano",
+            "password": await hasher.hash("Password1"),
+            "ruolo": "capo_promoter",
+            "data_nascita": "1988-05-10",
+            "citta": "Milano",
+            "biografia": "Capo promoter con 10 anni di esperienza nel settore della vita notturna milanese.",
+            "organization": "Night Events Milano",
+            "profile_image": None,
+            "needs_setup": False,
+            "created_at": datetime.utcnow()
+        }
+        await database.users.insert_one(capo_promoter)
+        print("Default capo promoter created")
+
+    # Create sample promoters if none exist
+    if not await database.users.find_one({"ruolo": "promoter"}):
+        sample_promoters = [
+            {
+                "id": str(uuid.uuid4()),
+                "nome": "Marco",
+                "cognome": "Rossi",
+                "email": "marco.promoter@clubly.it",
+                "username": "marco_promoter",
+                "password": await hasher.hash("Password1@"),
+                "ruolo": "promoter",
+                "data_nascita": "1995-03-15",
+                "citta": "Milano",
+                "biografia": "Promoter esperto di eventi electronic e house music. Amo creare esperienze indimenticabili!",
+                "organization": "Night Events Milano",
+                "status": "available",
+                "profile_image": None,
+                "needs_setup": False,
+                "created_at": datetime.utcnow()
+            },
+            {
+                "id": str(uuid.uuid4()),
+                "nome": "Sara",
+                "cognome": "Bianchi",
+                "email": "sara.promoter@clubly.it",
+                "username": "sara_promoter",
+                "password": await hasher.hash("Password1@"),
+                "ruolo": "promoter",
+                "data_nascita": "1993-07-22",
+                "citta": "Roma",
+                "biografia": "Specializzata in eventi hip-hop e R&B. Sempre alla ricerca delle novità musicali.",
+                "organization": "Urban Nights",
+                "status": "available",
+                "profile_image": None,
+                "needs_setup": False,
+                "created_at": datetime.utcnow()
+            },
+            {
+                "id": str(uuid.uuid4()),
+                "nome": "Alex",
+                "cognome": "Verdi",
+                "email": "alex.promoter@clubly.it",
+                "username": "alex_promoter",
+                "password": await hasher.hash("Password1@"),
+                "ruolo": "promoter",
+                "data_nascita": "1992-11-08",
+                "citta": "Torino",
+                "biografia": "DJ e promoter di eventi techno underground. La notte è il mio mondo!",
+                "organization": "Electronic Sessions",
+                "status": "available",
+                "profile_image": None,
+                "needs_setup": False,
+                "created_at": datetime.utcnow()
+            }
+        ]
+        await database.users.insert_many(sample_promoters)
+        print("Sample promoters created")
+
+    # Create organizations if none exist
+    if await database.organizations.count_documents({}) == 0:
+        sample_organizations = [
+            {
+                "id": str(uuid.uuid4()),
+                "name": "Night Events Milano",
+                "location": "Milano",
+                "capo_promoter_id": None,  # Will be updated when capo promoter confirms
+                "created_at": datetime.utcnow()
+            },
+            {
+                "id": str(uuid.uuid4()),
+                "name": "Urban Nights",
+                "location": "Roma", 
+                "capo_promoter_id": None,
+                "created_at": datetime.utcnow()
+            },
+            {
+                "id": str(uuid.uuid4()),
+                "name": "Electronic Sessions",
+                "location": "Torino",
+                "capo_promoter_id": None,
+                "created_at": datetime.utcnow()
+            }
+        ]
+        await database.organizations.insert_many(sample_organizations)
+        print("Sample organizations created")
+
+    # Create sample events if none exist
+    if await database.events.count_documents({}) == 0:
+        sample_events = [
+            {
+                "id": str(uuid.uuid4()),
+                "name": "NEON NIGHTS - Electronic Party",
+                "date": "2024-04-15",
+                "location": "Club Matrix, Milano",
+                "organization": "Night Events Milano",
+                "start_time": "23:00",
+                "lineup": ["DJ Alex", "DJ Sarah", "MC John"],
+                "guests": ["Special Guest TBA"],
+                "total_tables": 20,
+                "tables_available": 15,
+                "max_party_size": 8,
+                "image": "https://images.pexels.com/photos/11748607/pexels-photo-11748607.jpeg",
+                "created_at": datetime.utcnow()
+            },
+            {
+                "id": str(uuid.uuid4()),
+                "name": "RED PASSION - Hip Hop Night",
+                "date": "2024-04-20",
+                "location": "Warehouse Club, Roma",
+                "organization": "Urban Nights",
+                "start_time": "22:30",
+                "lineup": ["DJ Mike", "DJ Luna"],
+                "guests": ["Rapper Boss"],
+                "total_tables": 15,
+                "tables_available": 8,
+                "max_party_size": 6,
+                "image": "https://images.pexels.com/photos/15747701/pexels-photo-15747701.jpeg",
+                "created_at": datetime.utcnow()
+            },
+            {
+                "id": str(uuid.uuid4()),
+                "name": "TECHNO UNDERGROUND",
+                "date": "2024-04-25",
+                "location": "Deep Club, Torino",
+                "organization": "Electronic Sessions",
+                "start_time": "00:00",
+                "lineup": ["DJ Techno", "DJ Beat", "DJ Flow"],
+                "guests": [],
+                "total_tables": 10,
+                "tables_available": 10,
+                "max_party_size": 12,
+                "image": "https://images.unsplash.com/photo-1699871318112-188325a4a2c3?crop=entropy&cs=srgb&fm=jpg&ixid=M3w3NTY2NzZ8MHwxfHNlYXJjaHwyfHxjbHVifGVufDB8fHxyZWR8MTc0ODk1ODc2M3ww&ixlib=rb-4.1.0&q=85",
+                "created_at": datetime.utcnow()
+            }
+        ]
+        await database.events.insert_many(sample_events)
+        print("Sample events created")
+
+
+if __name__ == "__main__":
+    from database import close_client, db
+
+    async def _main():
+        await seed_default_data(db)
+        close_client()
+
+    asyncio.run(_main())
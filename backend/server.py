@@ -1,13 +1,15 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, WebSocket, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
-import pymongo
+from pymongo.errors import DuplicateKeyError
+import asyncio
 import os
+import re
+import sys
 import jwt
-import bcrypt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import uuid
 
 app = FastAPI()
@@ -21,15 +23,65 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# MongoDB connection
-MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = pymongo.MongoClient(MONGO_URL)
-db = client.clubly_db
+# Sibling modules are importable both as `server:app` and `backend.server:app`
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# MongoDB connection (async Motor client, see database.py)
+from database import db, close_client, warm_up_pool
+from indexes import missing_indexes
+from health import health
+from cache import TTLCache
+from http_cache import encode_payload, etag_response
+from metrics import PrometheusMiddleware, register_password_hasher, register_single_flight, register_waiting_room, render_metrics
+from db_accounting import DBAccountingMiddleware
+from promoter_assignment import assign_promoter
+from lookups import USER_PUBLIC_PROJECTION, fetch_by_ids, fetch_last_messages, fetch_page
+from realtime import manager as realtime
+from fanout import bus
+from pagination import clamp_limit, encode_cursor, keyset_condition
+from passwords import hasher as password_hasher
+from singleflight import groups as single_flight_groups, single_flight
+from shared_cache import SharedCache, backend as shared_cache_backend, caches as shared_caches, shared_cache
+from waiting_room import WAITING_ROOM_POLL_SECONDS, waiting_room
+from media import (
+    MEDIA_CACHE_CONTROL, create_blob_store, event_poster_fields, profile_image_fields,
+    shutdown_process_pool, warm_up_process_pool
+)
+
+# Uploaded images live outside the documents (see media.py)
+blob_store = create_blob_store(db)
+
+# Prometheus metrics, exported at /metrics (see metrics.py)
+app.add_middleware(PrometheusMiddleware)
+register_password_hasher(password_hasher)
+register_single_flight(single_flight_groups)
+register_waiting_room(waiting_room)
+
+# X-DB-Queries/Server-Timing headers and query budget logging (see db_accounting.py)
+app.add_middleware(DBAccountingMiddleware)
 
 # JWT configuration
 JWT_SECRET = "clubly_secret_key_2024"
 security = HTTPBearer()
 
+# Caller records (see get_caller): short TTL, invalidated on profile/organization changes
+CALLER_CACHE_TTL = float(os.environ.get('CALLER_CACHE_TTL', '30'))
+CALLER_CACHE_SIZE = int(os.environ.get('CALLER_CACHE_SIZE', '10000'))
+CALLER_PROJECTION = {
+    "_id": 0, "id": 1, "nome": 1, "cognome": 1, "username": 1, "email": 1,
+    "ruolo": 1, "organization": 1, "status": 1
+}
+caller_cache = TTLCache(maxsize=CALLER_CACHE_SIZE, ttl=CALLER_CACHE_TTL)
+
+# Hot public reads, shared by the workers and served stale while they refresh
+# (see shared_cache.py); every write route touching them invalidates
+CACHE_FRESH_TTL = float(os.environ.get('CACHE_FRESH_TTL', '15'))
+CACHE_STALE_TTL = float(os.environ.get('CACHE_STALE_TTL', '300'))
+event_details = shared_cache("event_detail", CACHE_FRESH_TTL, CACHE_STALE_TTL)
+organizations_cache = shared_cache("organizations", CACHE_FRESH_TTL, CACHE_STALE_TTL)
+organization_members_cache = shared_cache("organization_members", CACHE_FRESH_TTL, CACHE_STALE_TTL)
+user_profiles = shared_cache("user_profile", CACHE_FRESH_TTL, CACHE_STALE_TTL)
+
 # Pydantic models
 class UserRegister(BaseModel):
     nome: str
@@ -120,6 +172,7 @@ class Booking(BaseModel):
     booking_type: str  # "lista" or "tavolo"
     party_size: int
     selected_promoter_id: Optional[str] = None  # Allow client to select specific promoter
+    queue_token: Optional[str] = None  # Admitted waiting room ticket, during a rush
 
 class ChatMessage(BaseModel):
     chat_id: str
@@ -136,11 +189,11 @@ class Chat(BaseModel):
     status: str = "active"  # active, closed
 
 # Helper functions
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+async def verify_password(password: str, hashed: str) -> bool:
+    return await password_hasher.verify(password, hashed)
 
 def create_jwt_token(user_data: dict) -> str:
     payload = {
@@ -149,51 +202,50 @@ def create_jwt_token(user_data: dict) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm="HS256")
 
-def verify_jwt_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def decode_jwt_token(token: str) -> dict:
     try:
-        payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=["HS256"])
+        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
         return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token scaduto")
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Token non valido")
 
-def assign_promoter_to_event(event_id: str) -> str:
+def verify_jwt_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return decode_jwt_token(credentials.credentials)
+
+async def get_caller(current_user = Depends(verify_jwt_token)) -> dict:
+    """The caller's trimmed user record, loaded once per request and cached briefly"""
+    user = caller_cache.get(current_user["id"])
+    if user is None:
+        user = await db.users.find_one({"id": current_user["id"]}, CALLER_PROJECTION)
+        if not user:
+            raise HTTPException(status_code=404, detail="Utente non trovato")
+        caller_cache.set(current_user["id"], user)
+    return user
+
+async def invalidate_callers(*user_ids: str):
+    """Drop cached caller records here and, through the bus, on every other worker"""
+    for user_id in user_ids:
+        caller_cache.invalidate(user_id)
+    await bus.publish({"kind": "user_changed", "user_ids": list(user_ids)})
+
+async def invalidate_shared(cache: SharedCache, *keys: str):
+    """Drop shared cache entries everywhere: L2 here, L1 on every worker through the bus"""
+    keys = [key for key in keys if key is not None]
+    if not keys:
+        return
+    await cache.invalidate(keys)
+    await bus.publish({"kind": "cache_invalidated", "cache": cache.name, "keys": keys})
+
+async def invalidate_user_caches(user_id: str, *organizations: Optional[str]):
+    """After a user write: their public profile and the member lists they appear in"""
+    await invalidate_shared(user_profiles, user_id)
+    await invalidate_shared(organization_members_cache, *organizations)
+
+async def assign_promoter_to_event(event: dict) -> str:
     """Trova il promoter con meno prenotazioni per l'evento"""
-    event = db.events.find_one({"id": event_id})
-    if not event:
-        return None
-    
-    # Ottieni tutti i promoter della stessa organizzazione dell'evento
-    promoters = list(db.users.find({
-        "ruolo": {"$in": ["promoter", "capo_promoter"]},
-        "organization": event.get("organization"),
-        "status": "available"
-    }))
-    
-    if not promoters:
-        # Se non ci sono promoter nella stessa organizzazione, prova con qualsiasi promoter
-        promoters = list(db.users.find({
-            "ruolo": {"$in": ["promoter", "capo_promoter"]},
-            "status": "available"
-        }))
-    
-    if not promoters:
-        return None
-    
-    # Conta le prenotazioni per ogni promoter
-    promoter_bookings = {}
-    for promoter in promoters:
-        booking_count = db.bookings.count_documents({
-            "promoter_id": promoter["id"],
-            "status": {"$in": ["pending", "confirmed"]}
-        })
-        promoter_bookings[promoter["id"]] = booking_count
-    
-    # Trova il promoter con meno prenotazioni
-    min_bookings_promoter_id = min(promoter_bookings, key=promoter_bookings.get)
-    
-    return min_bookings_promoter_id
+    return await assign_promoter(db, event)
 
 def validate_event_datetime(date_str: str, time_str: str) -> bool:
     """Valida che data e ora dell'evento non siano nel passato"""
@@ -211,189 +263,46 @@ def validate_event_datetime(date_str: str, time_str: str) -> bool:
     except:
         return False
 
-# Initialize default data
-def initialize_default_data():
-    # Create default admin user if not exists
-    if not db.users.find_one({"username": "admin"}):
-        admin_user = {
-            "id": str(uuid.uuid4()),
-            "nome": "Admin",
-            "cognome": "Clubly",
-            "email": "admin@clubly.it",
-            "username": "admin",
-            "password": hash_password("admin123"),
-            "ruolo": "clubly_founder",
-            "data_nascita": "1990-01-01",
-            "citta": "Milano",
-            "biografia": "Fondatore di Clubly, appassionato di vita notturna e tecnologia.",
-            "profile_image": None,
-            "needs_setup": False,
-            "created_at": datetime.utcnow()
-        }
-        db.users.insert_one(admin_user)
-        print("Default admin user created")
-
-    # Create default capo promoter if not exists
-    if not db.users.find_one({"ruolo": "capo_promoter"}):
-        capo_promoter = {
-            "id": str(uuid.uuid4()),
-            "nome": "Marco",
-            "cognome": "Capo",
-            "email": "capo@clubly.it",
-            "username": "capo_milano",
-            "password": hash_password("Password1"),
-            "ruolo": "capo_promoter",
-            "data_nascita": "1988-05-10",
-            "citta": "Milano",
-            "biografia": "Capo promoter con 10 anni di esperienza nel settore della vita notturna milanese.",
-            "organization": "Night Events Milano",
-            "profile_image": None,
-            "needs_setup": False,
-            "created_at": datetime.utcnow()
-        }
-        db.users.insert_one(capo_promoter)
-        print("Default capo promoter created")
-
-    # Create sample promoters if none exist
-    if not db.users.find_one({"ruolo": "promoter"}):
-        sample_promoters = [
-            {
-                "id": str(uuid.uuid4()),
-                "nome": "Marco",
-                "cognome": "Rossi",
-                "email": "marco.promoter@clubly.it",
-                "username": "marco_promoter",
-                "password": hash_password("Password1@"),
-                "ruolo": "promoter",
-                "data_nascita": "1995-03-15",
-                "citta": "Milano",
-                "biografia": "Promoter esperto di eventi electronic e house music. Amo creare esperienze indimenticabili!",
-                "organization": "Night Events Milano",
-                "status": "available",
-                "profile_image": None,
-                "needs_setup": False,
-                "created_at": datetime.utcnow()
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "nome": "Sara",
-                "cognome": "Bianchi",
-                "email": "sara.promoter@clubly.it",
-                "username": "sara_promoter",
-                "password": hash_password("Password1@"),
-                "ruolo": "promoter",
-                "data_nascita": "1993-07-22",
-                "citta": "Roma",
-                "biografia": "Specializzata in eventi hip-hop e R&B. Sempre alla ricerca delle novità musicali.",
-                "organization": "Urban Nights",
-                "status": "available",
-                "profile_image": None,
-                "needs_setup": False,
-                "created_at": datetime.utcnow()
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "nome": "Alex",
-                "cognome": "Verdi",
-                "email": "alex.promoter@clubly.it",
-                "username": "alex_promoter",
-                "password": hash_password("Password1@"),
-                "ruolo": "promoter",
-                "data_nascita": "1992-11-08",
-                "citta": "Torino",
-                "biografia": "DJ e promoter di eventi techno underground. La notte è il mio mondo!",
-                "organization": "Electronic Sessions",
-                "status": "available",
-                "profile_image": None,
-                "needs_setup": False,
-                "created_at": datetime.utcnow()
-            }
-        ]
-        db.users.insert_many(sample_promoters)
-        print("Sample promoters created")
-
-    # Create organizations if none exist
-    if db.organizations.count_documents({}) == 0:
-        sample_organizations = [
-            {
-                "id": str(uuid.uuid4()),
-                "name": "Night Events Milano",
-                "location": "Milano",
-                "capo_promoter_id": None,  # Will be updated when capo promoter confirms
-                "created_at": datetime.utcnow()
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "name": "Urban Nights",
-                "location": "Roma", 
-                "capo_promoter_id": None,
-                "created_at": datetime.utcnow()
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "name": "Electronic Sessions",
-                "location": "Torino",
-                "capo_promoter_id": None,
-                "created_at": datetime.utcnow()
-            }
-        ]
-        db.organizations.insert_many(sample_organizations)
-        print("Sample organizations created")
-
-    # Create sample events if none exist
-    if db.events.count_documents({}) == 0:
-        sample_events = [
-            {
-                "id": str(uuid.uuid4()),
-                "name": "NEON NIGHTS - Electronic Party",
-                "date": "2024-04-15",
-                "location": "Club Matrix, Milano",
-                "organization": "Night Events Milano",
-                "start_time": "23:00",
-                "lineup": ["DJ Alex", "DJ Sarah", "MC John"],
-                "guests": ["Special Guest TBA"],
-                "total_tables": 20,
-                "tables_available": 15,
-                "max_party_size": 8,
-                "image": "https://images.pexels.com/photos/11748607/pexels-photo-11748607.jpeg",
-                "created_at": datetime.utcnow()
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "name": "RED PASSION - Hip Hop Night",
-                "date": "2024-04-20",
-                "location": "Warehouse Club, Roma",
-                "organization": "Urban Nights",
-                "start_time": "22:30",
-                "lineup": ["DJ Mike", "DJ Luna"],
-                "guests": ["Rapper Boss"],
-                "total_tables": 15,
-                "tables_available": 8,
-                "max_party_size": 6,
-                "image": "https://images.pexels.com/photos/15747701/pexels-photo-15747701.jpeg",
-                "created_at": datetime.utcnow()
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "name": "TECHNO UNDERGROUND",
-                "date": "2024-04-25",
-                "location": "Deep Club, Torino",
-                "organization": "Electronic Sessions",
-                "start_time": "00:00",
-                "lineup": ["DJ Techno", "DJ Beat", "DJ Flow"],
-                "guests": [],
-                "total_tables": 10,
-                "tables_available": 10,
-                "max_party_size": 12,
-                "image": "https://images.unsplash.com/photo-1699871318112-188325a4a2c3?crop=entropy&cs=srgb&fm=jpg&ixid=M3w3NTY2NzZ8MHwxfHNlYXJjaHwyfHxjbHVifGVufDB8fHxyZWR8MTc0ODk1ODc2M3ww&ixlib=rb-4.1.0&q=85",
-                "created_at": datetime.utcnow()
-            }
-        ]
-        db.events.insert_many(sample_events)
-        print("Sample events created")
-
-# Initialize data on startup
-initialize_default_data()
+# Warm-up runs in the background after startup; /api/health/ready reports 503
+# until it is done. Demo data and indexes are not this process's job: entrypoint.sh
+# runs seed.py and indexes.py as a background job next to uvicorn
+@health.warmup("mongo_pool")
+async def warm_up_mongo_pool():
+    await warm_up_pool(db)
+
+@health.warmup("media_pool")
+async def warm_up_media_pool():
+    await warm_up_process_pool()
+
+@health.warmup("events")
+async def warm_up_events():
+    # Pulls the public events list into MongoDB's cache before the first visitor
+    await db.events.find({}, {"_id": 0}).to_list(length=None)
+
+@health.check("mongo")
+async def check_mongo():
+    await db.command("ping")
+
+# An index build failing on legacy data (or still running) is worth an alert,
+# not an outage: reported as degraded, never gating readiness
+@health.check("indexes", gating=False)
+async def check_indexes():
+    missing = await missing_indexes(db)
+    if missing:
+        raise RuntimeError(f"missing indexes on {', '.join(sorted(missing))}")
+
+@app.on_event("startup")
+async def startup_initialize_data():
+    await bus.start(dispatch_fanout)
+    health.start_warmup()
+
+@app.on_event("shutdown")
+async def shutdown_db_client():
+    await health.stop()
+    await bus.stop()
+    await shared_cache_backend.close()
+    shutdown_process_pool()
+    close_client()
 
 # API Routes
 
@@ -401,11 +310,43 @@ initialize_default_data()
 async def root():
     return {"message": "Clubly API is running!"}
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/api/health/live")
+async def health_live():
+    """Liveness probe: answers as long as the event loop does"""
+    return {"status": "alive"}
+
+@app.get("/api/health/ready")
+async def health_ready(response: Response):
+    """Readiness probe: warm-up finished, MongoDB reachable, indexes built"""
+    ready, report = await health.readiness()
+    if not ready:
+        response.status_code = 503
+    return report
+
+# Media endpoint: content-hashed keys never change, so responses are cached forever
+@app.get("/api/media/{key:path}")
+async def get_media(key: str, request: Request):
+    etag = f'"{key}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": MEDIA_CACHE_CONTROL})
+    
+    blob = await blob_store.get(key)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="File non trovato")
+    
+    data, content_type = blob
+    return Response(content=data, media_type=content_type, headers={"ETag": etag, "Cache-Control": MEDIA_CACHE_CONTROL})
+
 # Authentication endpoints
 @app.post("/api/auth/register")
 async def register(user: UserRegister):
     # Check if user already exists
-    if db.users.find_one({"$or": [{"email": user.email}, {"username": user.username}]}):
+    if await db.users.find_one({"$or": [{"email": user.email}, {"username": user.username}]}):
         raise HTTPException(status_code=400, detail="Utente già esistente")
     
     # Create new user
@@ -415,17 +356,20 @@ async def register(user: UserRegister):
         "cognome": user.cognome,
         "email": user.email,
         "username": user.username,
-        "password": hash_password(user.password),
+        "password": await hash_password(user.password),
         "ruolo": user.ruolo,
         "data_nascita": user.data_nascita,
         "citta": user.citta,
         "biografia": user.biografia or "",
-        "profile_image": user.profile_image,
+        **(await profile_image_fields(blob_store, user.profile_image)),
         "needs_setup": False,
         "created_at": datetime.utcnow()
     }
     
-    db.users.insert_one(user_data)
+    try:
+        await db.users.insert_one(user_data)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Utente già esistente")
     
     # Create JWT token
     token_data = {
@@ -455,16 +399,24 @@ async def register(user: UserRegister):
 @app.post("/api/auth/login")
 async def login(user: UserLogin):
     # Find user in database by email or username
-    db_user = db.users.find_one({
+    db_user = await db.users.find_one({
         "$or": [
             {"email": user.login},
             {"username": user.login}
         ]
     })
     
-    if not db_user or not verify_password(user.password, db_user["password"]):
+    if not db_user or not await verify_password(user.password, db_user["password"]):
         raise HTTPException(status_code=401, detail="Email o password non corrette")
     
+    # Upgrade hashes made with another BCRYPT_ROUNDS while the password is at hand
+    upgraded = await password_hasher.rehash(user.password, db_user["password"])
+    if upgraded:
+        await db.users.update_one(
+            {"id": db_user["id"], "password": db_user["password"]},
+            {"$set": {"password": upgraded}}
+        )
+    
     # Create JWT token
     token_data = {
         "id": db_user["id"],
@@ -494,7 +446,7 @@ async def login(user: UserLogin):
 
 @app.get("/api/user/profile")
 async def get_profile(current_user = Depends(verify_jwt_token)):
-    db_user = db.users.find_one({"id": current_user["id"]})
+    db_user = await db.users.find_one({"id": current_user["id"]})
     if not db_user:
         raise HTTPException(status_code=404, detail="Utente non trovato")
     
@@ -513,14 +465,99 @@ async def get_profile(current_user = Depends(verify_jwt_token)):
     }
 
 # Events endpoints
+# Public event listings are cached per worker, pre-serialized with their ETag,
+# and cleared on every event write (see invalidate_events_cache)
+EVENTS_CACHE_TTL = float(os.environ.get('EVENTS_CACHE_TTL', '30'))
+EVENTS_FEED_PAGE_SIZE = 20
+EVENTS_FEED_MAX_PAGE_SIZE = 100
+events_cache = TTLCache(maxsize=512, ttl=EVENTS_CACHE_TTL)
+
+async def invalidate_events_cache(*event_ids: str):
+    """Drop cached event listings, and the details of `event_ids`, on every worker"""
+    events_cache.clear()
+    await bus.publish({"kind": "events_changed"})
+    await invalidate_shared(event_details, *event_ids)
+
+async def cached_events_response(request: Request, route: str, key: tuple, load):
+    """Serve `load()` from events_cache, answering 304 to a matching If-None-Match
+
+    Concurrent misses for the same key share one query through the route's
+    single-flight group.
+    """
+    entry = events_cache.get(key)
+    if entry is None:
+        async def load_entry():
+            generation = events_cache.generation
+            entry = encode_payload(await load())
+            events_cache.set(key, entry, generation=generation)
+            return entry
+        entry = await single_flight(route).do(key, load_entry)
+    return etag_response(request, *entry)
+
+def parse_feed_date(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Data non valida, usa il formato AAAA-MM-GG")
+
 @app.get("/api/events")
-async def get_events():
-    events = list(db.events.find({}, {"_id": 0}).sort("date", 1))
-    return events
+async def get_events(request: Request):
+    async def load():
+        return await db.events.find({}, {"_id": 0}).sort("date", 1).to_list(length=None)
+    return await cached_events_response(request, "events", ("all",), load)
+
+@app.get("/api/events/feed")
+async def get_events_feed(
+    request: Request,
+    city: Optional[str] = None,
+    organization: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    upcoming: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = EVENTS_FEED_PAGE_SIZE
+):
+    """Public events in (date, id) order, one page at a time; pass next_cursor back as cursor"""
+    limit = clamp_limit(limit, EVENTS_FEED_MAX_PAGE_SIZE)
+    date_from, date_to = parse_feed_date(date_from), parse_feed_date(date_to)
+    if upcoming:
+        date_from = max(date_from or "", datetime.now().strftime("%Y-%m-%d"))
+    
+    match = {}
+    if organization:
+        match["organization"] = organization
+    if city:
+        # Locations end with the city, e.g. "Deep Club, Torino"
+        match["location"] = {"$regex": rf"(^|,)\s*{re.escape(city.strip())}\s*$", "$options": "i"}
+    if date_from or date_to:
+        match["date"] = {
+            **({"$gte": date_from} if date_from else {}),
+            **({"$lte": date_to} if date_to else {})
+        }
+    condition = keyset_condition("date", cursor, 1)
+    query = {"$and": [match, condition]} if condition else match
+    
+    async def load():
+        events = await db.events.find(query, {"_id": 0}).sort([("date", 1), ("id", 1)]).limit(limit + 1).to_list(length=None)
+        has_more = len(events) > limit
+        events = events[:limit]
+        return {
+            "events": events,
+            "has_more": has_more,
+            "next_cursor": encode_cursor(events[-1]["date"], events[-1]["id"]) if has_more else None
+        }
+    
+    key = ("feed", (city or "").strip().lower(), organization, date_from, date_to, cursor, limit)
+    return await cached_events_response(request, "events_feed", key, load)
+
+async def cached_event(event_id: str) -> Optional[dict]:
+    return await event_details.get(event_id, lambda: db.events.find_one({"id": event_id}, {"_id": 0}))
 
 @app.get("/api/events/{event_id}")
 async def get_event(event_id: str):
-    event = db.events.find_one({"id": event_id}, {"_id": 0})
+    event = await cached_event(event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Evento non trovato")
     return event
@@ -538,30 +575,122 @@ async def create_event(event: Event, current_user = Depends(verify_jwt_token)):
     event_data = {
         "id": str(uuid.uuid4()),
         **event.dict(),
+        **(await event_poster_fields(blob_store, event.event_poster)),
         "created_at": datetime.utcnow(),
         "created_by": current_user["id"]
     }
     
-    db.events.insert_one(event_data)
+    await db.events.insert_one(event_data)
+    await invalidate_events_cache()
     return {"message": "Evento creato con successo", "event_id": event_data["id"]}
 
 # Bookings endpoints
+# Bookings in these statuses give their table back to the event
+BOOKING_CANCELLED_STATUSES = {"cancelled", "rejected"}
+
+async def claim_table(event_id: str) -> Optional[dict]:
+    """Take one table of the event, or None if it is sold out (or missing)
+    
+    The availability check and the decrement are one conditional update, so
+    concurrent bookings can never take the same last table twice.
+    
+    Only the event's detail entry is invalidated: clearing every listing on
+    each claim would defeat the events cache during a sold-out rush. Listings
+    show tables_available up to EVENTS_CACHE_TTL seconds old; the claim itself
+    is always checked against the database.
+    """
+    event = await db.events.find_one_and_update(
+        {"id": event_id, "tables_available": {"$gt": 0}},
+        {"$inc": {"tables_available": -1}},
+        projection={"_id": 0}
+    )
+    if event:
+        await invalidate_shared(event_details, event_id)
+    return event
+
+async def release_table(event_id: str):
+    """Give one table back, never beyond the event's total"""
+    await db.events.update_one(
+        {"id": event_id, "$expr": {"$lt": ["$tables_available", "$total_tables"]}},
+        {"$inc": {"tables_available": 1}}
+    )
+    await invalidate_shared(event_details, event_id)
+
+# Waiting room (see waiting_room.py): when bookings for an event outrun its
+# admission rate, clients queue here and book with their admitted token
+@app.post("/api/events/{event_id}/queue")
+async def join_event_queue(event_id: str, current_user = Depends(verify_jwt_token)):
+    """Join the event's waiting room; poll the returned token until admitted"""
+    if not await cached_event(event_id):
+        raise HTTPException(status_code=404, detail="Evento non trovato")
+    return waiting_room.join(event_id, current_user["id"])
+
+@app.get("/api/events/{event_id}/queue/{token}")
+async def get_queue_ticket(event_id: str, token: str):
+    """Position in the waiting room, answered from memory"""
+    ticket = waiting_room.status(event_id, token)
+    if ticket is None:
+        raise HTTPException(status_code=404, detail="Biglietto di coda non valido o scaduto")
+    return ticket
+
 @app.post("/api/bookings")
 async def create_booking(booking: Booking, current_user = Depends(verify_jwt_token)):
-    # Check if event exists
-    event = db.events.find_one({"id": booking.event_id})
+    # Rooms are only opened for events that exist, so made-up ids cannot grow them
+    event = await cached_event(booking.event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Evento non trovato")
+    # Only bookings admitted by the event's waiting room reach the bookings collection
+    if not waiting_room.enter(booking.event_id, current_user["id"], booking.queue_token):
+        raise HTTPException(
+            status_code=429,
+            detail="Evento molto richiesto: entra in coda per prenotare",
+            headers={"Retry-After": str(WAITING_ROOM_POLL_SECONDS)}
+        )
     
+    wants_table = booking.booking_type == "tavolo"
+    if wants_table:
+        event = await claim_table(booking.event_id)
+        if not event:
+            if not await db.events.find_one({"id": booking.event_id}, {"_id": 1}):
+                raise HTTPException(status_code=404, detail="Evento non trovato")
+            raise HTTPException(status_code=409, detail="Tavoli esauriti per questo evento")
+    
+    # Whatever fails from here on, the half-written booking is removed and
+    # the claimed table goes back to the event
+    booking_id = str(uuid.uuid4())
+    try:
+        return await place_booking(booking_id, booking, current_user, event)
+    except asyncio.CancelledError:
+        # Client gone or shutting down: the cleanup must not be cancelled with us
+        await asyncio.shield(discard_booking(booking_id, booking.event_id, wants_table))
+        raise
+    except Exception:
+        await discard_booking(booking_id, booking.event_id, wants_table)
+        raise
+
+async def discard_booking(booking_id: str, event_id: str, table_claimed: bool):
+    """Remove whatever a failed booking wrote, then give back its table"""
+    chats = await db.chats.find({"booking_id": booking_id}, {"_id": 0, "id": 1}).to_list(length=None)
+    if chats:
+        chat_ids = [chat["id"] for chat in chats]
+        await db.chat_messages.delete_many({"chat_id": {"$in": chat_ids}})
+        await db.chats.delete_many({"id": {"$in": chat_ids}})
+    written = await db.bookings.find_one_and_delete({"id": booking_id}, projection={"_id": 0, "table_held": 1})
+    # A booking cancelled in the meantime has already given its table back
+    if table_claimed and (written is None or written.get("table_held")):
+        await release_table(event_id)
+
+async def place_booking(booking_id: str, booking: Booking, current_user: dict, event: dict) -> dict:
+    """Assign a promoter and write the booking, its chat and the first message"""
     # Auto-assign promoter with least bookings (no manual selection)
-    promoter_id = assign_promoter_to_event(booking.event_id)
+    promoter_id = await assign_promoter_to_event(event)
     
     if not promoter_id:
         raise HTTPException(status_code=503, detail="Nessun promoter disponibile al momento")
     
     # Create booking
     booking_data = {
-        "id": str(uuid.uuid4()),
+        "id": booking_id,
         "user_id": current_user["id"],
         "event_id": booking.event_id,
         "booking_type": booking.booking_type,
@@ -569,10 +698,12 @@ async def create_booking(booking: Booking, current_user = Depends(verify_jwt_tok
         "status": "pending",
         "promoter_id": promoter_id,
         "auto_assigned": True,
+        # Whether this booking currently holds one of the event's tables
+        "table_held": booking.booking_type == "tavolo",
         "created_at": datetime.utcnow()
     }
     
-    db.bookings.insert_one(booking_data)
+    await db.bookings.insert_one(booking_data)
     
     # Create chat for this booking
     chat_data = {
@@ -582,14 +713,18 @@ async def create_booking(booking: Booking, current_user = Depends(verify_jwt_tok
         "promoter_id": promoter_id,
         "event_id": booking.event_id,
         "status": "active",
-        "created_at": datetime.utcnow()
+        # The automatic initial message below is unread for the promoter
+        "unread_promoter": 1,
+        "unread_client": 0,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     }
     
-    db.chats.insert_one(chat_data)
+    await db.chats.insert_one(chat_data)
     
     # Create automatic initial message
-    user = db.users.find_one({"id": current_user["id"]})
-    promoter = db.users.find_one({"id": promoter_id})
+    user = await db.users.find_one({"id": current_user["id"]})
+    promoter = await db.users.find_one({"id": promoter_id})
     booking_type_text = "Lista/Prevendita" if booking.booking_type == "lista" else "Tavolo"
     
     # Enhanced initial message with promoter info
@@ -615,14 +750,19 @@ Ciao! Sono interessato/a a questa prenotazione. Puoi aiutarmi con i dettagli?"""
         "is_automatic": True
     }
     
-    db.chat_messages.insert_one(initial_message_data)
-    
-    # Update table availability if booking is for table
-    if booking.booking_type == "tavolo" and event["tables_available"] > 0:
-        db.events.update_one(
-            {"id": booking.event_id},
-            {"$inc": {"tables_available": -1}}
-        )
+    await db.chat_messages.insert_one(initial_message_data)
+    await bus.publish({
+        "kind": "push",
+        "user_ids": [promoter_id],
+        "payload": {
+            "type": "booking",
+            "booking_id": booking_data["id"],
+            "chat_id": chat_data["id"],
+            "event_id": booking.event_id
+        }
+    })
+    await push_chat_message(chat_data, initial_message_data)
+    await push_unread_count(promoter_id, "promoter")
     
     return {
         "message": "Prenotazione creata con successo! Chat avviata con il promoter assegnato automaticamente.",
@@ -633,65 +773,139 @@ Ciao! Sono interessato/a a questa prenotazione. Puoi aiutarmi con i dettagli?"""
 
 @app.get("/api/user/bookings")
 async def get_user_bookings(current_user = Depends(verify_jwt_token)):
-    bookings = list(db.bookings.find({"user_id": current_user["id"]}, {"_id": 0}).sort("created_at", -1))
+    bookings = await db.bookings.find({"user_id": current_user["id"]}, {"_id": 0}).sort("created_at", -1).to_list(length=None)
     
-    # Populate event details for each booking
+    # Populate event details for all bookings with one query
+    events = await fetch_by_ids(db.events, [booking["event_id"] for booking in bookings])
     for booking in bookings:
-        event = db.events.find_one({"id": booking["event_id"]}, {"_id": 0})
-        booking["event"] = event
+        booking["event"] = events.get(booking["event_id"])
     
     return bookings
 
 # Organizations endpoints (for future development)
 @app.get("/api/organizations")
 async def get_organizations():
-    organizations = list(db.organizations.find({}, {"_id": 0}))
+    organizations = await organizations_cache.get("all", lambda: db.organizations.find({}, {"_id": 0}).to_list(length=None))
     return organizations
 
+async def get_organization_members_cached(org_name: str) -> List[dict]:
+    """Members of an organization, by role, without passwords (shared cache)"""
+    return await organization_members_cache.get(org_name, lambda: db.users.find(
+        {"organization": org_name},
+        {"_id": 0, "password": 0}
+    ).sort("ruolo", 1).to_list(length=None))
+
 # Chat endpoints
+# Delta sync
+SYNC_TOMBSTONE_RETENTION = timedelta(days=30)
+# Watermarks trail the clock so writes still in flight at read time are resent
+SYNC_WATERMARK_OVERLAP = timedelta(seconds=5)
+
+def check_sync_watermark(since: datetime) -> tuple:
+    """Normalize a client watermark and compute the next one to hand out"""
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    now = datetime.utcnow()
+    if since < now - SYNC_TOMBSTONE_RETENTION:
+        # Tombstones older than the retention are gone: a full reload is needed
+        raise HTTPException(status_code=410, detail="Watermark scaduto, ricarica tutte le chat")
+    return since, now - SYNC_WATERMARK_OVERLAP
+
+async def delete_event_chats(event_id: str):
+    """Delete an event's chats and messages, recording a tombstone per chat"""
+    chats = await db.chats.find(
+        {"event_id": event_id}, {"_id": 0, "id": 1, "client_id": 1, "promoter_id": 1}
+    ).to_list(length=None)
+    if not chats:
+        return
+    
+    now = datetime.utcnow()
+    await db.tombstones.insert_many([{
+        "collection": "chats",
+        "id": chat["id"],
+        "user_ids": [chat["client_id"], chat["promoter_id"]],
+        "deleted_at": now
+    } for chat in chats])
+    
+    chat_ids = [chat["id"] for chat in chats]
+    await db.chat_messages.delete_many({"chat_id": {"$in": chat_ids}})
+    await db.chats.delete_many({"id": {"$in": chat_ids}})
+
+async def populate_chats(chats: List[dict], user_id: str) -> List[dict]:
+    """Attach event, other participant and last message with one batched query each"""
+    other_ids = [
+        chat["promoter_id"] if chat["client_id"] == user_id else chat["client_id"]
+        for chat in chats
+    ]
+    events = await fetch_by_ids(db.events, [chat["event_id"] for chat in chats])
+    participants = await fetch_by_ids(db.users, other_ids, USER_PUBLIC_PROJECTION)
+    last_messages = await fetch_last_messages(db, [chat["id"] for chat in chats])
+    
+    for chat, other_id in zip(chats, other_ids):
+        chat["event"] = events.get(chat["event_id"])
+        chat["other_participant"] = participants.get(other_id)
+        # Current user is client -> other participant is the promoter
+        chat["participant_role"] = "promoter" if chat["client_id"] == user_id else "cliente"
+        chat["last_message"] = last_messages.get(chat["id"])
+    
+    return chats
+
 @app.get("/api/user/chats")
-async def get_user_chats(current_user = Depends(verify_jwt_token)):
-    """Get all chats for the current user"""
-    chats = list(db.chats.find({
+async def get_user_chats(since: Optional[datetime] = None, current_user = Depends(verify_jwt_token)):
+    """Get all chats for the current user
+
+    With a `since` watermark only chats created or changed after it are
+    returned, together with the ids of chats deleted since then.
+    """
+    participant_filter = {
         "$or": [
             {"client_id": current_user["id"]},
             {"promoter_id": current_user["id"]}
         ]
-    }, {"_id": 0}).sort("created_at", -1))
+    }
     
-    # Populate chat details
-    for chat in chats:
-        # Get event details
-        event = db.events.find_one({"id": chat["event_id"]}, {"_id": 0})
-        chat["event"] = event
-        
-        # Get other participant details
-        if chat["client_id"] == current_user["id"]:
-            # Current user is client, get promoter details
-            promoter = db.users.find_one({"id": chat["promoter_id"]}, {"_id": 0, "password": 0})
-            chat["other_participant"] = promoter
-            chat["participant_role"] = "promoter"
-        else:
-            # Current user is promoter, get client details
-            client = db.users.find_one({"id": chat["client_id"]}, {"_id": 0, "password": 0})
-            chat["other_participant"] = client
-            chat["participant_role"] = "cliente"
-        
-        # Get last message
-        last_message = db.chat_messages.find_one(
-            {"chat_id": chat["id"]}, 
-            {"_id": 0}, 
-            sort=[("timestamp", -1)]
-        )
-        chat["last_message"] = last_message
+    if since is None:
+        chats = await db.chats.find(participant_filter, {"_id": 0}).sort("created_at", -1).to_list(length=None)
+        return await populate_chats(chats, current_user["id"])
     
-    return chats
+    since, watermark = check_sync_watermark(since)
+    chats = await db.chats.find(
+        {**participant_filter, "updated_at": {"$gt": since}}, {"_id": 0}
+    ).sort("created_at", -1).to_list(length=None)
+    tombstones = await db.tombstones.find(
+        {"collection": "chats", "user_ids": current_user["id"], "deleted_at": {"$gt": since}},
+        {"_id": 0, "id": 1}
+    ).to_list(length=None)
+    
+    return {
+        "chats": await populate_chats(chats, current_user["id"]),
+        "deleted_chat_ids": [tombstone["id"] for tombstone in tombstones],
+        "watermark": watermark
+    }
+
+MESSAGES_PAGE_SIZE = 50
+MESSAGES_MAX_PAGE_SIZE = 100
 
 @app.get("/api/chats/{chat_id}/messages")
-async def get_chat_messages(chat_id: str, current_user = Depends(verify_jwt_token)):
-    """Get all messages for a specific chat"""
+async def get_chat_messages(
+    chat_id: str,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    since: Optional[datetime] = None,
+    limit: int = MESSAGES_PAGE_SIZE,
+    current_user = Depends(verify_jwt_token)
+):
+    """Get one page of messages for a specific chat, oldest first
+
+    Without cursors the latest `limit` messages are returned. `before` pages
+    back through older history, `after` fetches what arrived since a message
+    and `since` what arrived after a delta-sync watermark.
+    """
+    if sum(param is not None for param in (before, after, since)) > 1:
+        raise HTTPException(status_code=400, detail="Usa solo uno tra before, after e since")
+    
     # Verify user has access to this chat
-    chat = db.chats.find_one({
+    chat = await db.chats.find_one({
         "id": chat_id,
         "$or": [
             {"client_id": current_user["id"]},
@@ -702,18 +916,41 @@ async def get_chat_messages(chat_id: str, current_user = Depends(verify_jwt_toke
     if not chat:
         raise HTTPException(status_code=404, detail="Chat non trovata")
     
-    messages = list(db.chat_messages.find(
-        {"chat_id": chat_id}, 
-        {"_id": 0}
-    ).sort("timestamp", 1))
-    
-    return messages
+    limit = clamp_limit(limit, MESSAGES_MAX_PAGE_SIZE)
+    watermark = None
+    if since is not None:
+        since, watermark = check_sync_watermark(since)
+        direction = 1
+        query = {"chat_id": chat_id, "timestamp": {"$gt": since}}
+    else:
+        direction = 1 if after else -1
+        query = {"chat_id": chat_id, **keyset_condition("timestamp", after or before, direction)}
+    
+    # Fetch one extra row to know whether another page exists
+    messages = await db.chat_messages.find(query, {"_id": 0}).sort(
+        [("timestamp", direction), ("id", direction)]
+    ).limit(limit + 1).to_list(length=None)
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if direction < 0:
+        messages.reverse()
+    
+    page = {
+        "messages": messages,
+        "has_more": has_more,
+        "before": encode_cursor(messages[0]["timestamp"], messages[0]["id"]) if messages else before,
+        "after": encode_cursor(messages[-1]["timestamp"], messages[-1]["id"]) if messages else after
+    }
+    if watermark is not None:
+        # With more pages pending, continue from `after` before using the watermark
+        page["watermark"] = watermark
+    return page
 
 @app.post("/api/chats/{chat_id}/messages")
 async def send_message(chat_id: str, message: ChatMessage, current_user = Depends(verify_jwt_token)):
     """Send a message to a specific chat"""
     # Verify user has access to this chat
-    chat = db.chats.find_one({
+    chat = await db.chats.find_one({
         "id": chat_id,
         "$or": [
             {"client_id": current_user["id"]},
@@ -735,18 +972,73 @@ async def send_message(chat_id: str, message: ChatMessage, current_user = Depend
         "is_automatic": False
     }
     
-    db.chat_messages.insert_one(message_data)
+    await db.chat_messages.insert_one(message_data)
+    
+    # Bump the other participant's unread counter
+    if chat["client_id"] == current_user["id"]:
+        recipient_id, recipient_side = chat["promoter_id"], "promoter"
+    else:
+        recipient_id, recipient_side = chat["client_id"], "client"
+    await db.chats.update_one(
+        {"id": chat_id},
+        {"$inc": {f"unread_{recipient_side}": 1}, "$set": {"updated_at": message_data["timestamp"]}}
+    )
+    
+    await push_chat_message(chat, message_data)
+    await push_unread_count(recipient_id, recipient_side)
     
     return {"message": "Messaggio inviato con successo", "message_id": message_data["id"]}
 
+@app.post("/api/chats/{chat_id}/read")
+async def mark_chat_as_read(chat_id: str, current_user = Depends(verify_jwt_token)):
+    """Reset the caller's unread counter for a chat"""
+    chat = await db.chats.find_one({
+        "id": chat_id,
+        "$or": [
+            {"client_id": current_user["id"]},
+            {"promoter_id": current_user["id"]}
+        ]
+    }, {"_id": 0, "client_id": 1})
+    
+    if not chat:
+        raise HTTPException(status_code=404, detail="Chat non trovata")
+    
+    side = "client" if chat["client_id"] == current_user["id"] else "promoter"
+    now = datetime.utcnow()
+    await db.chats.update_one(
+        {"id": chat_id},
+        {"$set": {f"unread_{side}": 0, f"last_seen_{side}": now, "updated_at": now}}
+    )
+    await push_unread_count(current_user["id"], side)
+    
+    return {"message": "Chat segnata come letta"}
+
 @app.put("/api/bookings/{booking_id}/status")
 async def update_booking_status(booking_id: str, status: str, current_user = Depends(verify_jwt_token)):
     """Update booking status (confirm/cancel) - only promoters can do this"""
     if current_user["ruolo"] not in ["promoter", "capo_promoter", "clubly_founder"]:
         raise HTTPException(status_code=403, detail="Non autorizzato")
     
+    booking = await db.bookings.find_one({"id": booking_id}, {"_id": 0, "event_id": 1, "booking_type": 1})
+    if not booking:
+        raise HTTPException(status_code=404, detail="Prenotazione non trovata")
+    
+    # Flipping table_held first means concurrent status changes move the
+    # table once; bookings from before table_held existed are left alone
+    if booking["booking_type"] == "tavolo":
+        holds_table = status not in BOOKING_CANCELLED_STATUSES
+        flipped = await db.bookings.find_one_and_update(
+            {"id": booking_id, "table_held": not holds_table},
+            {"$set": {"table_held": holds_table}}
+        )
+        if flipped and not holds_table:
+            await release_table(booking["event_id"])
+        elif flipped and not await claim_table(booking["event_id"]):
+            await db.bookings.update_one({"id": booking_id}, {"$set": {"table_held": False}})
+            raise HTTPException(status_code=409, detail="Tavoli esauriti per questo evento")
+    
     # Update booking status
-    result = db.bookings.update_one(
+    result = await db.bookings.update_one(
         {"id": booking_id},
         {"$set": {"status": status, "updated_at": datetime.utcnow()}}
     )
@@ -756,12 +1048,55 @@ async def update_booking_status(booking_id: str, status: str, current_user = Dep
     
     return {"message": f"Prenotazione {status} con successo"}
 
+# Real-time push channel
+async def push_chat_message(chat: dict, message_data: dict):
+    """Push a newly inserted chat message to both participants, on any worker"""
+    message = {key: value for key, value in message_data.items() if key != "_id"}
+    await bus.publish({
+        "kind": "push",
+        "user_ids": [chat["client_id"], chat["promoter_id"]],
+        "payload": {"type": "message", "chat_id": chat["id"], "message": message}
+    })
+
+async def dispatch_fanout(message: dict):
+    """Deliver a fan-out bus message to the sockets held by this worker"""
+    if message["kind"] == "push":
+        realtime.send_to_users(message["user_ids"], message["payload"])
+    elif message["kind"] == "events_changed":
+        events_cache.clear()
+    elif message["kind"] == "cache_invalidated":
+        shared_caches[message["cache"]].forget(message["keys"])
+    elif message["kind"] == "user_changed":
+        for user_id in message["user_ids"]:
+            caller_cache.invalidate(user_id)
+    elif message["kind"] == "unread":
+        # Only the worker holding the user's socket pays for the count
+        user_id = message["user_id"]
+        if realtime.is_connected(user_id):
+            unread = await count_unread_messages(user_id, message["side"], active_only=True)
+            realtime.send_to_user(user_id, {"type": "unread", "notification_count": min(unread, 99)})
+
+@app.websocket("/api/ws")
+async def websocket_endpoint(websocket: WebSocket, token: str = ""):
+    """Authenticated push channel: new chat messages and unread counts"""
+    try:
+        current_user = decode_jwt_token(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    connection = await realtime.connect(current_user["id"], websocket)
+    try:
+        await connection.serve()
+    finally:
+        realtime.disconnect(current_user["id"], connection)
+
 # User setup endpoint
 @app.post("/api/user/setup")
 async def complete_user_setup(setup: UserSetup, current_user = Depends(verify_jwt_token)):
     """Complete user profile setup for temporary accounts"""
     # Check if username is already taken
-    existing_user = db.users.find_one({
+    existing_user = await db.users.find_one({
         "username": setup.username,
         "id": {"$ne": current_user["id"]}
     })
@@ -775,27 +1110,29 @@ async def complete_user_setup(setup: UserSetup, current_user = Depends(verify_jw
         "data_nascita": setup.data_nascita,
         "citta": setup.citta,
         "biografia": setup.biografia or "",
-        "profile_image": setup.profile_image,
+        **(await profile_image_fields(blob_store, setup.profile_image)),
         "needs_setup": False,
         "updated_at": datetime.utcnow()
     }
     
-    result = db.users.update_one(
+    result = await db.users.update_one(
         {"id": current_user["id"]},
         {"$set": update_data}
     )
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Utente non trovato")
+    await invalidate_callers(current_user["id"])
     
     # Return updated user data
-    updated_user = db.users.find_one({"id": current_user["id"]}, {"_id": 0, "password": 0})
+    updated_user = await db.users.find_one({"id": current_user["id"]}, {"_id": 0, "password": 0})
+    await invalidate_user_caches(current_user["id"], updated_user.get("organization"))
     return {"message": "Profilo completato con successo", "user": updated_user}
 
 # Organization management endpoints
 @app.get("/api/organizations")
 async def get_organizations():
-    organizations = list(db.organizations.find({}, {"_id": 0}))
+    organizations = await db.organizations.find({}, {"_id": 0}).to_list(length=None)
     return organizations
 
 @app.post("/api/organizations")
@@ -805,7 +1142,7 @@ async def create_organization(org: OrganizationCreate, current_user = Depends(ve
         raise HTTPException(status_code=403, detail="Non autorizzato")
     
     # Check if organization name already exists
-    if db.organizations.find_one({"name": org.name}):
+    if await db.organizations.find_one({"name": org.name}):
         raise HTTPException(status_code=400, detail="Organizzazione già esistente")
     
     org_data = {
@@ -817,7 +1154,8 @@ async def create_organization(org: OrganizationCreate, current_user = Depends(ve
         "created_at": datetime.utcnow()
     }
     
-    db.organizations.insert_one(org_data)
+    await db.organizations.insert_one(org_data)
+    await invalidate_shared(organizations_cache, "all")
     return {"message": "Organizzazione creata con successo", "organization_id": org_data["id"]}
 
 @app.get("/api/organizations/{org_name}/members")
@@ -827,26 +1165,21 @@ async def get_organization_members(org_name: str, current_user = Depends(verify_
     if current_user["ruolo"] not in ["capo_promoter", "promoter", "clubly_founder"]:
         raise HTTPException(status_code=403, detail="Non autorizzato")
     
-    members = list(db.users.find(
-        {"organization": org_name}, 
-        {"_id": 0, "password": 0}
-    ).sort("ruolo", 1))
-    
-    return members
+    return await get_organization_members_cached(org_name)
 
 @app.get("/api/organizations/{org_name}/events")
 async def get_organization_events(org_name: str, current_user = Depends(verify_jwt_token)):
     """Get all events for an organization"""
-    events = list(db.events.find(
+    events = await db.events.find(
         {"organization": org_name}, 
         {"_id": 0}
-    ).sort("date", 1))
+    ).sort("date", 1).to_list(length=None)
     
     return events
 
 # Temporary credentials management
 @app.post("/api/users/temporary-credentials")
-async def create_temporary_credentials(creds: TemporaryCredentials, current_user = Depends(verify_jwt_token)):
+async def create_temporary_credentials(creds: TemporaryCredentials, current_user = Depends(verify_jwt_token), caller: dict = Depends(get_caller)):
     """Create temporary credentials for new promoters/capo_promoters"""
     # Check permissions
     if current_user["ruolo"] == "capo_promoter" and creds.ruolo != "promoter":
@@ -857,25 +1190,24 @@ async def create_temporary_credentials(creds: TemporaryCredentials, current_user
         raise HTTPException(status_code=403, detail="Non autorizzato")
     
     # Check if email already exists
-    if db.users.find_one({"email": creds.email}):
+    if await db.users.find_one({"email": creds.email}):
         raise HTTPException(status_code=400, detail="Email già esistente")
     
     # Handle organization assignment
     organization = None
     if creds.organization:
         # Verify organization exists if provided
-        if not db.organizations.find_one({"name": creds.organization}):
+        if not await db.organizations.find_one({"name": creds.organization}):
             raise HTTPException(status_code=400, detail="Organizzazione non trovata")
         organization = creds.organization
     
     # For promoters created by capo_promoter, use capo_promoter's organization if not specified
     if current_user["ruolo"] == "capo_promoter":
-        user = db.users.find_one({"id": current_user["id"]})
-        if creds.organization and user.get("organization") != creds.organization:
+        if creds.organization and caller.get("organization") != creds.organization:
             raise HTTPException(status_code=403, detail="Puoi creare credenziali solo per la tua organizzazione")
         # If no organization specified for promoter, use capo_promoter's organization
         if creds.ruolo == "promoter" and not organization:
-            organization = user.get("organization")
+            organization = caller.get("organization")
     
     # Create temporary user
     user_data = {
@@ -884,7 +1216,7 @@ async def create_temporary_credentials(creds: TemporaryCredentials, current_user
         "cognome": "",  # Will be set during setup
         "email": creds.email,
         "username": "",  # Will be set during setup
-        "password": hash_password(creds.password),
+        "password": await hash_password(creds.password),
         "ruolo": creds.ruolo,
         "data_nascita": "",  # Will be set during setup
         "citta": "",  # Will be set during setup
@@ -897,7 +1229,11 @@ async def create_temporary_credentials(creds: TemporaryCredentials, current_user
         "created_at": datetime.utcnow()
     }
     
-    db.users.insert_one(user_data)
+    try:
+        await db.users.insert_one(user_data)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email già esistente")
+    await invalidate_shared(organization_members_cache, organization)
     
     return {
         "message": "Credenziali temporanee create con successo",
@@ -908,63 +1244,93 @@ async def create_temporary_credentials(creds: TemporaryCredentials, current_user
     }
 
 # Dashboard data endpoints
+DASHBOARD_PAGE_SIZE = 50
+DASHBOARD_MAX_PAGE_SIZE = 200
+
+def clamp_page(offset: int, limit: int) -> tuple:
+    """Keep dashboard pagination parameters within sane bounds"""
+    return max(offset, 0), min(max(limit, 1), DASHBOARD_MAX_PAGE_SIZE)
+
 @app.get("/api/dashboard/promoter")
-async def get_promoter_dashboard(current_user = Depends(verify_jwt_token)):
-    """Get promoter dashboard data"""
+async def get_promoter_dashboard(
+    current_user = Depends(verify_jwt_token),
+    caller: dict = Depends(get_caller),
+    events_offset: int = 0,
+    events_limit: int = DASHBOARD_PAGE_SIZE,
+    members_offset: int = 0,
+    members_limit: int = DASHBOARD_PAGE_SIZE,
+    chats_offset: int = 0,
+    chats_limit: int = DASHBOARD_PAGE_SIZE
+):
+    """Get promoter dashboard data, one page per section"""
     if current_user["ruolo"] not in ["promoter", "capo_promoter"]:
         raise HTTPException(status_code=403, detail="Non autorizzato")
     
-    user = db.users.find_one({"id": current_user["id"]})
-    organization = user.get("organization")
+    organization = caller.get("organization")
     
-    # Get organization events
-    events = list(db.events.find(
-        {"organization": organization}, 
-        {"_id": 0}
-    ).sort("date", 1))
-    
-    # Get organization members
-    members = list(db.users.find(
-        {"organization": organization}, 
-        {"_id": 0, "password": 0}
-    ).sort("ruolo", 1))
+    events_offset, events_limit = clamp_page(events_offset, events_limit)
+    members_offset, members_limit = clamp_page(members_offset, members_limit)
+    chats_offset, chats_limit = clamp_page(chats_offset, chats_limit)
     
-    # Get promoter's active chats
-    chats = list(db.chats.find({
-        "promoter_id": current_user["id"],
-        "status": "active"
-    }, {"_id": 0}).sort("created_at", -1))
+    # Organization events, organization members and the promoter's active chats
+    (events, events_total), (members, members_total), (chats, chats_total) = await asyncio.gather(
+        fetch_page(db.events, {"organization": organization},
+                   [("date", 1)], events_offset, events_limit),
+        fetch_page(db.users, {"organization": organization},
+                   [("ruolo", 1)], members_offset, members_limit, USER_PUBLIC_PROJECTION),
+        fetch_page(db.chats, {"promoter_id": current_user["id"], "status": "active"},
+                   [("created_at", -1)], chats_offset, chats_limit)
+    )
     
-    # Populate chat details
+    # Populate chat details with one batched query per related collection
+    chat_events, clients, last_messages = await asyncio.gather(
+        fetch_by_ids(db.events, [chat["event_id"] for chat in chats]),
+        fetch_by_ids(db.users, [chat["client_id"] for chat in chats], USER_PUBLIC_PROJECTION),
+        fetch_last_messages(db, [chat["id"] for chat in chats])
+    )
     for chat in chats:
-        event = db.events.find_one({"id": chat["event_id"]}, {"_id": 0})
-        client = db.users.find_one({"id": chat["client_id"]}, {"_id": 0, "password": 0})
-        chat["event"] = event
-        chat["client"] = client
-        
-        # Get last message
-        last_message = db.chat_messages.find_one(
-            {"chat_id": chat["id"]}, 
-            {"_id": 0}, 
-            sort=[("timestamp", -1)]
-        )
-        chat["last_message"] = last_message
+        chat["event"] = chat_events.get(chat["event_id"])
+        chat["client"] = clients.get(chat["client_id"])
+        chat["last_message"] = last_messages.get(chat["id"])
     
     return {
         "organization": organization,
         "events": events,
         "members": members,
-        "chats": chats
+        "chats": chats,
+        "pagination": {
+            "events": {"offset": events_offset, "limit": events_limit, "total": events_total},
+            "members": {"offset": members_offset, "limit": members_limit, "total": members_total},
+            "chats": {"offset": chats_offset, "limit": chats_limit, "total": chats_total}
+        }
     }
 
 @app.get("/api/dashboard/capo-promoter")
-async def get_capo_promoter_dashboard(current_user = Depends(verify_jwt_token)):
+async def get_capo_promoter_dashboard(
+    current_user = Depends(verify_jwt_token),
+    caller: dict = Depends(get_caller),
+    events_offset: int = 0,
+    events_limit: int = DASHBOARD_PAGE_SIZE,
+    members_offset: int = 0,
+    members_limit: int = DASHBOARD_PAGE_SIZE,
+    chats_offset: int = 0,
+    chats_limit: int = DASHBOARD_PAGE_SIZE
+):
     """Get capo promoter dashboard data"""
     if current_user["ruolo"] != "capo_promoter":
         raise HTTPException(status_code=403, detail="Non autorizzato")
     
     # Get the same data as promoter dashboard
-    dashboard_data = await get_promoter_dashboard(current_user)
+    dashboard_data = await get_promoter_dashboard(
+        current_user,
+        caller,
+        events_offset=events_offset,
+        events_limit=events_limit,
+        members_offset=members_offset,
+        members_limit=members_limit,
+        chats_offset=chats_offset,
+        chats_limit=chats_limit
+    )
     
     # Add additional permissions info
     dashboard_data["can_edit_events"] = True
@@ -979,16 +1345,16 @@ async def get_clubly_founder_dashboard(current_user = Depends(verify_jwt_token))
         raise HTTPException(status_code=403, detail="Non autorizzato")
     
     # Get all organizations
-    organizations = list(db.organizations.find({}, {"_id": 0}))
+    organizations = await db.organizations.find({}, {"_id": 0}).to_list(length=None)
     
     # Get all events
-    events = list(db.events.find({}, {"_id": 0}).sort("date", 1))
+    events = await db.events.find({}, {"_id": 0}).sort("date", 1).to_list(length=None)
     
     # Get all users by role
     users_by_role = {
-        "capo_promoter": list(db.users.find({"ruolo": "capo_promoter"}, {"_id": 0, "password": 0})),
-        "promoter": list(db.users.find({"ruolo": "promoter"}, {"_id": 0, "password": 0})),
-        "cliente": db.users.count_documents({"ruolo": "cliente"})
+        "capo_promoter": await db.users.find({"ruolo": "capo_promoter"}, {"_id": 0, "password": 0}).to_list(length=None),
+        "promoter": await db.users.find({"ruolo": "promoter"}, {"_id": 0, "password": 0}).to_list(length=None),
+        "cliente": await db.users.count_documents({"ruolo": "cliente"})
     }
     
     return {
@@ -999,35 +1365,37 @@ async def get_clubly_founder_dashboard(current_user = Depends(verify_jwt_token))
 
 # Event management for capo promoters
 @app.put("/api/events/{event_id}")
-async def update_event(event_id: str, event_update: dict, current_user = Depends(verify_jwt_token)):
+async def update_event(event_id: str, event_update: dict, current_user = Depends(verify_jwt_token), caller: dict = Depends(get_caller)):
     """Update event details (only capo_promoter can do this)"""
     if current_user["ruolo"] not in ["capo_promoter", "clubly_founder"]:
         raise HTTPException(status_code=403, detail="Non autorizzato")
     
     # Check if event exists and user has permission
-    event = db.events.find_one({"id": event_id})
+    event = await db.events.find_one({"id": event_id})
     if not event:
         raise HTTPException(status_code=404, detail="Evento non trovato")
     
     # If capo_promoter, check if event belongs to their organization
     if current_user["ruolo"] == "capo_promoter":
-        user = db.users.find_one({"id": current_user["id"]})
-        if event["organization"] != user.get("organization"):
+        if event["organization"] != caller.get("organization"):
             raise HTTPException(status_code=403, detail="Non autorizzato per questo evento")
     
     # Update allowed fields for capo_promoter: name, lineup, start_time, end_time, guests, event_poster
     allowed_fields = ["name", "lineup", "start_time", "end_time", "guests", "event_poster"]
     update_data = {k: v for k, v in event_update.items() if k in allowed_fields}
+    if "event_poster" in update_data:
+        update_data.update(await event_poster_fields(blob_store, update_data.pop("event_poster"), event))
     update_data["updated_at"] = datetime.utcnow()
     update_data["updated_by"] = current_user["id"]
     
-    result = db.events.update_one(
+    result = await db.events.update_one(
         {"id": event_id},
         {"$set": update_data}
     )
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Evento non trovato")
+    await invalidate_events_cache(event_id)
     
     return {"message": "Evento aggiornato con successo"}
 
@@ -1039,13 +1407,13 @@ async def assign_capo_promoter_to_organization(org_id: str, update: Organization
         raise HTTPException(status_code=403, detail="Non autorizzato")
     
     # Check if organization exists
-    org = db.organizations.find_one({"id": org_id})
+    org = await db.organizations.find_one({"id": org_id})
     if not org:
         raise HTTPException(status_code=404, detail="Organizzazione non trovata")
     
     # If capo_promoter_id provided, validate it exists and is actually a capo_promoter
     if update.capo_promoter_id:
-        capo_promoter = db.users.find_one({
+        capo_promoter = await db.users.find_one({
             "id": update.capo_promoter_id,
             "ruolo": "capo_promoter"
         })
@@ -1053,19 +1421,22 @@ async def assign_capo_promoter_to_organization(org_id: str, update: Organization
             raise HTTPException(status_code=400, detail="Capo promoter non trovato")
         
         # Update capo promoter's organization
-        db.users.update_one(
+        await db.users.update_one(
             {"id": update.capo_promoter_id},
             {"$set": {"organization": org["name"]}}
         )
+        await invalidate_callers(update.capo_promoter_id)
+        await invalidate_user_caches(update.capo_promoter_id, capo_promoter.get("organization"), org["name"])
     
     # Update organization
-    result = db.organizations.update_one(
+    result = await db.organizations.update_one(
         {"id": org_id},
         {"$set": {"capo_promoter_id": update.capo_promoter_id, "updated_at": datetime.utcnow()}}
     )
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Organizzazione non trovata")
+    await invalidate_shared(organizations_cache, "all")
     
     return {"message": "Capo promoter assegnato con successo"}
 
@@ -1076,7 +1447,7 @@ async def get_available_capo_promoters(current_user = Depends(verify_jwt_token))
         raise HTTPException(status_code=403, detail="Non autorizzato")
     
     # Get capo promoters without organization or with organization but not yet assigned as capo
-    capo_promoters = list(db.users.find(
+    capo_promoters = await db.users.find(
         {
             "ruolo": "capo_promoter",
             "$or": [
@@ -1086,7 +1457,7 @@ async def get_available_capo_promoters(current_user = Depends(verify_jwt_token))
             ]
         },
         {"_id": 0, "password": 0}
-    ))
+    ).to_list(length=None)
     
     return capo_promoters
 
@@ -1094,20 +1465,20 @@ async def get_available_capo_promoters(current_user = Depends(verify_jwt_token))
 @app.post("/api/user/change-password")
 async def change_password(password_data: PasswordChange, current_user = Depends(verify_jwt_token)):
     """Change user password"""
-    user = db.users.find_one({"id": current_user["id"]})
+    user = await db.users.find_one({"id": current_user["id"]})
     if not user:
         raise HTTPException(status_code=404, detail="Utente non trovato")
     
     # Verify current password
-    if not verify_password(password_data.current_password, user["password"]):
+    if not await verify_password(password_data.current_password, user["password"]):
         raise HTTPException(status_code=400, detail="Password attuale non corretta")
     
     # Update password
-    result = db.users.update_one(
+    result = await db.users.update_one(
         {"id": current_user["id"]},
         {
             "$set": {
-                "password": hash_password(password_data.new_password),
+                "password": await hash_password(password_data.new_password),
                 "needs_password_change": False,
                 "updated_at": datetime.utcnow()
             }
@@ -1127,49 +1498,45 @@ async def delete_event(event_id: str, current_user = Depends(verify_jwt_token)):
         raise HTTPException(status_code=403, detail="Non autorizzato")
     
     # Check if event exists
-    event = db.events.find_one({"id": event_id})
+    event = await db.events.find_one({"id": event_id})
     if not event:
         raise HTTPException(status_code=404, detail="Evento non trovato")
     
     # Delete related bookings and chats first
-    bookings = list(db.bookings.find({"event_id": event_id}))
-    for booking in bookings:
-        db.chats.delete_many({"booking_id": booking["id"]})
-        db.chat_messages.delete_many({"chat_id": {"$in": [chat["id"] for chat in db.chats.find({"booking_id": booking["id"]})]}})
-    
-    db.bookings.delete_many({"event_id": event_id})
+    await delete_event_chats(event_id)
+    await db.bookings.delete_many({"event_id": event_id})
     
     # Delete event
-    result = db.events.delete_one({"id": event_id})
+    result = await db.events.delete_one({"id": event_id})
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Evento non trovato")
+    await invalidate_events_cache(event_id)
     
     return {"message": "Evento eliminato con successo"}
 
 @app.put("/api/events/{event_id}/poster")
-async def update_event_poster(event_id: str, poster_data: dict, current_user = Depends(verify_jwt_token)):
+async def update_event_poster(event_id: str, poster_data: dict, current_user = Depends(verify_jwt_token), caller: dict = Depends(get_caller)):
     """Update event poster - clubly_founder can add, capo_promoter can modify"""
     if current_user["ruolo"] not in ["clubly_founder", "capo_promoter"]:
         raise HTTPException(status_code=403, detail="Non autorizzato")
     
     # Check if event exists
-    event = db.events.find_one({"id": event_id})
+    event = await db.events.find_one({"id": event_id})
     if not event:
         raise HTTPException(status_code=404, detail="Evento non trovato")
     
     # If capo_promoter, check if event belongs to their organization
     if current_user["ruolo"] == "capo_promoter":
-        user = db.users.find_one({"id": current_user["id"]})
-        if event["organization"] != user.get("organization"):
+        if event["organization"] != caller.get("organization"):
             raise HTTPException(status_code=403, detail="Non autorizzato per questo evento")
     
     # Update poster
-    result = db.events.update_one(
+    result = await db.events.update_one(
         {"id": event_id},
         {
             "$set": {
-                "event_poster": poster_data.get("event_poster"),
+                **(await event_poster_fields(blob_store, poster_data.get("event_poster"), event)),
                 "updated_at": datetime.utcnow(),
                 "updated_by": current_user["id"]
             }
@@ -1178,6 +1545,7 @@ async def update_event_poster(event_id: str, poster_data: dict, current_user = D
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Evento non trovato")
+    await invalidate_events_cache(event_id)
     
     return {"message": "Locandina evento aggiornata con successo"}
 
@@ -1189,7 +1557,7 @@ async def full_update_event(event_id: str, event_update: EventUpdate, current_us
         raise HTTPException(status_code=403, detail="Non autorizzato")
     
     # Check if event exists
-    event = db.events.find_one({"id": event_id})
+    event = await db.events.find_one({"id": event_id})
     if not event:
         raise HTTPException(status_code=404, detail="Evento non trovato")
     
@@ -1202,20 +1570,39 @@ async def full_update_event(event_id: str, event_update: EventUpdate, current_us
     if not update_data:
         raise HTTPException(status_code=400, detail="Nessun campo da aggiornare")
     
+    if "event_poster" in update_data:
+        update_data.update(await event_poster_fields(blob_store, update_data.pop("event_poster"), event))
+    
     update_data["updated_at"] = datetime.utcnow()
     update_data["updated_by"] = current_user["id"]
     
-    result = db.events.update_one(
+    result = await db.events.update_one(
         {"id": event_id},
         {"$set": update_data}
     )
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Evento non trovato")
+    await invalidate_events_cache(event_id)
     
     return {"message": "Evento aggiornato con successo"}
 
 # Notifications API
+async def count_unread_messages(user_id: str, side: str, active_only: bool = False) -> int:
+    """Sum the materialized unread counters of the user's chats in one indexed aggregation"""
+    match = {f"{side}_id": user_id}
+    if active_only:
+        match["status"] = "active"
+    result = await db.chats.aggregate([
+        {"$match": match},
+        {"$group": {"_id": None, "unread": {"$sum": {"$ifNull": [f"$unread_{side}", 0]}}}}
+    ]).to_list(length=None)
+    return result[0]["unread"] if result else 0
+
+async def push_unread_count(user_id: str, side: str):
+    """Refresh the badge count shown by the app on the user's open sockets"""
+    await bus.publish({"kind": "unread", "user_id": user_id, "side": side})
+
 @app.get("/api/user/notifications")
 async def get_user_notifications(current_user = Depends(verify_jwt_token)):
     """Get user notifications count"""
@@ -1223,39 +1610,10 @@ async def get_user_notifications(current_user = Depends(verify_jwt_token)):
     notification_count = 0
     
     if user_role in ["promoter", "capo_promoter"]:
-        # Count new messages in active chats
-        chats = db.chats.find({
-            "promoter_id": current_user["id"],
-            "status": "active"
-        })
-        
-        for chat in chats:
-            # Count unread messages (simplified - count messages from last 24 hours)
-            from datetime import timedelta
-            yesterday = datetime.utcnow() - timedelta(days=1)
-            unread_count = db.chat_messages.count_documents({
-                "chat_id": chat["id"],
-                "sender_id": {"$ne": current_user["id"]},
-                "timestamp": {"$gte": yesterday}
-            })
-            notification_count += unread_count
-    
+        # Unread messages in active chats
+        notification_count = await count_unread_messages(current_user["id"], "promoter", active_only=True)
     elif user_role == "cliente":
-        # Count new messages in user's chats
-        chats = db.chats.find({
-            "client_id": current_user["id"],
-            "status": "active"
-        })
-        
-        for chat in chats:
-            from datetime import timedelta
-            yesterday = datetime.utcnow() - timedelta(days=1)
-            unread_count = db.chat_messages.count_documents({
-                "chat_id": chat["id"],
-                "sender_id": {"$ne": current_user["id"]},
-                "timestamp": {"$gte": yesterday}
-            })
-            notification_count += unread_count
+        notification_count = await count_unread_messages(current_user["id"], "client", active_only=True)
     
     return {"notification_count": min(notification_count, 99)}  # Cap at 99
 
@@ -1263,22 +1621,27 @@ async def get_user_notifications(current_user = Depends(verify_jwt_token)):
 @app.get("/api/users/{user_id}/profile")
 async def get_user_profile(user_id: str, current_user = Depends(verify_jwt_token)):
     """Get public profile of any user"""
-    user = db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
-    if not user:
-        raise HTTPException(status_code=404, detail="Utente non trovato")
+    async def load():
+        user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
+        if not user:
+            return None
+        return {
+            "id": user["id"],
+            "nome": user["nome"],
+            "cognome": user["cognome"],
+            "username": user["username"],
+            "profile_image": user.get("profile_image"),
+            "citta": user["citta"],
+            "biografia": user.get("biografia"),
+            "ruolo": user["ruolo"],
+            "organization": user.get("organization"),
+            "created_at": user["created_at"]
+        }
     
-    return {
-        "id": user["id"],
-        "nome": user["nome"],
-        "cognome": user["cognome"],
-        "username": user["username"],
-        "profile_image": user.get("profile_image"),
-        "citta": user["citta"],
-        "biografia": user.get("biografia"),
-        "ruolo": user["ruolo"],
-        "organization": user.get("organization"),
-        "created_at": user["created_at"]
-    }
+    profile = await user_profiles.get(user_id, load)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Utente non trovato")
+    return profile
 
 # User search endpoint
 @app.post("/api/users/search")
@@ -1307,10 +1670,10 @@ async def search_users(search_params: UserSearch, current_user = Depends(verify_
             date_query["$lte"] = datetime.fromisoformat(search_params.creation_date_to)
         query["created_at"] = date_query
     
-    users = list(db.users.find(query, {
+    users = await db.users.find(query, {
         "_id": 0, 
         "password": 0
-    }).sort("created_at", -1).limit(50))
+    }).sort("created_at", -1).limit(50).to_list(length=None)
     
     # Return only public info
     return [{
@@ -1337,7 +1700,7 @@ class ProfileEdit(BaseModel):
 async def edit_user_profile(profile_data: ProfileEdit, current_user = Depends(verify_jwt_token)):
     """Edit user profile - nome, username, biografia, città"""
     # Check if username is already taken by another user
-    existing_user = db.users.find_one({
+    existing_user = await db.users.find_one({
         "username": profile_data.username,
         "id": {"$ne": current_user["id"]}
     })
@@ -1353,28 +1716,29 @@ async def edit_user_profile(profile_data: ProfileEdit, current_user = Depends(ve
         "updated_at": datetime.utcnow()
     }
     
-    result = db.users.update_one(
+    result = await db.users.update_one(
         {"id": current_user["id"]},
         {"$set": update_data}
     )
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Utente non trovato")
+    await invalidate_callers(current_user["id"])
     
     # Return updated user data
-    updated_user = db.users.find_one({"id": current_user["id"]}, {"_id": 0, "password": 0})
+    updated_user = await db.users.find_one({"id": current_user["id"]}, {"_id": 0, "password": 0})
+    await invalidate_user_caches(current_user["id"], updated_user.get("organization"))
     return {"message": "Profilo aggiornato con successo", "user": updated_user}
 
 # Event creation for promoters
 @app.post("/api/events/create-by-promoter")
-async def create_event_by_promoter(event: EventCreate, current_user = Depends(verify_jwt_token)):
+async def create_event_by_promoter(event: EventCreate, current_user = Depends(verify_jwt_token), caller: dict = Depends(get_caller)):
     """Create event by promoter"""
     if current_user["ruolo"] not in ["promoter", "capo_promoter", "clubly_founder"]:
         raise HTTPException(status_code=403, detail="Non autorizzato")
     
     # Get user's organization if not specified
-    user = db.users.find_one({"id": current_user["id"]})
-    organization = event.organization or user.get("organization")
+    organization = event.organization or caller.get("organization")
     
     event_data = {
         "id": str(uuid.uuid4()),
@@ -1396,28 +1760,26 @@ async def create_event_by_promoter(event: EventCreate, current_user = Depends(ve
         "created_by": current_user["id"]
     }
     
-    db.events.insert_one(event_data)
+    await db.events.insert_one(event_data)
+    await invalidate_events_cache()
     return {"message": "Evento creato con successo", "event_id": event_data["id"]}
 
 # Organization details endpoint
 @app.get("/api/organizations/{org_id}")
 async def get_organization_details(org_id: str, current_user = Depends(verify_jwt_token)):
     """Get organization details with members"""
-    org = db.organizations.find_one({"id": org_id}, {"_id": 0})
+    org = await db.organizations.find_one({"id": org_id}, {"_id": 0})
     if not org:
         raise HTTPException(status_code=404, detail="Organizzazione non trovata")
     
     # Get organization members
-    members = list(db.users.find(
-        {"organization": org["name"]}, 
-        {"_id": 0, "password": 0}
-    ).sort("ruolo", 1))
+    members = await get_organization_members_cached(org["name"])
     
     # Get organization events
-    events = list(db.events.find(
+    events = await db.events.find(
         {"organization": org["name"]}, 
         {"_id": 0}
-    ).sort("date", 1))
+    ).sort("date", 1).to_list(length=None)
     
     return {
         **org,
@@ -1430,12 +1792,8 @@ async def get_organization_details(org_id: str, current_user = Depends(verify_jw
 async def get_organization_promoters(organization_name: str, current_user = Depends(verify_jwt_token)):
     """Get all promoters and capo_promoters for an organization (for client booking selection)"""
     # Get organization promoters
-    promoters = list(db.users.find(
-        {
-            "organization": organization_name,
-            "ruolo": {"$in": ["promoter", "capo_promoter"]}
-        }
-    ).sort("ruolo", 1))
+    members = await get_organization_members_cached(organization_name)
+    promoters = [member for member in members if member["ruolo"] in ["promoter", "capo_promoter"]]
     
     # Filter fields for response
     filtered_promoters = []
@@ -1461,7 +1819,7 @@ async def update_organization(org_id: str, org_update: OrganizationUpdate, curre
         raise HTTPException(status_code=403, detail="Non autorizzato")
     
     # Check if organization exists
-    organization = db.organizations.find_one({"id": org_id})
+    organization = await db.organizations.find_one({"id": org_id})
     if not organization:
         raise HTTPException(status_code=404, detail="Organizzazione non trovata")
     
@@ -1469,7 +1827,7 @@ async def update_organization(org_id: str, org_update: OrganizationUpdate, curre
     
     if org_update.capo_promoter_id:
         # Verify the capo promoter exists
-        capo_promoter = db.users.find_one({
+        capo_promoter = await db.users.find_one({
             "id": org_update.capo_promoter_id,
             "ruolo": "capo_promoter"
         })
@@ -1477,19 +1835,22 @@ async def update_organization(org_id: str, org_update: OrganizationUpdate, curre
             raise HTTPException(status_code=400, detail="Capo promoter non trovato")
         
         # Update capo promoter's organization
-        db.users.update_one(
+        await db.users.update_one(
             {"id": org_update.capo_promoter_id},
             {"$set": {"organization": organization["name"]}}
         )
+        await invalidate_callers(org_update.capo_promoter_id)
+        await invalidate_user_caches(org_update.capo_promoter_id, capo_promoter.get("organization"), organization["name"])
         
         update_data["capo_promoter_id"] = org_update.capo_promoter_id
     
     if update_data:
         update_data["updated_at"] = datetime.utcnow()
-        db.organizations.update_one(
+        await db.organizations.update_one(
             {"id": org_id},
             {"$set": update_data}
         )
+        await invalidate_shared(organizations_cache, "all")
     
     return {"message": "Organizzazione aggiornata con successo"}
 
@@ -1500,39 +1861,35 @@ async def delete_event(event_id: str, current_user = Depends(verify_jwt_token)):
         raise HTTPException(status_code=403, detail="Non autorizzato")
     
     # Check if event exists
-    event = db.events.find_one({"id": event_id})
+    event = await db.events.find_one({"id": event_id})
     if not event:
         raise HTTPException(status_code=404, detail="Evento non trovato")
     
-    # Delete related bookings and chats
-    bookings = list(db.bookings.find({"event_id": event_id}))
-    for booking in bookings:
-        # Delete chat messages
-        db.chat_messages.delete_many({"chat_id": {"$in": [chat["id"] for chat in db.chats.find({"booking_id": booking["id"]})]}})
-        # Delete chats
-        db.chats.delete_many({"booking_id": booking["id"]})
+    # Delete related chats, leaving tombstones for delta sync
+    await delete_event_chats(event_id)
     
     # Delete bookings
-    db.bookings.delete_many({"event_id": event_id})
+    await db.bookings.delete_many({"event_id": event_id})
     
     # Delete event
-    db.events.delete_one({"id": event_id})
+    await db.events.delete_one({"id": event_id})
+    await invalidate_events_cache(event_id)
     
     return {"message": "Evento eliminato con successo"}
 
 @app.post("/api/auth/change-password")
 async def change_password(password_change: PasswordChange, current_user = Depends(verify_jwt_token)):
     """Change password (for first time login)"""
-    user = db.users.find_one({"id": current_user["id"]})
+    user = await db.users.find_one({"id": current_user["id"]})
     if not user:
         raise HTTPException(status_code=404, detail="Utente non trovato")
     
     # Verify current password
-    if not verify_password(password_change.current_password, user["password"]):
+    if not await verify_password(password_change.current_password, user["password"]):
         raise HTTPException(status_code=400, detail="Password attuale non corretta")
     
     # Update password
-    new_hashed_password = hash_password(password_change.new_password)
+    new_hashed_password = await hash_password(password_change.new_password)
     
     update_data = {
         "password": new_hashed_password,
@@ -1540,7 +1897,7 @@ async def change_password(password_change: PasswordChange, current_user = Depend
         "updated_at": datetime.utcnow()
     }
     
-    db.users.update_one(
+    await db.users.update_one(
         {"id": current_user["id"]},
         {"$set": update_data}
     )
@@ -1554,44 +1911,26 @@ async def get_available_capo_promoters(current_user = Depends(verify_jwt_token))
         raise HTTPException(status_code=403, detail="Non autorizzato")
     
     # Get capo promoters without organization or with organization not set
-    capo_promoters = list(db.users.find({
+    capo_promoters = await db.users.find({
         "ruolo": "capo_promoter",
         "$or": [
             {"organization": {"$exists": False}},
             {"organization": ""},
             {"organization": None}
         ]
-    }, {"_id": 0, "password": 0}))
+    }, {"_id": 0, "password": 0}).to_list(length=None)
     
     return capo_promoters
 
 @app.get("/api/user/notifications/count")
 async def get_notifications_count(current_user = Depends(verify_jwt_token)):
     """Get count of unread notifications for user"""
-    # Count unread messages in user's chats
-    unread_count = 0
-    
     if current_user["ruolo"] in ["promoter", "capo_promoter"]:
         # Count messages from clients
-        user_chats = list(db.chats.find({"promoter_id": current_user["id"]}))
-        for chat in user_chats:
-            # Count messages not from this user that are newer than last seen
-            unread_messages = db.chat_messages.count_documents({
-                "chat_id": chat["id"],
-                "sender_id": {"$ne": current_user["id"]},
-                "timestamp": {"$gt": chat.get("last_seen_promoter", datetime.utcnow() - timedelta(days=30))}
-            })
-            unread_count += unread_messages
+        unread_count = await count_unread_messages(current_user["id"], "promoter")
     else:
         # Count messages from promoters
-        user_chats = list(db.chats.find({"client_id": current_user["id"]}))
-        for chat in user_chats:
-            unread_messages = db.chat_messages.count_documents({
-                "chat_id": chat["id"],
-                "sender_id": {"$ne": current_user["id"]},
-                "timestamp": {"$gt": chat.get("last_seen_client", datetime.utcnow() - timedelta(days=30))}
-            })
-            unread_count += unread_messages
+        unread_count = await count_unread_messages(current_user["id"], "client")
     
     return {"unread_count": unread_count}
 
@@ -0,0 +1,235 @@
+"""Two-tier stale-while-revalidate cache shared by every worker.
+
+Reads go through a small per-process LRU (L1) in front of a shared tier
+(L2) that all uvicorn workers see:
+
+- MemoryCacheBackend: local stand-in, one dict per process; used for a
+  single worker and in tests
+- RedisCacheBackend: selected when CACHE_REDIS_URL is set
+
+Entries are fresh for `fresh_ttl` seconds and may then be served stale for
+another `stale_ttl` seconds while one background refresh per key reloads
+them, so a hot document never makes a burst of requests wait on MongoDB.
+Concurrent misses share one load through a single-flight group.
+
+Writers invalidate explicitly: `invalidate` drops the keys from this
+worker's L1 and from L2, and the fan-out bus tells the other workers to
+`forget` them from their L1. A load that started before an invalidation on
+the same worker is not stored; one racing it on another worker can at most
+be served until its entry stops being fresh.
+
+Values are stored JSON-encoded (datetimes become ISO strings, as in the
+HTTP response) and are shared between requests: treat them as read-only.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from cache import TTLCache
+from singleflight import single_flight
+
+logger = logging.getLogger(__name__)
+
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'clubly:cache')
+CACHE_L1_SIZE = int(os.environ.get('CACHE_L1_SIZE', '1024'))
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+class CacheBackend:
+    """Base class for the shared tier: raw string values with an expiry"""
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl: float):
+        raise NotImplementedError
+
+    async def delete(self, *keys: str):
+        raise NotImplementedError
+
+    async def clear(self, prefix: str):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Local stand-in: shared by the caches of this process only"""
+
+    def __init__(self):
+        self._entries: Dict[str, tuple] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            self._entries.pop(key, None)
+            return None
+        return entry[1]
+
+    async def set(self, key: str, value: str, ttl: float):
+        self._entries[key] = (time.time() + ttl, value)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def clear(self, prefix: str):
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis backend shared by every worker"""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: str, ttl: float):
+        await self._redis.set(key, value, px=max(int(ttl * 1000), 1))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._redis.delete(*keys)
+
+    async def clear(self, prefix: str):
+        keys = [key async for key in self._redis.scan_iter(match=f"{prefix}*")]
+        if keys:
+            await self._redis.delete(*keys)
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+def create_backend(redis_url: Optional[str] = CACHE_REDIS_URL) -> CacheBackend:
+    if redis_url:
+        return RedisCacheBackend(redis_url)
+    return MemoryCacheBackend()
+
+
+class SharedCache:
+    def __init__(self, name: str, backend: CacheBackend, fresh_ttl: float, stale_ttl: float,
+                 l1_size: int = CACHE_L1_SIZE):
+        self.name = name
+        self.backend = backend
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.local = TTLCache(maxsize=l1_size, ttl=fresh_ttl + stale_ttl)
+        # Named after the cache, so SINGLE_FLIGHT_ROUTES configures both
+        self._flight = single_flight(name)
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def _backend_key(self, key: Hashable) -> str:
+        return f"{CACHE_KEY_PREFIX}:{self.name}:{key}"
+
+    async def get(self, key: Hashable, load: Loader) -> Any:
+        """Cached value for `key`, loading it with `load()` when absent
+
+        A None result is returned but not cached.
+        """
+        now = time.time()
+        generation = self.local.generation
+        entry = self.local.get(key)
+        if entry is not None and entry["stale_until"] > now:
+            self.l1_hits += 1
+        else:
+            entry = await self._read_shared(key)
+            if entry is not None and entry["stale_until"] > now:
+                self.l2_hits += 1
+                self.local.set(key, entry, generation=generation)
+            else:
+                self.misses += 1
+                return await self._flight.do(key, lambda: self._load(key, load, generation))
+
+        if entry["fresh_until"] <= now:
+            self.stale_hits += 1
+            self._refresh_in_background(key, load, generation)
+        return entry["value"]
+
+    async def _read_shared(self, key: Hashable) -> Optional[dict]:
+        try:
+            raw = await self.backend.get(self._backend_key(key))
+        except Exception:
+            logger.warning("Shared cache %s unavailable, reading through", self.name, exc_info=True)
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    async def _load(self, key: Hashable, load: Loader, generation: int) -> Any:
+        value = jsonable_encoder(await load())
+        if value is None or generation != self.local.generation:
+            return value
+
+        now = time.time()
+        entry = {"value": value, "fresh_until": now + self.fresh_ttl, "stale_until": now + self.fresh_ttl + self.stale_ttl}
+        self.local.set(key, entry, generation=generation)
+        try:
+            await self.backend.set(self._backend_key(key), json.dumps(entry), self.fresh_ttl + self.stale_ttl)
+        except Exception:
+            logger.warning("Shared cache %s unavailable, not storing %r", self.name, key, exc_info=True)
+        return value
+
+    def _refresh_in_background(self, key: Hashable, load: Loader, generation: int):
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                await self._flight.do(key, lambda: self._load(key, load, generation))
+            except Exception:
+                logger.exception("Refreshing %s %r failed, serving the stale value", self.name, key)
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.ensure_future(refresh())
+
+    async def invalidate(self, keys: Iterable[Hashable]):
+        """Drop keys from this worker and the shared tier; other workers must `forget` them"""
+        keys = list(keys)
+        self.forget(keys)
+        try:
+            await self.backend.delete(*(self._backend_key(key) for key in keys))
+        except Exception:
+            logger.warning("Shared cache %s unavailable, %r not invalidated", self.name, keys, exc_info=True)
+
+    def forget(self, keys: Iterable[Hashable]):
+        for key in keys:
+            self.local.invalidate(key)
+
+    async def clear(self):
+        self.local.clear()
+        await self.backend.clear(f"{CACHE_KEY_PREFIX}:{self.name}:")
+
+    def stats(self) -> dict:
+        return {
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "l1_entries": len(self.local),
+        }
+
+
+backend = create_backend()
+caches: Dict[str, SharedCache] = {}
+
+
+def shared_cache(name: str, fresh_ttl: float, stale_ttl: float) -> SharedCache:
+    """Register the cache `name` on the process-wide backend"""
+    caches[name] = SharedCache(name, backend, fresh_ttl, stale_ttl)
+    return caches[name]
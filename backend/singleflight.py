@@ -0,0 +1,83 @@
+"""Single-flight coalescing of identical concurrent reads.
+
+When a popular event goes live thousands of clients ask for the same
+document at the same instant. A SingleFlight group lets the first request
+for a key (the leader) run the query while every request for the same key
+arriving before it completes (the followers) awaits that one result
+instead of issuing its own. Results are shared, so callers must treat them
+as read-only.
+
+Coalescing is per worker and only spans the duration of one query; it
+complements rather than replaces caching. Groups are enabled per route with
+SINGLE_FLIGHT_ROUTES (comma-separated group names, `*` for all, empty to
+disable), and their leader/follower counters are exported as Prometheus
+metrics so the collapse ratio can be watched.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+SINGLE_FLIGHT_ROUTES = os.environ.get('SINGLE_FLIGHT_ROUTES', '*')
+
+
+def route_enabled(name: str, routes: str = SINGLE_FLIGHT_ROUTES) -> bool:
+    enabled = {route.strip() for route in routes.split(",") if route.strip()}
+    return "*" in enabled or name in enabled
+
+
+class SingleFlight:
+    def __init__(self, name: str, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of `load()`, shared with concurrent callers using the same key"""
+        if not self.enabled:
+            self.leaders += 1
+            return await load()
+
+        call = self._calls.get(key)
+        if call is None:
+            self.leaders += 1
+            # A task of its own, so a leader whose client disconnects does
+            # not cancel the query its followers are waiting for
+            call = asyncio.ensure_future(load())
+            self._calls[key] = call
+            call.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.followers += 1
+        return await asyncio.shield(call)
+
+    def _forget(self, key: Hashable, call: asyncio.Future):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.cancelled() and call.exception() is not None:
+            # Retrieved here so an error nobody waits for any more is not
+            # reported as "never retrieved"; waiting callers still get it
+            logger.debug("Single-flight %s load for %r failed: %r", self.name, key, call.exception())
+
+    def stats(self) -> dict:
+        total = self.leaders + self.followers
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "collapse_ratio": self.followers / total if total else 0.0,
+        }
+
+
+groups: Dict[str, SingleFlight] = {}
+
+
+def single_flight(name: str) -> SingleFlight:
+    """The group for `name`, created on first use and enabled per SINGLE_FLIGHT_ROUTES"""
+    if name not in groups:
+        groups[name] = SingleFlight(name, enabled=route_enabled(name))
+    return groups[name]
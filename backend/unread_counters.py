@@ -0,0 +1,71 @@
+"""Backfill of the per-participant unread counters on chats.
+
+Chats carry unread_client and unread_promoter, bumped by send_message and
+reset by POST /api/chats/{chat_id}/read. Chats created before the counters
+existed have neither field and would count as read; this computes them from
+chat_messages with the rule the notification count applied before: messages
+from the other participant newer than the participant's last_seen_<side>,
+or from the last UNREAD_BACKFILL_DAYS days if the chat was never opened.
+
+Only chats missing a counter are touched, and a counter that appeared
+meanwhile (a message sent during the backfill) is left alone. A completed
+run is recorded in the `migrations` collection, after which the command
+returns at once without scanning chats; an interrupted run simply starts
+over. The entrypoint.sh maintenance job runs it after the index build, so
+the per-chat counts are served by the chat_messages indexes:
+
+    python unread_counters.py
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+UNREAD_BACKFILL_DAYS = int(os.environ.get('UNREAD_BACKFILL_DAYS', '30'))
+
+SIDES = {"client": "client_id", "promoter": "promoter_id"}
+MIGRATION_ID = "unread_counters"
+
+
+async def backfill_unread_counters(database) -> int:
+    """Compute the missing unread counters from the messages; returns the chats updated"""
+    if await database.migrations.find_one({"_id": MIGRATION_ID}):
+        return 0
+    default_since = datetime.utcnow() - timedelta(days=UNREAD_BACKFILL_DAYS)
+    missing = {"$or": [{f"unread_{side}": {"$exists": False}} for side in SIDES]}
+    projection = {"_id": 0, "id": 1, **{field: 1 for field in SIDES.values()}}
+    for side in SIDES:
+        projection[f"unread_{side}"] = 1
+        projection[f"last_seen_{side}"] = 1
+
+    updated = 0
+    async for chat in database.chats.find(missing, projection):
+        for side, participant in SIDES.items():
+            if f"unread_{side}" in chat:
+                continue
+            unread = await database.chat_messages.count_documents({
+                "chat_id": chat["id"],
+                "sender_id": {"$ne": chat.get(participant)},
+                "timestamp": {"$gt": chat.get(f"last_seen_{side}") or default_since}
+            })
+            await database.chats.update_one(
+                {"id": chat["id"], f"unread_{side}": {"$exists": False}},
+                {"$set": {f"unread_{side}": unread}}
+            )
+        updated += 1
+
+    await database.migrations.update_one(
+        {"_id": MIGRATION_ID},
+        {"$set": {"completed_at": datetime.utcnow(), "chats": updated}},
+        upsert=True
+    )
+    return updated
+
+
+if __name__ == "__main__":
+    from database import close_client, db
+
+    async def _main():
+        print(f"Backfilled unread counters on {await backfill_unread_counters(db)} chats")
+        close_client()
+
+    asyncio.run(_main())
@@ -0,0 +1,216 @@
+"""Virtual waiting room in front of POST /api/bookings.
+
+Every event has a token bucket refilled at WAITING_ROOM_RATE admissions per
+second, holding at most WAITING_ROOM_BURST. While the bucket has credit and
+nobody is queued, bookings go straight through. Once it runs dry, bookings
+without an admission are refused with 429, and clients join the event's
+queue instead. They get a ticket token and a position, and poll until the
+ticket is admitted. Then they book with the token within
+WAITING_ROOM_ADMISSION_TTL seconds. Each admission allows one booking.
+
+Everything lives in this worker's memory and advances lazily whenever the
+room is touched: polling costs a dict lookup and never reaches MongoDB, and
+the booking path sees at most `rate` writes per second per event however
+large the crowd. Queued tickets that stop polling for
+WAITING_ROOM_IDLE_TIMEOUT seconds give up their place.
+
+With several uvicorn workers each one runs its own rooms, so the admitted
+rate is multiplied by the number of workers and a ticket is only known to
+the worker that issued it; route queue traffic with sticky sessions.
+"""
+import logging
+import math
+import os
+import time
+import uuid
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+WAITING_ROOM_RATE = float(os.environ.get('WAITING_ROOM_RATE', '10'))
+WAITING_ROOM_BURST = int(os.environ.get('WAITING_ROOM_BURST', '20'))
+WAITING_ROOM_ADMISSION_TTL = float(os.environ.get('WAITING_ROOM_ADMISSION_TTL', '120'))
+WAITING_ROOM_IDLE_TIMEOUT = float(os.environ.get('WAITING_ROOM_IDLE_TIMEOUT', '30'))
+# Suggested polling interval for queued clients, in seconds
+WAITING_ROOM_POLL_SECONDS = 2
+
+
+class Ticket:
+    __slots__ = ("token", "user_id", "seq", "last_seen", "admitted_until")
+
+    def __init__(self, user_id: str, seq: int, now: float):
+        self.token = uuid.uuid4().hex
+        self.user_id = user_id
+        self.seq = seq
+        self.last_seen = now
+        self.admitted_until: Optional[float] = None
+
+
+class EventQueue:
+    """Token bucket and FIFO queue of one event"""
+
+    def __init__(self, rate: float, burst: int, admission_ttl: float, idle_timeout: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.admission_ttl = admission_ttl
+        self.idle_timeout = idle_timeout
+        self.credits = float(burst)
+        self.updated = now
+        self.next_seq = 0
+        self.waiting: Deque[Ticket] = deque()
+        self.admitted: Deque[Ticket] = deque()
+        self.tickets: Dict[str, Ticket] = {}
+        self.by_user: Dict[str, Ticket] = {}
+
+    def advance(self, now: float):
+        """Refill the bucket and admit queued tickets it has credit for"""
+        self.credits = min(self.burst, self.credits + (now - self.updated) * self.rate)
+        self.updated = now
+        while self.waiting and self.credits >= 1:
+            ticket = self.waiting.popleft()
+            if now - ticket.last_seen > self.idle_timeout:
+                self._drop(ticket)
+                continue
+            ticket.admitted_until = now + self.admission_ttl
+            self.admitted.append(ticket)
+            self.credits -= 1
+        # Admissions expire in the order they were granted
+        while self.admitted and self.admitted[0].admitted_until <= now:
+            self._drop(self.admitted.popleft())
+
+    def _drop(self, ticket: Ticket):
+        self.tickets.pop(ticket.token, None)
+        if self.by_user.get(ticket.user_id) is ticket:
+            del self.by_user[ticket.user_id]
+
+    def join(self, user_id: str, now: float) -> Ticket:
+        ticket = self.by_user.get(user_id)
+        if ticket is None:
+            ticket = Ticket(user_id, self.next_seq, now)
+            self.next_seq += 1
+            self.tickets[ticket.token] = ticket
+            self.by_user[user_id] = ticket
+            self.waiting.append(ticket)
+            self.advance(now)
+        ticket.last_seen = now
+        return ticket
+
+    def position(self, ticket: Ticket) -> int:
+        """1-based place in the queue, 0 once admitted"""
+        if ticket.admitted_until is not None:
+            return 0
+        return ticket.seq - self.waiting[0].seq + 1
+
+    def take_credit(self) -> bool:
+        if self.waiting or self.credits < 1:
+            return False
+        self.credits -= 1
+        return True
+
+    def consume(self, token: str, user_id: str, now: float) -> bool:
+        ticket = self.tickets.get(token)
+        if ticket is None or ticket.user_id != user_id or ticket.admitted_until is None or ticket.admitted_until <= now:
+            return False
+        self._drop(ticket)
+        return True
+
+    def idle(self) -> bool:
+        return not self.tickets and self.credits >= self.burst
+
+
+class WaitingRoom:
+    def __init__(self, rate: float = WAITING_ROOM_RATE, burst: int = WAITING_ROOM_BURST,
+                 admission_ttl: float = WAITING_ROOM_ADMISSION_TTL,
+                 idle_timeout: float = WAITING_ROOM_IDLE_TIMEOUT,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.admission_ttl = admission_ttl
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self.rooms: Dict[str, EventQueue] = {}
+        self.admitted_directly = 0
+        self.admitted_from_queue = 0
+        self.turned_away = 0
+        self._swept = clock()
+
+    def _room(self, event_id: str, now: float) -> EventQueue:
+        self._sweep(now)
+        room = self.rooms.get(event_id)
+        if room is None:
+            room = self.rooms[event_id] = EventQueue(self.rate, self.burst, self.admission_ttl, self.idle_timeout, now)
+        room.advance(now)
+        return room
+
+    def _sweep(self, now: float):
+        """Forget rooms with nobody queued and a full bucket, at most once a second"""
+        if now - self._swept < 1:
+            return
+        self._swept = now
+        for event_id, room in list(self.rooms.items()):
+            room.advance(now)
+            if room.idle():
+                del self.rooms[event_id]
+
+    def enter(self, event_id: str, user_id: str, token: Optional[str] = None) -> bool:
+        """Whether a booking may proceed now, using up its admission"""
+        now = self.clock()
+        room = self._room(event_id, now)
+        if token and room.consume(token, user_id, now):
+            self.admitted_from_queue += 1
+            return True
+        if room.take_credit():
+            self.admitted_directly += 1
+            return True
+        self.turned_away += 1
+        return False
+
+    def join(self, event_id: str, user_id: str) -> dict:
+        """Queue the user for the event (idempotent) and return their ticket status"""
+        now = self.clock()
+        room = self._room(event_id, now)
+        return self._status(room, room.join(user_id, now))
+
+    def status(self, event_id: str, token: str) -> Optional[dict]:
+        """Ticket status for polling; None if the ticket is unknown or expired"""
+        room = self.rooms.get(event_id)
+        if room is None:
+            return None
+        now = self.clock()
+        ticket = room.tickets.get(token)
+        if ticket is None:
+            return None
+        # Polling keeps the place, so touch the ticket before the queue moves
+        ticket.last_seen = now
+        room.advance(now)
+        if token not in room.tickets:
+            return None
+        return self._status(room, ticket)
+
+    def _status(self, room: EventQueue, ticket: Ticket) -> dict:
+        position = room.position(ticket)
+        if position == 0:
+            return {"token": ticket.token, "admitted": True, "position": 0, "retry_after": 0,
+                    "expires_in": math.floor(ticket.admitted_until - room.updated)}
+        return {
+            "token": ticket.token,
+            "admitted": False,
+            "position": position,
+            "retry_after": WAITING_ROOM_POLL_SECONDS,
+            "estimated_wait": math.ceil(position / room.rate) if room.rate > 0 else None,
+        }
+
+    def clear(self):
+        self.rooms.clear()
+
+    def stats(self) -> dict:
+        return {
+            "queued": {event_id: len(room.waiting) for event_id, room in self.rooms.items()},
+            "admitted_directly": self.admitted_directly,
+            "admitted_from_queue": self.admitted_from_queue,
+            "turned_away": self.turned_away,
+        }
+
+
+waiting_room = WaitingRoom()
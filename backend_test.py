@@ -991,7 +991,7 @@ def test_chat_management():
             response = requests.get(f"{BACKEND_URL}/chats/{chat_id}/messages", headers=headers)
             
             if response.status_code == 200:
-                messages = response.json()
+                messages = response.json()["messages"]
                 print(f"✅ Get chat messages successful. Messages count: {len(messages)}")
                 get_messages_success = True
                 
@@ -481,7 +481,7 @@ def test_chat_get_messages():
     response = requests.get(f"{BACKEND_URL}/chats/{chat_id}/messages", headers=client_headers)
     
     if response.status_code == 200:
-        messages = response.json()
+        messages = response.json()["messages"]
         print(f"✅ Get chat messages successful")
         print(f"   Messages count: {len(messages)}")
         
@@ -528,7 +528,7 @@ def test_chat_send_message():
         response = requests.get(f"{BACKEND_URL}/chats/{chat_id}/messages", headers=client_headers)
         
         if response.status_code == 200:
-            messages = response.json()
+            messages = response.json()["messages"]
             
             # Check if our message is in the list
             message_found = any(message["message"] == message_text for message in messages)
@@ -449,7 +449,7 @@ def test_chat_regression():
             response = requests.get(f"{BACKEND_URL}/chats/{chat_id}/messages", headers=headers)
             
             if response.status_code == 200:
-                messages = response.json()
+                messages = response.json()["messages"]
                 print(f"✅ Get chat messages successful. Messages count: {len(messages)}")
                 get_messages_success = True
             else:
@@ -517,7 +517,7 @@ def test_chat_send_message():
         response = requests.get(f"{BACKEND_URL}/chats/{chat_id}/messages", headers=headers)
         
         if response.status_code == 200:
-            messages = response.json()
+            messages = response.json()["messages"]
             
             # Check if the last message contains our test message
             if messages and any(message_payload["message"] in msg.get("message", "") for msg in messages):
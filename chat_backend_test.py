@@ -249,7 +249,7 @@ def test_get_chat_messages():
             response = requests.get(f"{BACKEND_URL}/chats/{chat_id}/messages", headers=headers)
             
             if response.status_code == 200:
-                messages = response.json()
+                messages = response.json()["messages"]
                 print(f"✅ Get chat messages successful for {role} with chat ID {chat_id}. Messages count: {len(messages)}")
                 
                 # Print details of the first message if available
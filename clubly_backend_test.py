@@ -1223,7 +1223,7 @@ def test_chat_system():
     response = requests.get(f"{BACKEND_URL}/chats/{chat_id}/messages", headers=client_headers)
     
     if response.status_code == 200:
-        messages = response.json()
+        messages = response.json()["messages"]
         print(f"✅ Get chat messages successful. Messages count: {len(messages)}")
         get_messages_success = True
     else:
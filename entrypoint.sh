@@ -4,18 +4,50 @@ set -e
 # Start the FastAPI backend
 cd /backend || { echo "Backend directory not found"; exit 1; }
 
+# Database maintenance runs as one background job next to the API, so
+# serving never waits for it. Every step is idempotent. The index build goes
+# first: a failure there (e.g. duplicates blocking a unique index) is reported
+# by the readiness probe as degraded and does not stop the other steps
+maintenance() {
+    echo "Building indexes"
+    python3 indexes.py || echo "Index build failed"
+    # Demo data for a fresh database
+    if [ "${CLUBLY_SEED_DEFAULT_DATA:-true}" = "true" ]; then
+        echo "Seeding default data"
+        python3 seed.py || echo "Seeding failed"
+    fi
+    # Give chats created before the unread counters their counts; a no-op
+    # once it has completed
+    echo "Backfilling unread counters"
+    python3 unread_counters.py || echo "Unread counter backfill failed"
+    echo "Database maintenance done"
+}
+maintenance &
+
 echo "Starting FastAPI backend"
 # Start Uvicorn with proper host binding
 uvicorn server:app --host 0.0.0.0 --port 8001 &
 BACKEND_PID=$!
 
-echo "Waiting for backend to start..."
-sleep 30
-
-if ! kill -0 $BACKEND_PID 2>/dev/null; then
-    echo "Backend failed to start at initialization, exiting"
-    exit 1
-fi
+# Poll the readiness probe instead of sleeping a fixed time: nginx starts
+# routing as soon as warm-up is done and MongoDB is reachable
+echo "Waiting for backend to become ready..."
+READY_TIMEOUT=${BACKEND_READY_TIMEOUT:-120}
+WAITED=0
+until wget -q -O /dev/null http://127.0.0.1:8001/api/health/ready 2>/dev/null; do
+    if ! kill -0 $BACKEND_PID 2>/dev/null; then
+        echo "Backend failed to start at initialization, exiting"
+        exit 1
+    fi
+    if [ $WAITED -ge $((READY_TIMEOUT * 5)) ]; then
+        echo "Backend not ready after ${READY_TIMEOUT}s, exiting"
+        kill $BACKEND_PID
+        exit 1
+    fi
+    sleep 0.2
+    WAITED=$((WAITED + 1))
+done
+echo "Backend ready"
 
 # Start Nginx
 nginx -g 'daemon off;' &
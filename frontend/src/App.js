@@ -29,6 +29,7 @@ function App() {
   const [chats, setChats] = useState([]);
   const [selectedChat, setSelectedChat] = useState(null);
   const [chatMessages, setChatMessages] = useState([]);
+  const [olderMessagesCursor, setOlderMessagesCursor] = useState(null);
   const [newMessage, setNewMessage] = useState('');
   const [currentView, setCurrentView] = useState('main'); // main, promoter, capo-promoter, clubly-founder
   const [showUserSetup, setShowUserSetup] = useState(false);
@@ -76,6 +77,48 @@ function App() {
     }
   }, [currentUser]);
 
+  // Keep the open chat in a ref so the socket handler sees the latest selection
+  const selectedChatRef = useRef(null);
+  useEffect(() => {
+    selectedChatRef.current = selectedChat;
+  }, [selectedChat]);
+
+  // Real-time push channel: new chat messages and notifications badge
+  useEffect(() => {
+    if (!currentUser) return;
+    let socket = null;
+    let reconnectTimer = null;
+    let stopped = false;
+
+    const connect = () => {
+      const token = localStorage.getItem('token');
+      socket = new WebSocket(`${backendUrl.replace(/^http/, 'ws')}/api/ws?token=${token}`);
+      socket.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+        if (data.type === 'unread') {
+          setNotificationsCount(data.notification_count);
+        } else if (data.type === 'message' && selectedChatRef.current?.id === data.chat_id) {
+          setChatMessages(prev => prev.some(m => m.id === data.message.id) ? prev : [...prev, data.message]);
+          if (data.message.sender_id !== currentUser.id) {
+            markChatAsRead(data.chat_id);
+          }
+        }
+      };
+      socket.onclose = () => {
+        if (!stopped) {
+          reconnectTimer = setTimeout(connect, 3000);
+        }
+      };
+    };
+
+    connect();
+    return () => {
+      stopped = true;
+      clearTimeout(reconnectTimer);
+      if (socket) socket.close();
+    };
+  }, [currentUser]);
+
   useEffect(() => {
     if (currentUser && currentView !== 'main') {
       fetchDashboardData();
@@ -128,24 +171,25 @@ function App() {
     }
   };
 
+  const dashboardEndpoint = () => {
+    switch (currentView) {
+      case 'promoter':
+        return '/api/dashboard/promoter';
+      case 'capo-promoter':
+        return '/api/dashboard/capo-promoter';
+      case 'clubly-founder':
+        return '/api/dashboard/clubly-founder';
+      default:
+        return null;
+    }
+  };
+
   const fetchDashboardData = async () => {
     if (!currentUser || currentView === 'main') return;
     
     try {
-      let endpoint;
-      switch (currentView) {
-        case 'promoter':
-          endpoint = '/api/dashboard/promoter';
-          break;
-        case 'capo-promoter':
-          endpoint = '/api/dashboard/capo-promoter';
-          break;
-        case 'clubly-founder':
-          endpoint = '/api/dashboard/clubly-founder';
-          break;
-        default:
-          return;
-      }
+      const endpoint = dashboardEndpoint();
+      if (!endpoint) return;
       
       const response = await fetch(`${backendUrl}${endpoint}`, {
         headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` }
@@ -162,6 +206,45 @@ function App() {
     }
   };
 
+  // The promoter dashboards return one page per section (events, members, chats)
+  const hasMoreDashboard = (section) => {
+    const page = dashboardData?.pagination?.[section];
+    return Boolean(page) && (dashboardData[section]?.length || 0) < page.total;
+  };
+
+  const loadMoreDashboard = async (section) => {
+    const endpoint = dashboardEndpoint();
+    if (!endpoint || !hasMoreDashboard(section)) return;
+    try {
+      const offset = dashboardData[section].length;
+      const response = await fetch(`${backendUrl}${endpoint}?${section}_offset=${offset}`, {
+        headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` }
+      });
+      if (response.ok) {
+        const data = await response.json();
+        setDashboardData(prev => {
+          const known = new Set(prev[section].map(item => item.id));
+          return {
+            ...prev,
+            [section]: [...prev[section], ...data[section].filter(item => !known.has(item.id))],
+            pagination: { ...prev.pagination, [section]: data.pagination[section] }
+          };
+        });
+      }
+    } catch (error) {
+      console.error('Error fetching dashboard data:', error);
+    }
+  };
+
+  const renderLoadMoreDashboard = (section) => hasMoreDashboard(section) && (
+    <button
+      onClick={() => loadMoreDashboard(section)}
+      className="w-full text-sm text-gray-400 hover:text-white py-1"
+    >
+      Carica altri ({dashboardData[section].length}/{dashboardData.pagination[section].total})
+    </button>
+  );
+
   const checkAuthStatus = async () => {
     const token = localStorage.getItem('token');
     if (token) {
@@ -327,10 +410,22 @@ function App() {
     }
   };
 
+  // Waiting room: join the event queue and poll (from memory, cheap) until admitted
+  const waitForAdmission = async (eventId) => {
+    const headers = { 'Authorization': `Bearer ${localStorage.getItem('token')}` };
+    let ticket = await (await fetch(`${backendUrl}/api/events/${eventId}/queue`, { method: 'POST', headers })).json();
+    while (ticket && !ticket.admitted) {
+      await new Promise(resolve => setTimeout(resolve, (ticket.retry_after || 2) * 1000));
+      const poll = await fetch(`${backendUrl}/api/events/${eventId}/queue/${ticket.token}`);
+      ticket = poll.ok ? await poll.json() : null;
+    }
+    return ticket ? ticket.token : null;
+  };
+
   // Updated booking submission - NO PROMOTER SELECTION
   const handleBookingSubmit = async () => {
     try {
-      const response = await fetch(`${backendUrl}/api/bookings`, {
+      const submitBooking = (queueToken) => fetch(`${backendUrl}/api/bookings`, {
         method: 'POST',
         headers: { 
           'Content-Type': 'application/json',
@@ -339,11 +434,21 @@ function App() {
         body: JSON.stringify({
           event_id: selectedEvent.id,
           booking_type: bookingType,
-          party_size: partySize
+          party_size: partySize,
+          queue_token: queueToken
           // No selected_promoter_id - auto assignment
         })
       });
       
+      let response = await submitBooking(null);
+      if (response.status === 429) {
+        // High demand: wait our turn in the event's waiting room, then retry once
+        const queueToken = await waitForAdmission(selectedEvent.id);
+        if (queueToken) {
+          response = await submitBooking(queueToken);
+        }
+      }
+      
       if (response.ok) {
         const result = await response.json();
         alert(`Prenotazione inviata! Chat con ${result.promoter_name} avviata automaticamente.`);
@@ -381,13 +486,45 @@ function App() {
       });
       if (response.ok) {
         const data = await response.json();
-        setChatMessages(data);
+        setChatMessages(data.messages);
+        setOlderMessagesCursor(data.has_more ? data.before : null);
+        markChatAsRead(chatId);
       }
     } catch (error) {
       console.error('Errore nel caricamento messaggi:', error);
     }
   };
 
+  const loadOlderMessages = async () => {
+    if (!selectedChat || !olderMessagesCursor) return;
+    try {
+      const response = await fetch(`${backendUrl}/api/chats/${selectedChat.id}/messages?before=${olderMessagesCursor}`, {
+        headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` }
+      });
+      if (response.ok) {
+        const data = await response.json();
+        setChatMessages(prev => [...data.messages, ...prev]);
+        setOlderMessagesCursor(data.has_more ? data.before : null);
+      }
+    } catch (error) {
+      console.error('Errore nel caricamento messaggi:', error);
+    }
+  };
+
+  const markChatAsRead = async (chatId) => {
+    try {
+      const response = await fetch(`${backendUrl}/api/chats/${chatId}/read`, {
+        method: 'POST',
+        headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` }
+      });
+      if (response.ok) {
+        fetchNotifications(); // Update notifications
+      }
+    } catch (error) {
+      console.error('Errore nel segnare la chat come letta:', error);
+    }
+  };
+
   const sendMessage = useCallback(async () => {
     if (!newMessage.trim() || !selectedChat) return;
     
@@ -812,6 +949,7 @@ function App() {
                   <p className="text-gray-300 text-sm">📍 {event.location}</p>
                 </div>
               ))}
+              {renderLoadMoreDashboard('events')}
             </div>
             {/* Removed "Crea Evento" button - only Clubly Founder can create events */}
             <div className="mt-4">
@@ -848,6 +986,7 @@ function App() {
                   </div>
                 </div>
               ))}
+              {renderLoadMoreDashboard('members')}
             </div>
           </div>
 
@@ -855,7 +994,7 @@ function App() {
           <div className="bg-gray-900 border border-green-600 rounded-lg p-6">
             <h3 className="text-xl font-bold text-white mb-4">💬 Chat Attive</h3>
             <div className="space-y-3 max-h-64 overflow-y-auto">
-              {dashboardData.chats?.slice(0, 5).map(chat => (
+              {dashboardData.chats?.map(chat => (
                 <div key={chat.id} className="bg-gray-800 rounded-lg p-3">
                   <p className="text-white font-bold">{chat.client?.nome}</p>
                   <p className="text-gray-300 text-sm">{chat.event?.name}</p>
@@ -866,6 +1005,7 @@ function App() {
                   )}
                 </div>
               ))}
+              {renderLoadMoreDashboard('chats')}
             </div>
             <button 
               onClick={() => setShowChat(true)}
@@ -918,6 +1058,7 @@ function App() {
                   <p className="text-orange-400 text-xs mt-1">👆 Clicca per modificare</p>
                 </div>
               ))}
+              {renderLoadMoreDashboard('events')}
             </div>
             <div className="mt-4">
               {/* Capo promoter non può creare eventi, solo modificarli */}
@@ -954,6 +1095,7 @@ function App() {
                   </div>
                 </div>
               ))}
+              {renderLoadMoreDashboard('members')}
             </div>
             <button 
               onClick={() => setShowCreatePromoter(true)}
@@ -967,7 +1109,7 @@ function App() {
           <div className="bg-gray-900 border border-green-600 rounded-lg p-6">
             <h3 className="text-xl font-bold text-white mb-4">💬 Chat Attive</h3>
             <div className="space-y-3 max-h-48 overflow-y-auto">
-              {dashboardData.chats?.slice(0, 5).map(chat => (
+              {dashboardData.chats?.map(chat => (
                 <div key={chat.id} className="bg-gray-800 rounded-lg p-3">
                   <p className="text-white font-bold">{chat.client?.nome}</p>
                   <p className="text-gray-300 text-sm">{chat.event?.name}</p>
@@ -978,6 +1120,7 @@ function App() {
                   )}
                 </div>
               ))}
+              {renderLoadMoreDashboard('chats')}
             </div>
             <button 
               onClick={() => setShowChat(true)}
@@ -1223,7 +1366,7 @@ function App() {
     <div className="bg-gray-900 border border-red-600 rounded-lg overflow-hidden shadow-lg hover:shadow-red-500/20 transition-all duration-300 transform hover:scale-105">
       <div className="h-48 bg-gradient-to-br from-red-600 to-black relative overflow-hidden">
         <img 
-          src={event.event_poster || event.image || 'https://images.pexels.com/photos/11748607/pexels-photo-11748607.jpeg'} 
+          src={event.event_poster_variants?.card || event.event_poster || event.image || 'https://images.pexels.com/photos/11748607/pexels-photo-11748607.jpeg'} 
           alt={event.name}
           className="w-full h-full object-cover opacity-80"
         />
@@ -1260,7 +1403,7 @@ function App() {
       <div className="bg-gray-900 border border-red-600 rounded-lg max-w-2xl w-full max-h-[90vh] overflow-y-auto">
         <div className="relative h-64">
           <img 
-            src={selectedEvent?.event_poster || selectedEvent?.image || 'https://images.pexels.com/photos/11748607/pexels-photo-11748607.jpeg'} 
+            src={selectedEvent?.event_poster_variants?.detail || selectedEvent?.event_poster || selectedEvent?.image || 'https://images.pexels.com/photos/11748607/pexels-photo-11748607.jpeg'} 
             alt={selectedEvent?.name}
             className="w-full h-full object-cover"
           />
@@ -1882,7 +2025,18 @@ function App() {
                         <p>Caricamento messaggi...</p>
                       </div>
                     ) : (
-                      chatMessages.map(message => (
+                      <>
+                      {olderMessagesCursor && (
+                        <div className="text-center">
+                          <button
+                            onClick={loadOlderMessages}
+                            className="text-sm text-green-400 hover:text-green-300"
+                          >
+                            Carica messaggi precedenti
+                          </button>
+                        </div>
+                      )}
+                      {chatMessages.map(message => (
                         <div 
                           key={message.id} 
                           className={`flex ${message.sender_id === currentUser?.id ? 'justify-end' : 'justify-start'}`}
@@ -1912,7 +2066,8 @@ function App() {
                             </p>
                           </div>
                         </div>
-                      ))
+                      ))}
+                      </>
                     )}
                   </div>
 
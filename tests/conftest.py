@@ -0,0 +1,121 @@
+import asyncio
+import os
+import sys
+import uuid
+from collections import Counter
+
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, BACKEND_DIR)
+# Minimum bcrypt cost keeps the seeded users cheap to hash on every startup
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Images render on a thread: starting a process pool for every test app is slow.
+# test_media covers the pool itself
+os.environ.setdefault("MEDIA_PROCESS_WORKERS", "0")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+from pymongo import MongoClient  # noqa: E402
+
+import server  # noqa: E402
+from media import FileSystemBlobStore  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+from seed import seed_default_data  # noqa: E402
+from db_accounting import record_command  # noqa: E402
+
+# Point at a disposable mongod to run the suite (and the COLLSCAN checks)
+# against a real query planner; mongomock is used otherwise
+TEST_MONGO_URL = os.environ.get("CLUBLY_TEST_MONGO_URL")
+
+def clear_caches():
+    """Forget everything the API caches between requests"""
+    server.caller_cache.clear()
+    server.events_cache.clear()
+    server.waiting_room.clear()
+    for cache in server.shared_caches.values():
+        asyncio.run(cache.clear())
+
+
+COUNTED_METHODS = {
+    "find", "find_one", "aggregate", "count_documents", "distinct",
+    "insert_one", "insert_many", "update_one", "update_many",
+    "delete_one", "delete_many", "find_one_and_update",
+}
+
+
+class CountingCollection:
+    """Proxy counting every database command issued through a collection"""
+
+    def __init__(self, collection, counter, queries):
+        self._collection = collection
+        self._counter = counter
+        self._queries = queries
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if name in COUNTED_METHODS:
+            def counted(*args, **kwargs):
+                self._counter[self._collection.name] += 1
+                self._queries.append((self._collection.name, name, args[0] if args else kwargs.get("filter")))
+                # mongomock emits no command events, so charge the request here
+                record_command(0.0)
+                return attribute(*args, **kwargs)
+            return counted
+        return attribute
+
+
+class CountingDatabase:
+    """Mongo stand-in that records how many commands each request issues"""
+
+    def __init__(self, database):
+        self._database = database
+        self.commands = Counter()
+        # (collection, method, filter or pipeline) of every counted command
+        self.queries = []
+
+    def __getattr__(self, name):
+        return CountingCollection(self._database[name], self.commands, self.queries)
+
+    def __getitem__(self, name):
+        return CountingCollection(self._database[name], self.commands, self.queries)
+
+    def command(self, *args, **kwargs):
+        return self._database.command(*args, **kwargs)
+
+    @property
+    def total(self):
+        return sum(self.commands.values())
+
+    def reset(self):
+        self.commands.clear()
+        self.queries.clear()
+
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    if TEST_MONGO_URL:
+        name = f"clubly_test_{uuid.uuid4().hex[:12]}"
+        database = CountingDatabase(AsyncIOMotorClient(TEST_MONGO_URL)[name])
+    else:
+        database = CountingDatabase(AsyncMongoMockClient()["clubly_test"])
+    monkeypatch.setattr(server, "db", database)
+    # GridFS is not available in mongomock; media goes to a temporary directory instead
+    monkeypatch.setattr(server, "blob_store", FileSystemBlobStore(str(tmp_path / "media")))
+    clear_caches()
+    yield database
+    if TEST_MONGO_URL:
+        with MongoClient(TEST_MONGO_URL) as sync_client:
+            sync_client.drop_database(name)
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(server.app) as test_client:
+        test_client.portal.call(server.health.wait_warmed_up)
+        test_client.portal.call(ensure_indexes, db)
+        test_client.portal.call(seed_default_data, db)
+        db.reset()
+        yield test_client
+
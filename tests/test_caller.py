@@ -0,0 +1,52 @@
+import server
+from tests.utils import auth_headers
+
+
+def test_dashboard_reuses_cached_caller(client, db):
+    headers = auth_headers(client, "capo_milano", "Password1")
+
+    db.reset()
+    assert client.get("/api/dashboard/capo-promoter", headers=headers).status_code == 200
+    first = db.commands["users"]
+    db.reset()
+    assert client.get("/api/dashboard/capo-promoter", headers=headers).status_code == 200
+    assert db.commands["users"] == first - 1
+
+
+def test_caller_loaded_once_per_request(client, db):
+    headers = auth_headers(client, "capo_milano", "Password1")
+    event = next(e for e in client.get("/api/events").json() if e["organization"] == "Night Events Milano")
+
+    db.reset()
+    response = client.put(f"/api/events/{event['id']}", json={"name": "Nuovo nome"}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert db.commands["users"] == 1
+
+
+def test_organization_change_invalidates_cached_caller(client, db):
+    founder = auth_headers(client, "admin", "admin123")
+    capo = auth_headers(client, "capo_milano", "Password1")
+    capo_id = client.get("/api/user/profile", headers=capo).json()["id"]
+    organizations = client.get("/api/organizations", headers=founder).json()
+    other = next(org for org in organizations if org["name"] != "Night Events Milano")
+    other_event = next(e for e in client.get("/api/events").json() if e["organization"] == other["name"])
+
+    # Warm the cache with the old organization
+    response = client.put(f"/api/events/{other_event['id']}", json={"name": "Prima"}, headers=capo)
+    assert response.status_code == 403
+
+    response = client.put(f"/api/organizations/{other['id']}/assign-capo-promoter", json={"capo_promoter_id": capo_id}, headers=founder)
+    assert response.status_code == 200, response.text
+    response = client.put(f"/api/events/{other_event['id']}", json={"name": "Dopo"}, headers=capo)
+    assert response.status_code == 200, response.text
+
+
+def test_profile_edit_invalidates_cached_caller(client):
+    headers = auth_headers(client, "marco_promoter", "Password1@")
+    marco_id = client.get("/api/user/profile", headers=headers).json()["id"]
+    client.get("/api/dashboard/promoter", headers=headers)
+    assert server.caller_cache.get(marco_id)["nome"] == "Marco"
+
+    response = client.put("/api/user/profile/edit", json={"nome": "Marcello", "username": "marco_promoter", "citta": "Roma"}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert server.caller_cache.get(marco_id) is None
@@ -0,0 +1,84 @@
+import uuid
+from datetime import datetime, timedelta
+
+from tests.utils import auth_headers, book, register_client
+
+
+def open_chat(client):
+    register_client(client, "cliente_history")
+    headers = auth_headers(client, "cliente_history", "Password1")
+    event_id = client.get("/api/events").json()[0]["id"]
+    booking = book(client, headers, event_id)
+    return booking["chat_id"], headers
+
+
+async def insert_history(db, chat_id, count, start=None):
+    start = start or datetime.utcnow() + timedelta(minutes=1)
+    # Pairs of messages share a timestamp so the id tie-breaker is exercised;
+    # ids are prefixed with the index to make the expected order predictable
+    await db.chat_messages.insert_many([{
+        "id": f"{index:04d}-{uuid.uuid4()}",
+        "chat_id": chat_id,
+        "sender_id": "someone",
+        "sender_role": "cliente",
+        "message": f"messaggio {index}",
+        "timestamp": start + timedelta(seconds=index // 2),
+        "is_automatic": False
+    } for index in range(count)])
+
+
+def texts(page):
+    return [message["message"] for message in page["messages"]]
+
+
+def test_latest_page_then_scroll_back(client, db):
+    chat_id, headers = open_chat(client)
+    client.portal.call(insert_history, db, chat_id, 120)
+
+    latest = client.get(f"/api/chats/{chat_id}/messages", headers=headers).json()
+    assert len(latest["messages"]) == 50
+    assert latest["has_more"] is True
+    timestamps = [message["timestamp"] for message in latest["messages"]]
+    assert timestamps == sorted(timestamps)
+    assert texts(latest)[-1] == "messaggio 119"
+
+    seen = texts(latest)
+    cursor = latest["before"]
+    while cursor:
+        page = client.get(f"/api/chats/{chat_id}/messages", params={"before": cursor}, headers=headers).json()
+        seen = texts(page) + seen
+        cursor = page["before"] if page["has_more"] else None
+
+    # 120 inserted messages plus the automatic booking message, no gaps or duplicates
+    assert len(seen) == 121
+    assert len(set(seen)) == 121
+    assert seen[1:] == [f"messaggio {index}" for index in range(120)]
+
+
+def test_after_cursor_returns_only_new_messages(client, db):
+    chat_id, headers = open_chat(client)
+    client.portal.call(insert_history, db, chat_id, 4, datetime.utcnow() + timedelta(seconds=-10))
+    latest = client.get(f"/api/chats/{chat_id}/messages", params={"limit": 2}, headers=headers).json()
+    assert texts(latest)[0] == "messaggio 3"  # followed by the automatic booking message
+
+    client.post(f"/api/chats/{chat_id}/messages", json={
+        "chat_id": chat_id, "sender_id": "", "sender_role": "", "message": "nuovo"
+    }, headers=headers)
+    newer = client.get(f"/api/chats/{chat_id}/messages", params={"after": latest["after"]}, headers=headers).json()
+    assert texts(newer) == ["nuovo"]
+    assert newer["has_more"] is False
+
+    empty = client.get(f"/api/chats/{chat_id}/messages", params={"after": newer["after"]}, headers=headers).json()
+    assert empty["messages"] == []
+    assert empty["after"] == newer["after"]
+
+
+def test_page_size_is_capped_and_cursor_validated(client, db):
+    chat_id, headers = open_chat(client)
+    client.portal.call(insert_history, db, chat_id, 150)
+
+    page = client.get(f"/api/chats/{chat_id}/messages", params={"limit": 1000}, headers=headers).json()
+    assert len(page["messages"]) == 100
+
+    response = client.get(f"/api/chats/{chat_id}/messages", params={"before": "garbage"}, headers=headers)
+    assert response.status_code == 400
@@ -0,0 +1,45 @@
+import server
+from tests.utils import auth_headers, insert_chats, register_client
+
+
+def test_capo_promoter_dashboard_query_count_is_constant(client, db):
+    headers = auth_headers(client, "capo_milano", "Password1")
+    capo = client.get("/api/user/profile", headers=headers).json()
+    event_id = client.get("/api/events").json()[0]["id"]
+    clients = [register_client(client, f"cliente_{index}") for index in range(10)]
+
+    query_counts = []
+    for batch in (clients[:1], clients[1:]):
+        client.portal.call(insert_chats, db, capo["id"], event_id, [user["id"] for user in batch])
+        server.caller_cache.clear()
+        db.reset()
+        response = client.get("/api/dashboard/capo-promoter", headers=headers)
+        assert response.status_code == 200
+        query_counts.append(db.total)
+
+    dashboard = response.json()
+    assert len(dashboard["chats"]) == 10
+    assert dashboard["chats"][0]["client"]["id"] == clients[-1]["id"]
+    assert dashboard["chats"][0]["last_message"]["message"] == "messaggio 0"
+    assert dashboard["can_edit_events"] is True
+    assert query_counts[0] == query_counts[1]
+
+
+def test_promoter_dashboard_sections_are_paginated(client, db):
+    headers = auth_headers(client, "capo_milano", "Password1")
+    capo = client.get("/api/user/profile", headers=headers).json()
+    event_id = client.get("/api/events").json()[0]["id"]
+    clients = [register_client(client, f"cliente_{index}") for index in range(5)]
+    client.portal.call(insert_chats, db, capo["id"], event_id, [user["id"] for user in clients])
+
+    response = client.get(
+        "/api/dashboard/capo-promoter",
+        params={"chats_offset": 2, "chats_limit": 2, "members_limit": 1},
+        headers=headers
+    )
+    dashboard = response.json()
+
+    assert [chat["client"]["id"] for chat in dashboard["chats"]] == [clients[2]["id"], clients[1]["id"]]
+    assert dashboard["pagination"]["chats"] == {"offset": 2, "limit": 2, "total": 5}
+    assert len(dashboard["members"]) == 1
+    assert dashboard["pagination"]["members"]["total"] == 2
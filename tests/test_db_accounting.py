@@ -0,0 +1,63 @@
+import asyncio
+import contextvars
+import logging
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import db_accounting
+from db_accounting import DBAccountingMiddleware, db_accounting_listener
+from tests.utils import auth_headers
+
+
+def test_responses_report_database_commands(client):
+    event_id = client.get("/api/events").json()[0]["id"]
+    response = client.get(f"/api/events/{event_id}")
+    assert response.headers["x-db-queries"] == "1"
+    assert response.headers["server-timing"].startswith("db;dur=")
+    assert 'desc="1 queries"' in response.headers["server-timing"]
+    assert ", app;dur=" in response.headers["server-timing"]
+
+    assert client.get("/api/health/live").headers["x-db-queries"] == "0"
+
+
+def test_requests_over_budget_are_logged(client, monkeypatch, caplog):
+    headers = auth_headers(client, "capo_milano", "Password1")
+    monkeypatch.setattr(db_accounting, "DB_QUERY_BUDGET", 2)
+
+    with caplog.at_level(logging.WARNING, logger="db_accounting"):
+        response = client.get("/api/dashboard/capo-promoter", headers=headers)
+        client.get("/api/events")
+
+    queries = int(response.headers["x-db-queries"])
+    assert queries > 2
+    assert [record.getMessage() for record in caplog.records] == [
+        f"GET /api/dashboard/capo-promoter issued {queries} database commands (budget 2, 0.0 ms in MongoDB)"
+    ]
+
+
+def test_listener_charges_commands_to_the_issuing_request():
+    app = FastAPI()
+    app.add_middleware(DBAccountingMiddleware)
+
+    def run_commands(*durations_micros):
+        for duration in durations_micros:
+            event = SimpleNamespace(duration_micros=duration)
+            db_accounting_listener.started(event)
+            db_accounting_listener.succeeded(event)
+
+    @app.get("/work")
+    async def work():
+        # As Motor does: the commands run on an executor thread in a copy of the request context
+        context = contextvars.copy_context()
+        await asyncio.get_running_loop().run_in_executor(None, context.run, run_commands, 1500, 2500)
+        db_accounting_listener.failed(SimpleNamespace(duration_micros=1000))
+        return {}
+
+    # Commands outside a request are not charged to anyone
+    run_commands(1000)
+    with TestClient(app) as client:
+        response = client.get("/work")
+    assert response.headers["x-db-queries"] == "3"
+    assert response.headers["server-timing"].startswith('db;dur=5.0;desc="3 queries", app;dur=')
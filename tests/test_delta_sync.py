@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from tests.utils import auth_headers, book, register_client, send_message
+
+
+def test_chats_since_returns_changes_and_tombstones(client):
+    register_client(client, "cliente_sync")
+    headers = auth_headers(client, "cliente_sync", "Password1")
+    founder_headers = auth_headers(client, "admin", "admin123")
+    events = client.get("/api/events").json()
+    first = book(client, headers, events[0]["id"])
+    second = book(client, headers, events[1]["id"])
+
+    since = (datetime.utcnow() + timedelta(seconds=1)).isoformat()
+    sync = client.get("/api/user/chats", params={"since": since}, headers=headers).json()
+    assert sync["chats"] == []
+    assert sync["deleted_chat_ids"] == []
+
+    send_message(client, first["chat_id"], headers, "novità")
+    client.delete(f"/api/events/{events[1]['id']}", headers=founder_headers)
+
+    since = (datetime.utcnow() - timedelta(seconds=1)).isoformat()
+    sync = client.get("/api/user/chats", params={"since": since}, headers=headers).json()
+    assert [chat["id"] for chat in sync["chats"]] == [first["chat_id"]]
+    assert sync["chats"][0]["last_message"]["message"] == "novità"
+    assert sync["deleted_chat_ids"] == [second["chat_id"]]
+    assert "watermark" in sync
+
+    # Messages of the deleted chat are gone too
+    response = client.get(f"/api/chats/{second['chat_id']}/messages", headers=headers)
+    assert response.status_code == 404
+
+
+def test_messages_since_and_expired_watermark(client):
+    register_client(client, "cliente_sync")
+    headers = auth_headers(client, "cliente_sync", "Password1")
+    booking = book(client, headers, client.get("/api/events").json()[0]["id"])
+
+    since = datetime.utcnow().isoformat()
+    send_message(client, booking["chat_id"], headers, "dopo")
+    page = client.get(f"/api/chats/{booking['chat_id']}/messages", params={"since": since}, headers=headers).json()
+    assert [message["message"] for message in page["messages"]] == ["dopo"]
+    assert "watermark" in page
+
+    expired = (datetime.utcnow() - timedelta(days=60)).isoformat()
+    response = client.get("/api/user/chats", params={"since": expired}, headers=headers)
+    assert response.status_code == 410
@@ -0,0 +1,99 @@
+import uuid
+
+from tests.utils import auth_headers
+
+
+def add_events(client, db, specs):
+    """Insert events directly, as (date, location, organization) tuples"""
+    events = [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Evento {index}",
+            "date": date,
+            "location": location,
+            "organization": organization,
+            "start_time": "23:00",
+            "total_tables": 10,
+            "tables_available": 10,
+        }
+        for index, (date, location, organization) in enumerate(specs)
+    ]
+    client.portal.call(db.events.insert_many, events)
+    return events
+
+
+def walk_feed(client, **params):
+    pages, cursor = [], None
+    while True:
+        response = client.get("/api/events/feed", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        pages.append(page["events"])
+        if not page["has_more"]:
+            assert page["next_cursor"] is None
+            return pages
+        cursor = page["next_cursor"]
+
+
+def test_feed_pages_in_date_order_without_gaps(client, db):
+    # Several events share a date: the id tie-breaker must not skip or repeat them
+    add_events(client, db, [(f"2030-01-0{day % 3 + 1}", "Club, Milano", "Night Events Milano") for day in range(7)])
+
+    pages = walk_feed(client, limit=3, date_from="2030-01-01")
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    events = [event for page in pages for event in page]
+    assert len({event["id"] for event in events}) == 7
+    assert events == sorted(events, key=lambda event: (event["date"], event["id"]))
+
+
+def test_feed_filters(client, db):
+    add_events(client, db, [
+        ("2030-02-01", "Club Matrix, Milano", "Night Events Milano"),
+        ("2030-02-02", "Warehouse, Roma", "Urban Nights"),
+        ("2030-03-01", "Terrazza, milano ", "Urban Nights"),
+        ("2030-03-02", "Milano Marittima, Cervia", "Urban Nights"),
+    ])
+
+    def dates(**params):
+        return [event["date"] for page in walk_feed(client, **params) for event in page]
+
+    assert dates(city="Milano", date_from="2030-01-01") == ["2030-02-01", "2030-03-01"]
+    assert dates(organization="Urban Nights", date_from="2030-01-01") == ["2030-02-02", "2030-03-01", "2030-03-02"]
+    assert dates(date_from="2030-02-02", date_to="2030-03-01") == ["2030-02-02", "2030-03-01"]
+    # The seeded events are in the past
+    assert dates(upcoming=True) == ["2030-02-01", "2030-02-02", "2030-03-01", "2030-03-02"]
+
+    response = client.get("/api/events/feed", params={"date_from": "01/02/2030"})
+    assert response.status_code == 400
+
+
+def test_cached_listing_revalidates_with_etag(client, db):
+    first = client.get("/api/events")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+
+    db.reset()
+    again = client.get("/api/events", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert db.total == 0
+
+    feed = client.get("/api/events/feed")
+    assert client.get("/api/events/feed", headers={"If-None-Match": feed.headers["etag"]}).status_code == 304
+
+
+def test_event_update_invalidates_cached_listings(client, db):
+    headers = auth_headers(client, "admin", "admin123")
+    listing = client.get("/api/events")
+    feed = client.get("/api/events/feed")
+    event = listing.json()[0]
+
+    response = client.put(f"/api/events/{event['id']}", json={"name": "Rinominato"}, headers=headers)
+    assert response.status_code == 200, response.text
+
+    refreshed = client.get("/api/events", headers={"If-None-Match": listing.headers["etag"]})
+    assert refreshed.status_code == 200
+    assert next(e for e in refreshed.json() if e["id"] == event["id"])["name"] == "Rinominato"
+    refreshed_feed = client.get("/api/events/feed", headers={"If-None-Match": feed.headers["etag"]})
+    assert refreshed_feed.status_code == 200
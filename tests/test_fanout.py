@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime
+
+from fanout import InProcessBus, RedisBus, create_bus
+
+
+def test_in_process_bus_delivers_json_ready_messages():
+    received = []
+
+    async def handler(message):
+        received.append(message)
+
+    async def scenario():
+        bus = InProcessBus()
+        await bus.publish({"kind": "push", "payload": {}})  # no handler yet: dropped
+        await bus.start(handler)
+        await bus.publish({"kind": "push", "payload": {"timestamp": datetime(2024, 4, 15, 23, 0)}})
+        await bus.stop()
+        await bus.publish({"kind": "push", "payload": {}})
+
+    asyncio.run(scenario())
+    assert received == [{"kind": "push", "payload": {"timestamp": "2024-04-15T23:00:00"}}]
+
+
+def test_handler_errors_do_not_reach_publisher():
+    async def handler(message):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        bus = InProcessBus()
+        await bus.start(handler)
+        await bus.publish({"kind": "push"})
+
+    asyncio.run(scenario())
+
+
+def test_create_bus_defaults_to_in_process():
+    assert isinstance(create_bus(None), InProcessBus)
+
+
+def test_redis_outage_still_reaches_local_handler():
+    received = []
+
+    async def handler(message):
+        received.append(message)
+
+    async def scenario():
+        bus = RedisBus("redis://127.0.0.1:1/0")
+        bus._handler = handler
+        await bus.publish({"kind": "push", "payload": {"timestamp": datetime(2024, 4, 15, 23, 0)}})
+        await bus._redis.aclose()
+
+    asyncio.run(scenario())
+    assert received == [{"kind": "push", "payload": {"timestamp": "2024-04-15T23:00:00"}}]
+
+
+class FakePubSub:
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def listen(self):
+        for message in self.messages:
+            yield {"data": message}
+        await asyncio.Event().wait()
+
+
+def test_slow_handler_does_not_hold_back_the_channel():
+    started, finished = [], []
+
+    async def handler(message):
+        started.append(message["n"])
+        await asyncio.sleep(0.05)
+        finished.append(message["n"])
+
+    async def scenario():
+        bus = RedisBus("redis://127.0.0.1:1/0", concurrency=2)
+        bus._handler = handler
+        bus._pubsub = FakePubSub(['{"n": 1}', "not json", '{"n": 2}', '{"n": 3}'])
+        bus._listener = asyncio.ensure_future(bus._listen())
+        await asyncio.sleep(0.01)
+        # Two run at once; the third waits for a free slot
+        assert sorted(started) == [1, 2] and finished == []
+        await asyncio.sleep(0.1)
+        assert sorted(finished) == [1, 2, 3]
+        bus._pubsub = None
+        await bus.stop()
+
+    asyncio.run(scenario())
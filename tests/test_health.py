@@ -0,0 +1,57 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import server
+from health import Health
+
+
+def test_ready_reports_every_check(client):
+    response = client.get("/api/health/ready")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready", "checks": {"mongo": "ok", "indexes": "ok", "warmup": "ok"}}
+    assert client.get("/api/health/live").json() == {"status": "alive"}
+
+
+def test_not_ready_until_warm_up_finishes(db, monkeypatch):
+    release = asyncio.Event()
+
+    async def slow_step():
+        await release.wait()
+
+    monkeypatch.setattr(server, "health", Health())
+    server.health.warmup("slow")(slow_step)
+    with TestClient(server.app) as client:
+        pending = client.get("/api/health/ready")
+        assert pending.status_code == 503
+        assert pending.json()["checks"]["warmup"] == "pending"
+        # Liveness never waits for warm-up
+        assert client.get("/api/health/live").status_code == 200
+
+        client.portal.call(release.set)
+        client.portal.call(server.health.wait_warmed_up)
+        assert client.get("/api/health/ready").status_code == 200
+
+
+def test_missing_index_degrades_without_failing_readiness(client, db):
+    client.portal.call(db.chat_messages.drop_index, "chat_id_timestamp_id")
+    response = client.get("/api/health/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "degraded"
+    assert response.json()["checks"]["indexes"].startswith("error: missing indexes on chat_messages")
+
+
+def test_slow_check_times_out():
+    health = Health(check_timeout=0.01)
+
+    @health.check("stuck")
+    async def stuck():
+        await asyncio.sleep(1)
+
+    async def probe():
+        await health.run_warmup()
+        return await health.readiness()
+
+    ready, report = asyncio.run(probe())
+    assert not ready
+    assert report["checks"] == {"stuck": "timeout", "warmup": "ok"}
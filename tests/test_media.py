@@ -0,0 +1,87 @@
+import asyncio
+import base64
+import io
+import os
+
+from PIL import Image
+
+import media
+from tests.utils import auth_headers
+
+
+def png_data_url(width=800, height=600):
+    output = io.BytesIO()
+    # Random pixels keep the PNG close to a real photo upload in size
+    Image.frombytes("RGB", (width, height), os.urandom(width * height * 3)).save(output, "PNG")
+    return "data:image/png;base64," + base64.b64encode(output.getvalue()).decode("ascii")
+
+
+def register(client, username, profile_image):
+    return client.post("/api/auth/register", json={
+        "nome": "Cliente",
+        "cognome": "Foto",
+        "email": f"{username}@example.com",
+        "username": username,
+        "password": "Password1",
+        "data_nascita": "2000-01-01",
+        "citta": "Milano",
+        "profile_image": profile_image
+    })
+
+
+def test_profile_image_is_stored_as_thumbnails(client, db):
+    data_url = png_data_url()
+    response = register(client, "cliente_foto", data_url)
+    assert response.status_code == 200, response.text
+    profile_image = response.json()["user"]["profile_image"]
+    assert profile_image.startswith("/api/media/avatars/")
+    assert profile_image.endswith("-256.webp")
+
+    # The user document only keeps URLs
+    user = client.portal.call(db.users.find_one, {"username": "cliente_foto"})
+    assert user["profile_image"] == profile_image
+    assert set(user["profile_image_variants"]) == {"sm", "md"}
+    assert len(str(user)) < len(data_url) / 100
+
+    media = client.get(profile_image)
+    assert media.status_code == 200
+    assert media.headers["content-type"] == "image/webp"
+    assert "immutable" in media.headers["cache-control"]
+    assert Image.open(io.BytesIO(media.content)).size == (256, 256)
+
+    cached = client.get(profile_image, headers={"If-None-Match": media.headers["etag"]})
+    assert cached.status_code == 304
+
+
+def test_same_image_shares_content_hashed_url(client):
+    data_url = png_data_url(300, 300)
+    first = register(client, "cliente_uno", data_url).json()["user"]["profile_image"]
+    second = register(client, "cliente_due", data_url).json()["user"]["profile_image"]
+    assert first == second
+
+
+def test_setup_moves_image_and_rejects_garbage(client):
+    headers = auth_headers(client, "admin", "admin123")
+    setup = {"cognome": "Clubly", "username": "admin", "data_nascita": "1990-01-01", "citta": "Milano"}
+
+    response = client.post("/api/user/setup", json={**setup, "profile_image": png_data_url(100, 100)}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["user"]["profile_image"].startswith("/api/media/")
+
+    response = client.post("/api/user/setup", json={**setup, "profile_image": "data:image/png;base64,bm90IGFuIGltYWdl"}, headers=headers)
+    assert response.status_code == 400
+
+    assert client.get("/api/media/avatars/missing.webp").status_code == 404
+
+
+def test_process_pool_does_not_fork_the_server(monkeypatch):
+    monkeypatch.setattr(media, "MEDIA_PROCESS_WORKERS", 1)
+    monkeypatch.setattr(media, "_process_pool", None)
+    pool = media.get_process_pool()
+    try:
+        assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+        data = media.decode_data_url(png_data_url(300, 300))
+        variants = asyncio.run(media.run_render(media.render_avatars, data))
+        assert set(variants) == set(media.AVATAR_SIZES)
+    finally:
+        media.shutdown_process_pool()
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import pytest
+
+import metrics
+from metrics import MongoCommandMetrics, render_metrics
+from tests.utils import auth_headers
+
+
+def sample(body, name, **labels):
+    prefix = name
+    if labels:
+        prefix += "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+    prefix += " "
+    for line in body.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return 0.0
+
+
+def test_routes_are_labelled_by_template(client):
+    event_id = client.get("/api/events").json()[0]["id"]
+    before = sample(client.get("/metrics").text, "clubly_http_requests_total", method="GET", route="/api/events/{event_id}", status="200")
+    client.get(f"/api/events/{event_id}")
+    client.get(f"/api/events/{event_id}")
+    client.get("/api/events/missing")
+
+    body = client.get("/metrics").text
+    assert sample(body, "clubly_http_requests_total", method="GET", route="/api/events/{event_id}", status="200") == before + 2
+    assert sample(body, "clubly_http_requests_total", method="GET", route="/api/events/{event_id}", status="404") >= 1
+    assert sample(body, "clubly_http_request_duration_seconds_count", method="GET", route="/api/events/{event_id}") >= before + 3
+    assert event_id not in body
+    assert "clubly_http_requests_in_flight" in body
+
+
+@pytest.mark.parametrize("multiprocess", [False, True], ids=["single", "multiprocess"])
+def test_password_executor_is_exported(client, monkeypatch, tmp_path, multiprocess):
+    if multiprocess:
+        monkeypatch.setattr(metrics, "PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    before = sample(client.get("/metrics").text, "clubly_password_completed_total")
+    auth_headers(client, "admin", "admin123")
+    body = client.get("/metrics").text
+    assert sample(body, "clubly_password_completed_total") == before + 1
+    assert sample(body, "clubly_password_queue_depth") == 0
+    assert "clubly_singleflight_calls_total" in body
+    assert "clubly_waiting_room_turned_away_total" in body
+
+
+def test_mongo_commands_are_counted_per_collection():
+    listener = MongoCommandMetrics()
+    before = sample(render_metrics()[0].decode(), "clubly_mongo_commands_total", collection="chats", command="find", outcome="ok")
+
+    for request_id, outcome in ((1, "succeeded"), (2, "failed")):
+        listener.started(SimpleNamespace(connection_id=("db", 27017), request_id=request_id, command_name="find", command={"find": "chats"}))
+        getattr(listener, outcome)(SimpleNamespace(connection_id=("db", 27017), request_id=request_id, command_name="find", duration_micros=1500))
+
+    body = render_metrics()[0].decode()
+    assert sample(body, "clubly_mongo_commands_total", collection="chats", command="find", outcome="ok") == before + 1
+    assert sample(body, "clubly_mongo_commands_total", collection="chats", command="find", outcome="error") >= 1
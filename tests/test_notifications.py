@@ -0,0 +1,76 @@
+import uuid
+from datetime import datetime, timedelta
+
+from unread_counters import backfill_unread_counters
+from tests.utils import auth_headers, book, register_client, send_message
+
+
+def test_unread_counters_follow_messages_and_reads(client, db):
+    register_client(client, "cliente_unread")
+    client_headers = auth_headers(client, "cliente_unread", "Password1")
+    booking = book(client, client_headers, client.get("/api/events").json()[0]["id"])
+    promoter_login = booking["promoter_name"].split()[0].lower() + "_promoter"
+    promoter_headers = auth_headers(client, promoter_login, "Password1@")
+
+    # The automatic booking message is unread for the promoter
+    assert client.get("/api/user/notifications/count", headers=promoter_headers).json() == {"unread_count": 1}
+
+    send_message(client, booking["chat_id"], client_headers, "ci sei?")
+    send_message(client, booking["chat_id"], promoter_headers, "sì!")
+    assert client.get("/api/user/notifications", headers=promoter_headers).json() == {"notification_count": 2}
+    assert client.get("/api/user/notifications/count", headers=client_headers).json() == {"unread_count": 1}
+
+    db.reset()
+    client.get("/api/user/notifications/count", headers=promoter_headers)
+    assert db.total == 1
+
+    response = client.post(f"/api/chats/{booking['chat_id']}/read", headers=promoter_headers)
+    assert response.status_code == 200
+    assert client.get("/api/user/notifications/count", headers=promoter_headers).json() == {"unread_count": 0}
+    assert client.get("/api/user/notifications/count", headers=client_headers).json() == {"unread_count": 1}
+
+
+def test_mark_as_read_requires_participant(client):
+    register_client(client, "cliente_a")
+    register_client(client, "cliente_b")
+    booking = book(client, auth_headers(client, "cliente_a", "Password1"), client.get("/api/events").json()[0]["id"])
+
+    response = client.post(f"/api/chats/{booking['chat_id']}/read", headers=auth_headers(client, "cliente_b", "Password1"))
+    assert response.status_code == 404
+
+
+def test_backfill_counts_messages_of_chats_without_counters(client, db):
+    now = datetime.utcnow()
+    client_id, promoter_id = str(uuid.uuid4()), str(uuid.uuid4())
+    chats = [
+        # Never opened by either side
+        {"id": "old", "client_id": client_id, "promoter_id": promoter_id, "status": "active"},
+        # The client has read up to an hour ago
+        {"id": "seen", "client_id": client_id, "promoter_id": promoter_id, "status": "active",
+         "last_seen_client": now - timedelta(hours=1)},
+        # Already counted: left as it is
+        {"id": "new", "client_id": client_id, "promoter_id": promoter_id, "status": "active",
+         "unread_client": 5, "unread_promoter": 0},
+    ]
+    messages = [
+        (chat_id, sender, now - age)
+        for chat_id in ("old", "seen", "new")
+        for sender, age in [(promoter_id, timedelta(hours=2)), (promoter_id, timedelta(minutes=5)),
+                            (client_id, timedelta(minutes=1)), (promoter_id, timedelta(days=40))]
+    ]
+    client.portal.call(db.chats.insert_many, chats)
+    client.portal.call(db.chat_messages.insert_many, [
+        {"id": str(uuid.uuid4()), "chat_id": chat_id, "sender_id": sender, "message": "ciao", "timestamp": timestamp}
+        for chat_id, sender, timestamp in messages
+    ])
+
+    assert client.portal.call(backfill_unread_counters, db) == 2
+    # Once completed, later runs do not even scan the chats
+    db.reset()
+    assert client.portal.call(backfill_unread_counters, db) == 0
+    assert db.commands == {"migrations": 1}
+    counters = {
+        chat["id"]: (chat["unread_client"], chat["unread_promoter"])
+        for chat in client.portal.call(lambda: db.chats.find({"id": {"$in": ["old", "seen", "new"]}}).to_list(None))
+    }
+    assert counters == {"old": (2, 1), "seen": (1, 1), "new": (5, 0)}
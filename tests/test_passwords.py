@@ -0,0 +1,66 @@
+import asyncio
+
+import bcrypt
+from fastapi import HTTPException
+
+import server
+from passwords import PasswordHasher, hash_rounds
+
+
+def test_login_rehashes_passwords_with_another_cost(client, db):
+    legacy = bcrypt.hashpw(b"Password1@", bcrypt.gensalt(5)).decode("utf-8")
+    client.portal.call(db.users.update_one, {"username": "marco_promoter"}, {"$set": {"password": legacy}})
+    rehashed = server.password_hasher.stats()["rehashed"]
+
+    response = client.post("/api/auth/login", json={"login": "marco_promoter", "password": "Password1@"})
+    assert response.status_code == 200, response.text
+
+    upgraded = client.portal.call(db.users.find_one, {"username": "marco_promoter"})["password"]
+    assert hash_rounds(upgraded) == server.password_hasher.rounds
+    assert client.post("/api/auth/login", json={"login": "marco_promoter", "password": "Password1@"}).status_code == 200
+    assert server.password_hasher.stats()["rehashed"] == rehashed + 1
+
+
+def test_wrong_password_does_not_rehash(client, db):
+    before = client.portal.call(db.users.find_one, {"username": "admin"})["password"]
+    response = client.post("/api/auth/login", json={"login": "admin", "password": "sbagliata"})
+    assert response.status_code == 401
+    assert client.portal.call(db.users.find_one, {"username": "admin"})["password"] == before
+
+
+def test_queue_depth_is_bounded():
+    hasher = PasswordHasher(rounds=4, workers=1, max_pending=2)
+
+    async def storm():
+        return await asyncio.gather(*(hasher.hash("Password1") for _ in range(5)), return_exceptions=True)
+
+    results = asyncio.run(storm())
+    rejected = [result for result in results if isinstance(result, HTTPException)]
+    assert len(rejected) == 3
+    assert all(error.status_code == 503 and "Retry-After" in error.headers for error in rejected)
+    assert hasher.stats()["rejected"] == 3
+    assert hasher.stats()["completed"] == 2
+    assert hasher.stats()["pending"] == 0
+
+
+def test_hashing_does_not_block_the_event_loop():
+    hasher = PasswordHasher(rounds=10, workers=1)
+
+    async def measure():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.001)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        hashed = await hasher.hash("Password1")
+        task.cancel()
+        return hashed, ticks
+
+    hashed, ticks = asyncio.run(measure())
+    assert ticks > 5
+    assert asyncio.run(hasher.verify("Password1", hashed))
+    assert not asyncio.run(hasher.verify("Password1", "not-a-hash"))
@@ -0,0 +1,61 @@
+import io
+
+from PIL import Image
+
+from tests.test_media import png_data_url
+from tests.utils import auth_headers
+
+
+def first_event(client):
+    return client.get("/api/events").json()[0]
+
+
+def test_poster_is_stored_as_resized_variants(client, db):
+    headers = auth_headers(client, "admin", "admin123")
+    event = first_event(client)
+    data_url = png_data_url(1600, 2000)
+
+    response = client.put(f"/api/events/{event['id']}/poster", json={"event_poster": data_url}, headers=headers)
+    assert response.status_code == 200, response.text
+
+    stored = client.portal.call(db.events.find_one, {"id": event["id"]})
+    variants = stored["event_poster_variants"]
+    assert set(variants) == {"card", "card_webp", "detail", "detail_webp"}
+    assert stored["event_poster"] == variants["detail"]
+    assert len(str(stored)) < len(data_url) / 100
+
+    card = client.get(variants["card"])
+    assert card.headers["content-type"] == "image/jpeg"
+    assert "immutable" in card.headers["cache-control"]
+    assert Image.open(io.BytesIO(card.content)).size == (480, 600)
+    detail_webp = client.get(variants["detail_webp"])
+    assert detail_webp.headers["content-type"] == "image/webp"
+    assert Image.open(io.BytesIO(detail_webp.content)).size == (1080, 1350)
+
+    # The public list carries URLs only
+    listed = next(e for e in client.get("/api/events").json() if e["id"] == event["id"])
+    assert listed["event_poster_variants"] == variants
+
+    # Resubmitting the stored URL (as the edit modal does) keeps the variants
+    response = client.put(f"/api/events/{event['id']}", json={"event_poster": stored["event_poster"], "name": "Rinominato"}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert client.portal.call(db.events.find_one, {"id": event["id"]})["event_poster_variants"] == variants
+
+
+def test_poster_url_replaces_variants(client, db):
+    headers = auth_headers(client, "admin", "admin123")
+    event = first_event(client)
+    client.put(f"/api/events/{event['id']}/poster", json={"event_poster": png_data_url(600, 600)}, headers=headers)
+
+    response = client.put(f"/api/events/{event['id']}/full-update", json={"event_poster": "https://example.com/poster.jpg"}, headers=headers)
+    assert response.status_code == 200, response.text
+    stored = client.portal.call(db.events.find_one, {"id": event["id"]})
+    assert stored["event_poster"] == "https://example.com/poster.jpg"
+    assert stored["event_poster_variants"] is None
+
+
+def test_invalid_poster_is_rejected(client):
+    headers = auth_headers(client, "admin", "admin123")
+    event = first_event(client)
+    response = client.put(f"/api/events/{event['id']}/poster", json={"event_poster": "data:image/png;base64,bm90IGFuIGltYWdl"}, headers=headers)
+    assert response.status_code == 400
@@ -0,0 +1,151 @@
+"""Database command budgets per route.
+
+Every read route, and every write route on the booking and chat hot paths,
+is called twice, with the seeded data grown in between. The number of
+commands it issues must stay within its budget and must not grow with the
+data: a loop issuing one query per row fails here long before it shows up
+as latency in production.
+
+With CLUBLY_TEST_MONGO_URL set, every captured query is also explained and
+a collection scan fails the test, unless the query has no filter at all or
+the route is listed as accepting one.
+"""
+import uuid
+
+import pytest
+
+from tests.conftest import TEST_MONGO_URL, clear_caches
+from tests.utils import auth_headers, book, register_client
+
+MILANO = "Night Events Milano"
+
+# (caller, path, maximum database commands)
+ROUTE_BUDGETS = [
+    (None, "/api/events", 1),
+    (None, "/api/events/{event_id}", 1),
+    (None, "/api/organizations", 1),
+    ("cliente", "/api/user/profile", 1),
+    ("cliente", "/api/user/bookings", 2),
+    ("cliente", "/api/user/chats", 4),
+    ("cliente", "/api/chats/{chat_id}/messages", 2),
+    ("cliente", "/api/user/notifications", 1),
+    ("cliente", "/api/user/notifications/count", 1),
+    ("cliente", "/api/organizations/{organization}/promoters", 1),
+    ("promoter", "/api/dashboard/promoter", 7),
+    ("capo", "/api/dashboard/capo-promoter", 7),
+    ("founder", "/api/dashboard/clubly-founder", 5),
+    ("founder", "/api/organizations/{org_id}", 3),
+]
+
+# (caller, path, JSON body, maximum database commands)
+WRITE_BUDGETS = [
+    ("cliente", "/api/bookings", {"event_id": "{event_id}", "booking_type": "lista", "party_size": 2}, 8),
+    ("cliente", "/api/chats/{chat_id}/messages", {"chat_id": "{chat_id}", "sender_id": "", "sender_role": "", "message": "Ciao"}, 3),
+    ("cliente", "/api/chats/{chat_id}/read", None, 2),
+]
+
+# Reads taking their filters in a POST body: (caller, path, JSON body,
+# maximum database commands, collection scan accepted). User search matches
+# substrings of nome, cognome and username with an unanchored, case-insensitive
+# $regex, which no index can serve, so its scan is accepted; the result is
+# capped at 50 rows and the command count is still budgeted
+POST_READ_BUDGETS = [
+    ("founder", "/api/users/search", {"search_term": "cliente"}, 1, True),
+]
+
+CALLERS = {
+    "cliente": ("cliente_budget", "Password1"),
+    "promoter": ("marco_promoter", "Password1@"),
+    "capo": ("capo_milano", "Password1"),
+    "founder": ("admin", "admin123"),
+}
+
+
+def grow(client, event_id, probe_headers, bookings):
+    """One more booking for the probe client, and `bookings` by new clients"""
+    book(client, probe_headers, event_id)
+    for _ in range(bookings):
+        username = f"cliente_{uuid.uuid4().hex[:8]}"
+        register_client(client, username)
+        book(client, auth_headers(client, username, "Password1"), event_id)
+
+
+def collscans(plan):
+    """Names of the COLLSCAN stages in an explain() plan tree"""
+    if isinstance(plan, dict):
+        found = ["COLLSCAN"] if plan.get("stage") == "COLLSCAN" else []
+        for value in plan.values():
+            found += collscans(value)
+        return found
+    if isinstance(plan, list):
+        return [stage for item in plan for stage in collscans(item)]
+    return []
+
+
+async def explain_queries(db, queries):
+    """(collection, filter) of every filtered query answered by a collection scan"""
+    scans = []
+    for collection, method, query in queries:
+        if method == "aggregate":
+            query = query[0].get("$match") if query and "$match" in query[0] else None
+        if not query or method.startswith("insert"):
+            continue
+        plan = await db.command({"explain": {"find": collection, "filter": query}, "verbosity": "queryPlanner"})
+        if collscans(plan["queryPlanner"]["winningPlan"]):
+            scans.append((collection, query))
+    return scans
+
+
+@pytest.fixture
+def populated(client):
+    register_client(client, "cliente_budget")
+    event = next(e for e in client.get("/api/events").json() if e["organization"] == MILANO)
+    organization = next(o for o in client.get("/api/organizations").json() if o["name"] == MILANO)
+    headers = {role: auth_headers(client, *credentials) for role, credentials in CALLERS.items()}
+    return client, event, organization, headers
+
+
+def measure(populated, db, caller, method, path, body=None, scan_accepted=False):
+    """Commands issued by the route, with the data at two sizes"""
+    client, event, organization, headers = populated
+    counts = []
+    for bookings in (1, 4):
+        grow(client, event["id"], headers["cliente"], bookings)
+        chat_id = client.get("/api/user/chats", headers=headers["cliente"]).json()[0]["id"]
+        names = dict(event_id=event["id"], chat_id=chat_id, organization=MILANO, org_id=organization["id"])
+        url = path.format(**names)
+        json = {key: value.format(**names) if isinstance(value, str) else value for key, value in body.items()} if body else None
+
+        # Measure the worst case: nothing is cached yet
+        clear_caches()
+        db.reset()
+        response = client.request(method, url, json=json, headers=headers.get(caller))
+        assert response.status_code == 200, response.text
+        assert int(response.headers["x-db-queries"]) == db.total
+        counts.append(db.total)
+
+        if TEST_MONGO_URL and not scan_accepted:
+            assert client.portal.call(explain_queries, db, list(db.queries)) == []
+    return counts
+
+
+@pytest.mark.parametrize("caller,path,budget", ROUTE_BUDGETS, ids=[path for _, path, _ in ROUTE_BUDGETS])
+def test_route_stays_within_query_budget(populated, db, caller, path, budget):
+    counts = measure(populated, db, caller, "GET", path)
+    assert counts[0] == counts[1], f"{path} issues more queries as data grows: {counts}"
+    assert counts[1] <= budget, f"{path} issued {counts[1]} commands, budget {budget}"
+
+
+@pytest.mark.parametrize("caller,path,body,budget", WRITE_BUDGETS, ids=[path for _, path, _, _ in WRITE_BUDGETS])
+def test_write_stays_within_query_budget(populated, db, caller, path, body, budget):
+    counts = measure(populated, db, caller, "POST", path, body)
+    assert counts[0] == counts[1], f"POST {path} issues more queries as data grows: {counts}"
+    assert counts[1] <= budget, f"POST {path} issued {counts[1]} commands, budget {budget}"
+
+
+@pytest.mark.parametrize("caller,path,body,budget,scan_accepted", POST_READ_BUDGETS,
+                         ids=[path for _, path, _, _, _ in POST_READ_BUDGETS])
+def test_post_read_stays_within_query_budget(populated, db, caller, path, body, budget, scan_accepted):
+    counts = measure(populated, db, caller, "POST", path, body, scan_accepted)
+    assert counts[0] == counts[1], f"POST {path} issues more queries as data grows: {counts}"
+    assert counts[1] <= budget, f"POST {path} issued {counts[1]} commands, budget {budget}"
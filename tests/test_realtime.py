@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from realtime import Connection
+from tests.utils import auth_headers, book, register_client
+
+
+def test_websocket_pushes_messages_and_unread_counts(client):
+    register_client(client, "cliente_ws")
+    client_headers = auth_headers(client, "cliente_ws", "Password1")
+    promoter_headers = auth_headers(client, "marco_promoter", "Password1@")
+    promoter_token = promoter_headers["Authorization"].split()[1]
+
+    with client.websocket_connect(f"/api/ws?token={promoter_token}") as websocket:
+        event_id = client.get("/api/events").json()[0]["id"]
+        booking = book(client, client_headers, event_id)
+
+        assert websocket.receive_json() == {
+            "type": "booking",
+            "booking_id": booking["booking_id"],
+            "chat_id": booking["chat_id"],
+            "event_id": event_id
+        }
+        pushed = websocket.receive_json()
+        assert pushed["type"] == "message"
+        assert pushed["chat_id"] == booking["chat_id"]
+        assert pushed["message"]["is_automatic"] is True
+        assert websocket.receive_json() == {"type": "unread", "notification_count": 1}
+
+        client.post(f"/api/chats/{booking['chat_id']}/messages", json={
+            "chat_id": booking["chat_id"], "sender_id": "", "sender_role": "", "message": "ciao"
+        }, headers=client_headers)
+        assert websocket.receive_json()["message"]["message"] == "ciao"
+        assert websocket.receive_json() == {"type": "unread", "notification_count": 2}
+
+
+def test_websocket_rejects_invalid_token(client):
+    with pytest.raises(WebSocketDisconnect) as excinfo:
+        with client.websocket_connect("/api/ws?token=not-a-token") as websocket:
+            websocket.receive_json()
+    assert excinfo.value.code == 1008
+
+
+def test_slow_connection_is_dropped_when_queue_overflows():
+    class StalledSocket:
+        def __init__(self):
+            self.closed_with = None
+
+        async def send_json(self, payload):
+            await asyncio.sleep(3600)
+
+        async def receive_text(self):
+            await asyncio.sleep(3600)
+
+        async def close(self, code):
+            self.closed_with = code
+
+    async def scenario():
+        socket = StalledSocket()
+        connection = Connection(socket, max_queue=2)
+        serving = asyncio.ensure_future(connection.serve())
+        await asyncio.sleep(0.01)
+        results = [connection.offer({"n": index}) for index in range(4)]
+        await asyncio.wait_for(serving, timeout=1)
+        return results, socket.closed_with
+
+    results, close_code = asyncio.run(scenario())
+    # Offers never yield to the sender, so only max_queue payloads fit
+    assert results == [True, True, False, False]
+    assert close_code == 1013
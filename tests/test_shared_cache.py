@@ -0,0 +1,117 @@
+import asyncio
+
+import server
+from shared_cache import MemoryCacheBackend, SharedCache
+from tests.utils import auth_headers
+
+
+def counting_loader(values):
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return values[min(len(calls), len(values)) - 1]
+
+    return load, calls
+
+
+def test_workers_share_the_second_tier():
+    backend = MemoryCacheBackend()
+    first, second = SharedCache("test", backend, 60, 60), SharedCache("test", backend, 60, 60)
+    load, calls = counting_loader([{"name": "Neon"}])
+
+    async def run():
+        return await first.get("key", load), await second.get("key", load), await second.get("key", load)
+
+    assert asyncio.run(run()) == ({"name": "Neon"},) * 3
+    assert len(calls) == 1
+    assert second.stats()["l2_hits"] == 1
+    assert second.stats()["l1_hits"] == 1
+
+
+def test_stale_entries_are_served_while_refreshing():
+    cache = SharedCache("test", MemoryCacheBackend(), fresh_ttl=0.05, stale_ttl=60)
+    load, calls = counting_loader(["old", "new"])
+
+    async def run():
+        await cache.get("key", load)
+        await asyncio.sleep(0.06)
+        stale = await cache.get("key", load)
+        await asyncio.gather(*cache._refreshing.values())
+        return stale, await cache.get("key", load)
+
+    assert asyncio.run(run()) == ("old", "new")
+    assert len(calls) == 2
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_load_racing_an_invalidation_is_not_stored():
+    cache = SharedCache("test", MemoryCacheBackend(), 60, 60)
+    load, calls = counting_loader(["before write", "after write"])
+
+    async def run():
+        pending = asyncio.ensure_future(cache.get("key", load))
+        await asyncio.sleep(0)
+        await cache.invalidate(["key"])
+        await pending
+        return await cache.get("key", load)
+
+    assert asyncio.run(run()) == "after write"
+    assert len(calls) == 2
+
+
+def test_profile_is_cached_until_edited(client, db):
+    headers = auth_headers(client, "marco_promoter", "Password1@")
+    user_id = client.get("/api/user/profile", headers=headers).json()["id"]
+
+    client.get(f"/api/users/{user_id}/profile", headers=headers)
+    db.reset()
+    assert client.get(f"/api/users/{user_id}/profile", headers=headers).json()["username"] == "marco_promoter"
+    assert db.commands["users"] == 0
+
+    response = client.put("/api/user/profile/edit", json={
+        "nome": "Marco", "username": "marco_pr", "biografia": "", "citta": "Milano"
+    }, headers=headers)
+    assert response.status_code == 200, response.text
+
+    assert client.get(f"/api/users/{user_id}/profile", headers=headers).json()["username"] == "marco_pr"
+    promoters = client.get("/api/organizations/Night Events Milano/promoters", headers=headers).json()
+    assert "marco_pr" in {promoter["username"] for promoter in promoters}
+
+
+def test_writes_invalidate_organizations_and_members(client, db):
+    founder = auth_headers(client, "admin", "admin123")
+    members = client.get("/api/organizations/Night Events Milano/members", headers=founder).json()
+    names = {organization["name"] for organization in client.get("/api/organizations").json()}
+
+    response = client.post("/api/organizations", json={"name": "Nuova Org", "location": "Torino"}, headers=founder)
+    assert response.status_code == 200, response.text
+    response = client.post("/api/users/temporary-credentials", json={
+        "nome": "Nuovo", "email": "nuovo@example.com", "password": "Password1",
+        "ruolo": "promoter", "organization": "Night Events Milano"
+    }, headers=founder)
+    assert response.status_code == 200, response.text
+
+    assert {o["name"] for o in client.get("/api/organizations").json()} == names | {"Nuova Org"}
+    updated = client.get("/api/organizations/Night Events Milano/members", headers=founder).json()
+    assert len(updated) == len(members) + 1
+
+
+def test_event_detail_invalidated_by_update(client, db):
+    headers = auth_headers(client, "admin", "admin123")
+    event_id = client.get("/api/events").json()[0]["id"]
+    client.get(f"/api/events/{event_id}")
+
+    response = client.put(f"/api/events/{event_id}", json={"name": "Rinominato"}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert client.get(f"/api/events/{event_id}").json()["name"] == "Rinominato"
+
+
+def test_other_workers_forget_invalidated_keys(client):
+    event_id = client.get("/api/events").json()[0]["id"]
+    client.get(f"/api/events/{event_id}")
+    assert len(server.event_details.local) == 1
+
+    client.portal.call(server.dispatch_fanout, {"kind": "cache_invalidated", "cache": "event_detail", "keys": [event_id]})
+    assert len(server.event_details.local) == 0
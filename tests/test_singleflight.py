@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+import server
+from metrics import render_metrics
+from singleflight import SingleFlight, route_enabled
+from tests.test_metrics import sample
+
+
+def test_concurrent_loads_share_one_call():
+    group = SingleFlight("test")
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": len(calls)}
+
+    async def burst():
+        first = await asyncio.gather(*(group.do("key", load) for _ in range(10)))
+        # Once the load has completed the next caller queries again
+        return first, await group.do("key", load)
+
+    first, later = asyncio.run(burst())
+
+    assert first == [{"value": 1}] * 10
+    assert later == {"value": 2}
+    assert group.stats() == {"enabled": True, "in_flight": 0, "leaders": 2, "followers": 9, "collapse_ratio": 9 / 11}
+
+
+def test_errors_reach_every_waiter():
+    group = SingleFlight("test")
+
+    async def load():
+        await asyncio.sleep(0)
+        raise LookupError("down")
+
+    async def burst():
+        return await asyncio.gather(*(group.do("key", load) for _ in range(3)), return_exceptions=True)
+
+    assert [type(result) for result in asyncio.run(burst())] == [LookupError] * 3
+    assert group.stats()["in_flight"] == 0
+
+
+def test_disabled_group_calls_through():
+    group = SingleFlight("test", enabled=False)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0)
+
+    async def burst():
+        await asyncio.gather(*(group.do("key", load) for _ in range(4)))
+
+    asyncio.run(burst())
+    assert len(calls) == 4
+    assert group.stats()["followers"] == 0
+
+
+@pytest.mark.parametrize("routes,expected", [("*", True), ("events,event_detail", True), ("events", False), ("", False)])
+def test_routes_are_configurable(routes, expected):
+    assert route_enabled("event_detail", routes) is expected
+
+
+def test_event_detail_burst_issues_one_query(client, db):
+    event_id = client.get("/api/events").json()[0]["id"]
+    before = sample(render_metrics()[0].decode(), "clubly_singleflight_calls_total", role="follower", route="event_detail")
+
+    async def burst():
+        return await asyncio.gather(*(server.get_event(event_id) for _ in range(20)))
+
+    db.reset()
+    events = client.portal.call(burst)
+
+    assert {event["id"] for event in events} == {event_id}
+    assert db.commands["events"] == 1
+    body = render_metrics()[0].decode()
+    assert sample(body, "clubly_singleflight_calls_total", role="follower", route="event_detail") == before + 19
+    assert 0 < sample(body, "clubly_singleflight_collapse_ratio", route="event_detail") <= 1
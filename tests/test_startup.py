@@ -0,0 +1,34 @@
+from fastapi.testclient import TestClient
+
+import server
+from seed import seed_default_data
+
+
+def test_startup_does_not_seed(db):
+    with TestClient(server.app) as client:
+        client.portal.call(server.health.wait_warmed_up)
+        assert client.portal.call(db.users.count_documents, {}) == 0
+        # Nor does it build indexes: serving, but degraded until indexes.py has run
+        ready = client.get("/api/health/ready")
+        assert ready.status_code == 200
+        assert ready.json()["status"] == "degraded"
+
+
+def test_seeding_is_idempotent(client, db):
+    counts = {name: client.portal.call(db[name].count_documents, {}) for name in ("users", "organizations", "events")}
+    assert counts["users"] == 5
+
+    db.reset()
+    client.portal.call(seed_default_data, db)
+    # Only the existence checks run: three for users, one each for organizations and events
+    assert db.commands == {"users": 3, "organizations": 1, "events": 1}
+    assert {name: client.portal.call(db[name].count_documents, {}) for name in counts} == counts
+
+
+def test_ready_reports_unreachable_database(client, monkeypatch):
+    async def unreachable(*args, **kwargs):
+        raise ConnectionError("no route to host")
+
+    monkeypatch.setattr(server.db, "command", unreachable, raising=False)
+    response = client.get("/api/health/ready")
+    assert response.status_code == 503
@@ -0,0 +1,226 @@
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+import server
+from waiting_room import WaitingRoom
+from tests.utils import auth_headers, book, register_client, request_booking
+
+BOOKINGS = 1000
+TABLES = 20
+# Collection methods returning an awaitable (find and aggregate return cursors)
+AWAITABLE_METHODS = {
+    "find_one", "count_documents", "insert_one", "insert_many", "update_one",
+    "update_many", "delete_one", "delete_many", "find_one_and_update",
+}
+
+
+class Interleaved:
+    """Yields to the event loop around every database call, as network I/O would
+
+    mongomock answers synchronously, so without this concurrent requests
+    would run one after the other and no race could ever show up.
+    """
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if name not in AWAITABLE_METHODS:
+            return attribute
+
+        async def interleaved(*args, **kwargs):
+            await asyncio.sleep(0)
+            result = await attribute(*args, **kwargs)
+            await asyncio.sleep(0)
+            return result
+        return interleaved
+
+
+class InterleavedDatabase:
+    def __init__(self, database):
+        self._database = database
+
+    def __getattr__(self, name):
+        return Interleaved(getattr(self._database, name))
+
+
+def add_event(client, db, tables):
+    event = {
+        "id": str(uuid.uuid4()),
+        "name": "SOLD OUT",
+        "date": "2030-06-01",
+        "location": "Club Matrix, Milano",
+        "organization": "Night Events Milano",
+        "start_time": "23:00",
+        "total_tables": tables,
+        "tables_available": tables,
+        "created_at": datetime.utcnow(),
+    }
+    client.portal.call(db.events.insert_one, event)
+    return event
+
+
+def tables_available(client, db, event_id):
+    return client.portal.call(db.events.find_one, {"id": event_id})["tables_available"]
+
+
+def test_concurrent_table_bookings_never_oversell(client, db, monkeypatch):
+    event = add_event(client, db, TABLES)
+    users = [
+        {"id": str(uuid.uuid4()), "nome": "Cliente", "cognome": str(n), "username": f"stress_{n}", "email": f"stress_{n}@example.com", "ruolo": "cliente"}
+        for n in range(BOOKINGS)
+    ]
+    client.portal.call(db.users.insert_many, [dict(user) for user in users])
+    monkeypatch.setattr(server, "db", InterleavedDatabase(db))
+    # Let the whole herd through: this is about the inventory, not admission
+    monkeypatch.setattr(server, "waiting_room", WaitingRoom(burst=BOOKINGS))
+
+    async def storm():
+        return await asyncio.gather(*(
+            server.create_booking(server.Booking(event_id=event["id"], booking_type="tavolo", party_size=4), user)
+            for user in users
+        ), return_exceptions=True)
+
+    results = client.portal.call(storm)
+
+    failures = [result for result in results if isinstance(result, Exception)]
+    assert all(isinstance(failure, HTTPException) and failure.status_code == 409 for failure in failures), failures[:1]
+    assert len(results) - len(failures) == TABLES
+    assert tables_available(client, db, event["id"]) == 0
+    assert client.portal.call(db.bookings.count_documents, {"event_id": event["id"], "table_held": True}) == TABLES
+
+
+def test_cancelling_releases_the_table_once(client, db):
+    event = add_event(client, db, 1)
+    register_client(client, "cliente_tavolo")
+    headers = auth_headers(client, "cliente_tavolo", "Password1")
+    promoter = auth_headers(client, "marco_promoter", "Password1@")
+
+    booking_id = book(client, headers, event["id"], "tavolo", 4)["booking_id"]
+    sold_out = request_booking(client, headers, event["id"], "tavolo", 4)
+    assert sold_out.status_code == 409
+
+    for _ in range(2):
+        response = client.put(f"/api/bookings/{booking_id}/status", params={"status": "cancelled"}, headers=promoter)
+        assert response.status_code == 200, response.text
+    assert tables_available(client, db, event["id"]) == 1
+    assert client.get(f"/api/events/{event['id']}").json()["tables_available"] == 1
+
+    # Reinstating the booking takes the table again, if it is still free
+    response = client.put(f"/api/bookings/{booking_id}/status", params={"status": "confirmed"}, headers=promoter)
+    assert response.status_code == 200, response.text
+    assert tables_available(client, db, event["id"]) == 0
+
+
+def test_claims_keep_the_listing_cache(client, db):
+    event = add_event(client, db, 2)
+    register_client(client, "cliente_tavolo")
+    headers = auth_headers(client, "cliente_tavolo", "Password1")
+    client.get("/api/events")
+    client.get(f"/api/events/{event['id']}")
+
+    book(client, headers, event["id"], "tavolo", 4)
+    db.reset()
+    client.get("/api/events")
+    assert db.commands["events"] == 0
+    # The event's own detail is refreshed
+    assert client.get(f"/api/events/{event['id']}").json()["tables_available"] == 1
+
+
+def test_reinstating_fails_when_sold_out(client, db):
+    event = add_event(client, db, 1)
+    register_client(client, "cliente_tavolo")
+    headers = auth_headers(client, "cliente_tavolo", "Password1")
+    promoter = auth_headers(client, "marco_promoter", "Password1@")
+
+    first = book(client, headers, event["id"], "tavolo", 4)
+    client.put(f"/api/bookings/{first['booking_id']}/status", params={"status": "cancelled"}, headers=promoter)
+    second = request_booking(client, headers, event["id"], "tavolo", 4)
+    assert second.status_code == 200, second.text
+
+    response = client.put(f"/api/bookings/{first['booking_id']}/status", params={"status": "confirmed"}, headers=promoter)
+    assert response.status_code == 409
+    assert tables_available(client, db, event["id"]) == 0
+
+
+class FailingInsert:
+    """Database whose insert_one into `collection` runs `fail` instead"""
+
+    def __init__(self, database, collection, fail):
+        self._database = database
+        self._collection = collection
+        self._fail = fail
+
+    def __getattr__(self, name):
+        collection = getattr(self._database, name)
+        if name != self._collection:
+            return collection
+        fail = self._fail
+
+        class Failing:
+            def __getattr__(self, method):
+                return getattr(collection, method)
+
+            async def insert_one(self, document):
+                await fail()
+        return Failing()
+
+
+async def connection_reset():
+    raise ConnectionError("connection reset")
+
+
+def booking_rows(client, db, event_id):
+    chats = client.portal.call(lambda: db.chats.find({"event_id": event_id}).to_list(None))
+    return (
+        client.portal.call(db.bookings.count_documents, {"event_id": event_id}),
+        len(chats),
+        client.portal.call(db.chat_messages.count_documents, {"chat_id": {"$in": [chat["id"] for chat in chats]}}),
+    )
+
+
+@pytest.mark.parametrize("collection", ["bookings", "chats", "chat_messages"])
+def test_failed_booking_leaves_nothing_behind(client, db, monkeypatch, collection):
+    event = add_event(client, db, 2)
+    register_client(client, "cliente_tavolo")
+    headers = auth_headers(client, "cliente_tavolo", "Password1")
+    monkeypatch.setattr(server, "db", FailingInsert(db, collection, connection_reset))
+
+    with pytest.raises(ConnectionError):
+        request_booking(client, headers, event["id"], "tavolo", 4)
+    assert tables_available(client, db, event["id"]) == 2
+    assert booking_rows(client, db, event["id"]) == (0, 0, 0)
+
+
+def test_cancelled_booking_cleans_up_even_if_cancelled_again(client, db, monkeypatch):
+    event = add_event(client, db, 2)
+    user = register_client(client, "cliente_tavolo")
+    reached = asyncio.Event()
+
+    async def hang():
+        reached.set()
+        await asyncio.Event().wait()
+
+    # Every database call yields, so the cleanup is still running when cancelled again
+    monkeypatch.setattr(server, "db", InterleavedDatabase(FailingInsert(db, "chat_messages", hang)))
+
+    async def scenario():
+        booking = server.Booking(event_id=event["id"], booking_type="tavolo", party_size=4)
+        task = asyncio.ensure_future(server.create_booking(booking, user))
+        await reached.wait()
+        task.cancel()
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        for _ in range(50):
+            await asyncio.sleep(0)
+
+    client.portal.call(scenario)
+    assert tables_available(client, db, event["id"]) == 2
+    assert booking_rows(client, db, event["id"]) == (0, 0, 0)
@@ -0,0 +1,39 @@
+from tests.utils import auth_headers, insert_chats, register_client
+
+
+def test_user_chats_query_count_is_constant(client, db):
+    headers = auth_headers(client, "marco_promoter", "Password1@")
+    promoter = client.get("/api/user/profile", headers=headers).json()
+    event_id = client.get("/api/events").json()[0]["id"]
+    clients = [register_client(client, f"cliente_{index}") for index in range(12)]
+
+    query_counts = []
+    for batch in (clients[:2], clients[2:]):
+        client.portal.call(insert_chats, db, promoter["id"], event_id, [user["id"] for user in batch], 2)
+        db.reset()
+        response = client.get("/api/user/chats", headers=headers)
+        assert response.status_code == 200
+        query_counts.append(db.total)
+
+    assert len(response.json()) == 12
+    assert query_counts[0] == query_counts[1]
+
+
+def test_user_chats_response_shape(client, db):
+    headers = auth_headers(client, "marco_promoter", "Password1@")
+    promoter = client.get("/api/user/profile", headers=headers).json()
+    event = client.get("/api/events").json()[0]
+    user = register_client(client, "cliente_shape")
+    client.portal.call(insert_chats, db, promoter["id"], event["id"], [user["id"]], 2)
+
+    promoter_view = client.get("/api/user/chats", headers=headers).json()[0]
+    assert promoter_view["event"]["id"] == event["id"]
+    assert promoter_view["other_participant"]["id"] == user["id"]
+    assert "password" not in promoter_view["other_participant"]
+    assert promoter_view["participant_role"] == "cliente"
+    assert promoter_view["last_message"]["message"] == "messaggio 1"
+
+    client_headers = auth_headers(client, "cliente_shape", "Password1")
+    client_view = client.get("/api/user/chats", headers=client_headers).json()[0]
+    assert client_view["other_participant"]["id"] == promoter["id"]
+    assert client_view["participant_role"] == "promoter"
@@ -0,0 +1,94 @@
+import pytest
+
+import server
+from waiting_room import WaitingRoom
+from tests.utils import auth_headers, register_client
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_queue_admits_at_the_configured_rate(clock):
+    room = WaitingRoom(rate=1, burst=2, clock=clock)
+    assert room.enter("event", "a") and room.enter("event", "b")
+    assert not room.enter("event", "c")
+
+    first, second = room.join("event", "c"), room.join("event", "d")
+    assert (first["position"], second["position"]) == (1, 2)
+    assert room.join("event", "c")["token"] == first["token"]
+
+    clock.now += 1
+    assert room.status("event", first["token"])["admitted"]
+    assert room.status("event", second["token"])["position"] == 1
+    # Queued clients keep their turn over new arrivals
+    assert not room.enter("event", "e")
+
+    assert not room.enter("event", "d", first["token"])
+    assert room.enter("event", "c", first["token"])
+    assert room.status("event", first["token"]) is None
+
+
+def test_idle_tickets_and_unused_admissions_expire(clock):
+    room = WaitingRoom(rate=1, burst=1, admission_ttl=10, idle_timeout=5, clock=clock)
+    room.enter("event", "a")
+    gone, waiting = room.join("event", "b"), room.join("event", "c")
+
+    # b stopped polling, so the next credit goes to c
+    clock.now += 6
+    assert room.status("event", waiting["token"])["admitted"]
+    assert room.status("event", gone["token"]) is None
+
+    clock.now += 11
+    assert room.status("event", waiting["token"]) is None
+    # The bucket has refilled meanwhile, so c still gets in, just not from the queue
+    assert room.enter("event", "c", waiting["token"])
+    assert room.stats()["admitted_from_queue"] == 0
+
+
+def test_rush_is_queued_and_polling_is_served_from_memory(client, db, clock, monkeypatch):
+    monkeypatch.setattr(server, "waiting_room", WaitingRoom(rate=1, burst=1, clock=clock))
+    event_id = client.get("/api/events").json()[0]["id"]
+    register_client(client, "cliente_coda")
+    headers = auth_headers(client, "cliente_coda", "Password1")
+    booking = {"event_id": event_id, "booking_type": "lista", "party_size": 2}
+
+    assert client.post("/api/bookings", json=booking, headers=headers).status_code == 200
+    refused = client.post("/api/bookings", json=booking, headers=headers)
+    assert refused.status_code == 429
+    assert refused.headers["retry-after"] == "2"
+
+    ticket = client.post(f"/api/events/{event_id}/queue", headers=headers).json()
+    assert (ticket["admitted"], ticket["position"]) == (False, 1)
+
+    db.reset()
+    clock.now += 1
+    polled = client.get(f"/api/events/{event_id}/queue/{ticket['token']}").json()
+    assert polled["admitted"]
+    assert db.total == 0
+
+    response = client.post("/api/bookings", json={**booking, "queue_token": ticket["token"]}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert client.get(f"/api/events/{event_id}/queue/{ticket['token']}").status_code == 404
+    assert client.post("/api/events/missing/queue", headers=headers).status_code == 404
+
+
+def test_unknown_events_do_not_open_rooms(client, monkeypatch):
+    room = WaitingRoom(rate=1, burst=1)
+    monkeypatch.setattr(server, "waiting_room", room)
+    register_client(client, "cliente_coda")
+    headers = auth_headers(client, "cliente_coda", "Password1")
+
+    for n in range(3):
+        response = client.post("/api/bookings", json={"event_id": f"missing-{n}", "booking_type": "lista", "party_size": 2}, headers=headers)
+        assert response.status_code == 404
+    assert room.rooms == {}
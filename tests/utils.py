@@ -0,0 +1,71 @@
+"""Shared helpers for the API test suite"""
+import uuid
+from datetime import datetime, timedelta
+
+
+def auth_headers(client, login, password):
+    response = client.post("/api/auth/login", json={"login": login, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+def register_client(client, username):
+    response = client.post("/api/auth/register", json={
+        "nome": "Cliente",
+        "cognome": username,
+        "email": f"{username}@example.com",
+        "username": username,
+        "password": "Password1",
+        "data_nascita": "2000-01-01",
+        "citta": "Milano"
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["user"]
+
+
+def request_booking(client, headers, event_id, booking_type="lista", party_size=2):
+    """POST /api/bookings, returning the response whatever its status"""
+    return client.post("/api/bookings", json={
+        "event_id": event_id, "booking_type": booking_type, "party_size": party_size
+    }, headers=headers)
+
+
+def book(client, headers, event_id, booking_type="lista", party_size=2):
+    """Book the event and return the created booking"""
+    response = request_booking(client, headers, event_id, booking_type, party_size)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def send_message(client, chat_id, headers, text):
+    response = client.post(f"/api/chats/{chat_id}/messages", json={
+        "chat_id": chat_id, "sender_id": "", "sender_role": "", "message": text
+    }, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def insert_chats(db, promoter_id, event_id, client_ids, messages=1):
+    """Insert an active chat per client, each with `messages` messages from the client"""
+    now = datetime.utcnow()
+    for index, client_id in enumerate(client_ids):
+        chat_id = str(uuid.uuid4())
+        await db.chats.insert_one({
+            "id": chat_id,
+            "booking_id": str(uuid.uuid4()),
+            "client_id": client_id,
+            "promoter_id": promoter_id,
+            "event_id": event_id,
+            "status": "active",
+            "created_at": now + timedelta(seconds=index)
+        })
+        for offset in range(messages):
+            await db.chat_messages.insert_one({
+                "id": str(uuid.uuid4()),
+                "chat_id": chat_id,
+                "sender_id": client_id,
+                "sender_role": "cliente",
+                "message": f"messaggio {offset}",
+                "timestamp": now + timedelta(seconds=index, milliseconds=offset),
+                "is_automatic": False
+            })